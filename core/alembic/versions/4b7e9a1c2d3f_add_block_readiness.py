@@ -0,0 +1,95 @@
+"""add block readiness
+
+Revision ID: 4b7e9a1c2d3f
+Revises: 8f1d2c3b4a5e
+Create Date: 2026-10-19 11:03:27.518902
+
+"""
+
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4b7e9a1c2d3f"
+down_revision: Union[str, None] = "8f1d2c3b4a5e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _is_unconfigured(value) -> bool:
+    return value is None or value in ("", [], {})
+
+
+def upgrade() -> None:
+    op.add_column(
+        "blocks",
+        sa.Column(
+            "missing_configs", sa.JSON(), server_default="[]", nullable=False
+        ),
+    )
+    op.add_column(
+        "blocks",
+        sa.Column(
+            "missing_config_count",
+            sa.Integer(),
+            server_default="0",
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_blocks_project_readiness",
+        "blocks",
+        ["project_uuid", "missing_config_count"],
+        unique=False,
+    )
+
+    # Backfill the readiness of existing blocks
+    conn = op.get_bind()
+    blocks = conn.execute(
+        sa.text(
+            """
+            SELECT blocks.uuid, entrypoints.envs, entrypoints.uuid
+            FROM blocks
+            JOIN entrypoints
+            ON entrypoints.uuid = blocks.selected_entrypoint_uuid
+            """
+        )
+    ).fetchall()
+    io_configs = {}
+    for entrypoint_uuid, config in conn.execute(
+        sa.text("SELECT entrypoint_uuid, config FROM inputoutputs")
+    ):
+        io_configs.setdefault(entrypoint_uuid, []).append(config or {})
+
+    for block_uuid, envs, entrypoint_uuid in blocks:
+        missing = [k for k, v in (envs or {}).items() if _is_unconfigured(v)]
+        for config in io_configs.get(entrypoint_uuid, []):
+            missing.extend(
+                k for k, v in config.items() if _is_unconfigured(v)
+            )
+
+        conn.execute(
+            sa.text(
+                """
+                UPDATE blocks
+                SET missing_configs = CAST(:missing AS JSON),
+                    missing_config_count = :count
+                WHERE uuid = :uuid
+                """
+            ),
+            {
+                "missing": json.dumps(missing),
+                "count": len(missing),
+                "uuid": block_uuid,
+            },
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_blocks_project_readiness", table_name="blocks")
+    op.drop_column("blocks", "missing_config_count")
+    op.drop_column("blocks", "missing_configs")
@@ -0,0 +1,32 @@
+"""add project version
+
+Revision ID: 8f1d2c3b4a5e
+Revises: 02a29087557a
+Create Date: 2026-10-19 09:12:41.208315
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8f1d2c3b4a5e"
+down_revision: Union[str, None] = "02a29087557a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "projects",
+        sa.Column(
+            "version", sa.Integer(), server_default="1", nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("projects", "version")
@@ -0,0 +1,39 @@
+"""add docker images
+
+Revision ID: a8d4e2f6c3b1
+Revises: f3c1a7e9d5b8
+Create Date: 2026-10-19 18:37:55.104926
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a8d4e2f6c3b1"
+down_revision: Union[str, None] = "f3c1a7e9d5b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "docker_images",
+        sa.Column("image", sa.String(length=150), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("dag_run_id", sa.String(length=250), nullable=True),
+        sa.Column("requested_at", sa.DateTime(timezone=True),
+                  nullable=False),
+        sa.Column("pulled_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("pull_seconds", sa.Float(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("image"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("docker_images")
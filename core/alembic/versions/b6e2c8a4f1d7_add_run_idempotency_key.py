@@ -0,0 +1,40 @@
+"""add run idempotency key
+
+Revision ID: b6e2c8a4f1d7
+Revises: a8d4e2f6c3b1
+Create Date: 2026-10-19 19:12:08.640377
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b6e2c8a4f1d7"
+down_revision: Union[str, None] = "a8d4e2f6c3b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "workflow_runs",
+        sa.Column("idempotency_key", sa.String(length=100), nullable=True),
+    )
+    op.create_index(
+        "ix_workflow_runs_project_idempotency_key",
+        "workflow_runs",
+        ["project_uuid", "idempotency_key"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_workflow_runs_project_idempotency_key",
+        table_name="workflow_runs",
+    )
+    op.drop_column("workflow_runs", "idempotency_key")
@@ -0,0 +1,33 @@
+"""add run from
+
+Revision ID: c4e8a2f6d9b3
+Revises: e5b9c3d7f2a4
+Create Date: 2026-10-19 21:04:37.218954
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4e8a2f6d9b3"
+down_revision: Union[str, None] = "e5b9c3d7f2a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "workflow_runs",
+        sa.Column(
+            "run_from", postgresql.ARRAY(postgresql.UUID()), nullable=True
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("workflow_runs", "run_from")
@@ -0,0 +1,76 @@
+"""add run states
+
+Revision ID: c7d3e5f1a9b2
+Revises: 4b7e9a1c2d3f
+Create Date: 2026-10-19 13:48:02.731650
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c7d3e5f1a9b2"
+down_revision: Union[str, None] = "4b7e9a1c2d3f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "workflow_runs",
+        sa.Column("project_uuid", postgresql.UUID(as_uuid=True),
+                  nullable=False),
+        sa.Column("dag_run_id", sa.String(length=250), nullable=False),
+        sa.Column("state", sa.String(length=50), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["project_uuid"],
+            ["projects.uuid"],
+            name="fk_workflow_run_project_uuid",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("project_uuid", "dag_run_id"),
+    )
+    op.create_index(
+        "ix_workflow_runs_project_started",
+        "workflow_runs",
+        ["project_uuid", "started_at"],
+    )
+
+    op.create_table(
+        "block_runs",
+        sa.Column("project_uuid", postgresql.UUID(as_uuid=True),
+                  nullable=False),
+        sa.Column("dag_run_id", sa.String(length=250), nullable=False),
+        sa.Column("block_uuid", postgresql.UUID(as_uuid=True),
+                  nullable=False),
+        sa.Column("state", sa.String(length=50), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["block_uuid"],
+            ["blocks.uuid"],
+            name="fk_block_run_block_uuid",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["project_uuid", "dag_run_id"],
+            ["workflow_runs.project_uuid", "workflow_runs.dag_run_id"],
+            name="fk_block_run_workflow_run",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("project_uuid", "dag_run_id", "block_uuid"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("block_runs")
+    op.drop_index(
+        "ix_workflow_runs_project_started", table_name="workflow_runs"
+    )
+    op.drop_table("workflow_runs")
@@ -0,0 +1,63 @@
+"""add run history
+
+Revision ID: d2a8f4c6b1e3
+Revises: c7d3e5f1a9b2
+Create Date: 2026-10-19 15:21:44.092137
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d2a8f4c6b1e3"
+down_revision: Union[str, None] = "c7d3e5f1a9b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "workflow_runs",
+        sa.Column("ended_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "workflow_runs",
+        sa.Column(
+            "triggered_by", postgresql.UUID(as_uuid=True), nullable=True
+        ),
+    )
+    op.drop_index(
+        "ix_workflow_runs_project_started", table_name="workflow_runs"
+    )
+    op.create_index(
+        "ix_workflow_runs_project_started",
+        "workflow_runs",
+        ["project_uuid", "started_at", "dag_run_id"],
+    )
+
+    for column in ("queued_at", "started_at", "ended_at"):
+        op.add_column(
+            "block_runs",
+            sa.Column(column, sa.DateTime(timezone=True), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    for column in ("queued_at", "started_at", "ended_at"):
+        op.drop_column("block_runs", column)
+
+    op.drop_index(
+        "ix_workflow_runs_project_started", table_name="workflow_runs"
+    )
+    op.create_index(
+        "ix_workflow_runs_project_started",
+        "workflow_runs",
+        ["project_uuid", "started_at"],
+    )
+    op.drop_column("workflow_runs", "triggered_by")
+    op.drop_column("workflow_runs", "ended_at")
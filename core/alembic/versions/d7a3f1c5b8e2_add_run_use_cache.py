@@ -0,0 +1,32 @@
+"""add run use cache
+
+Revision ID: d7a3f1c5b8e2
+Revises: b6e2c8a4f1d7
+Create Date: 2026-10-19 22:17:52.830416
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d7a3f1c5b8e2"
+down_revision: Union[str, None] = "b6e2c8a4f1d7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "workflow_runs",
+        sa.Column(
+            "use_cache", sa.Boolean(), server_default="true", nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("workflow_runs", "use_cache")
@@ -0,0 +1,43 @@
+"""add block run cache key
+
+Revision ID: e5b9c3d7f2a4
+Revises: d2a8f4c6b1e3
+Create Date: 2026-10-19 16:40:13.554802
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b9c3d7f2a4"
+down_revision: Union[str, None] = "d2a8f4c6b1e3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "block_runs",
+        sa.Column("cache_key", sa.String(length=64), nullable=True),
+    )
+    op.add_column(
+        "block_runs",
+        sa.Column(
+            "cached", sa.Boolean(), server_default="false", nullable=False
+        ),
+    )
+    op.create_index(
+        "ix_block_runs_block_cache_key",
+        "block_runs",
+        ["block_uuid", "cache_key"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_block_runs_block_cache_key", table_name="block_runs")
+    op.drop_column("block_runs", "cached")
+    op.drop_column("block_runs", "cache_key")
@@ -0,0 +1,45 @@
+"""add block resources
+
+Revision ID: f3c1a7e9d5b8
+Revises: c4e8a2f6d9b3
+Create Date: 2026-10-19 18:02:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3c1a7e9d5b8"
+down_revision: Union[str, None] = "c4e8a2f6d9b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("blocks", sa.Column("cpus", sa.Float(), nullable=True))
+    op.add_column(
+        "blocks",
+        sa.Column("memory_limit", sa.String(length=20), nullable=True),
+    )
+    op.add_column(
+        "blocks", sa.Column("pool", sa.String(length=50), nullable=True)
+    )
+    op.add_column(
+        "blocks", sa.Column("priority_weight", sa.Integer(), nullable=True)
+    )
+    op.add_column(
+        "projects",
+        sa.Column("max_active_tasks", sa.Integer(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("projects", "max_active_tasks")
+    op.drop_column("blocks", "priority_weight")
+    op.drop_column("blocks", "pool")
+    op.drop_column("blocks", "memory_limit")
+    op.drop_column("blocks", "cpus")
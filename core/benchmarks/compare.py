@@ -0,0 +1,62 @@
+"""
+Compares two result files of benchmarks.run. Exits with 1 if a benchmark
+got slower by more than the threshold, or executes more statements, so it
+can gate CI.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def compare(base: dict, head: dict, threshold: float) -> list[str]:
+    """Prints the comparison, returns the names of the regressions."""
+    if base["parameters"] != head["parameters"]:
+        print("Warning: the results were measured with different parameters")
+
+    regressions = []
+    print(f"{'benchmark':<32} {'base p50':>10} {'head p50':>10} "
+          f"{'change':>8} {'statements':>11}")
+    for name, result in head["results"].items():
+        before = base["results"].get(name)
+        if before is None:
+            print(f"{name:<32} {'-':>10} {result['p50_ms']:>9.2f}ms")
+            continue
+
+        change = result["p50_ms"] / before["p50_ms"] - 1
+        statements = f"{before['statements']} -> {result['statements']}"
+        regressed = (
+            change > threshold or result["statements"] > before["statements"]
+        )
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:<32} {before['p50_ms']:>8.2f}ms {result['p50_ms']:>8.2f}ms"
+            f" {change:>+7.1%} {statements:>11}"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compares two result files of the benchmarks."
+    )
+    parser.add_argument("base", type=Path)
+    parser.add_argument("head", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="allowed slowdown of the p50, 0.1 being 10%%")
+    args = parser.parse_args()
+
+    regressions = compare(
+        json.loads(args.base.read_text()),
+        json.loads(args.head.read_text()),
+        args.threshold,
+    )
+    if regressions:
+        sys.exit(f"Regressions in {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
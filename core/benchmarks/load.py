@@ -0,0 +1,244 @@
+"""
+Load tests core with simulated editors and dashboard viewers, see
+benchmarks.scenarios. Core runs as its own process, like in production,
+against a local PostgreSQL and stand-ins for airflow, keycloak, S3 and the
+git repositories. Exits with 1 if an operation misses the latency or error
+budget, so it can gate releases. Run from the core directory:
+
+    python -m benchmarks.load --editors 20 --viewers 200 --duration 120
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import UTC, datetime
+from pathlib import Path
+
+from benchmarks import scenarios
+from benchmarks.run import (
+    CORE_DIRECTORY,
+    TEMPLATE_IDENTIFIER,
+    commit,
+    configure_environment,
+    recreate_database,
+)
+from benchmarks.standins import airflow, keycloak, repos, s3
+from benchmarks.standins.server import BackgroundServer
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Load tests core with simulated editors and viewers."
+    )
+    parser.add_argument("--editors", type=int, default=10)
+    parser.add_argument("--viewers", type=int, default=50,
+                        help="users with an open dashboard")
+    parser.add_argument("--duration", type=float, default=60,
+                        help="seconds measured once all users are active")
+    parser.add_argument("--ramp-up", type=float, default=10,
+                        help="seconds over which the users start")
+    parser.add_argument("--think-seconds", type=float, default=2,
+                        help="average pause of an editor between actions")
+    parser.add_argument("--trigger-seconds", type=float, default=60,
+                        help="interval in which every editor triggers a run, "
+                             "0 triggers none")
+    parser.add_argument("--projects", type=int,
+                        help="projects the editors share, defaults to one "
+                             "per editor")
+    parser.add_argument("--blocks", type=int, default=20)
+    parser.add_argument("--inputs", type=int, default=2)
+    parser.add_argument("--outputs", type=int, default=2)
+    parser.add_argument("--edges", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="uvicorn workers of core")
+    parser.add_argument("--task-seconds", type=float, default=5,
+                        help="duration of the simulated airflow tasks")
+    parser.add_argument("--failure-rate", type=float, default=0,
+                        help="probability of a simulated task to fail")
+    parser.add_argument("--airflow-latency-ms", type=float, default=0)
+    parser.add_argument("--max-p99-ms", type=float, default=1000,
+                        help="latency budget of every operation")
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                        help="error budget of every operation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database", default="core_benchmark",
+                        help="dropped and recreated on every run")
+    parser.add_argument("--output", type=Path,
+                        help="defaults to benchmarks/results/"
+                             "load-<commit>.json")
+    return parser.parse_args()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_core(port: int, workers: int) -> subprocess.Popen:
+    core = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1",
+            "--port", str(port),
+            "--workers", str(workers),
+            "--log-level", "warning",
+        ],
+        cwd=CORE_DIRECTORY,
+    )
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if core.poll() is not None:
+            sys.exit("Core exited during startup")
+        try:
+            urllib.request.urlopen(
+                f"http://127.0.0.1:{port}/health", timeout=1
+            ).close()
+            return core
+        except OSError:
+            time.sleep(0.5)
+    core.terminate()
+    sys.exit("Core did not become healthy within 60 seconds")
+
+
+def check_budgets(
+    results: dict[str, dict], max_p99_ms: float, max_error_rate: float
+) -> list[str]:
+    """Returns the operations missing the latency or error budget."""
+    return [
+        operation for operation, result in results.items()
+        if result["p99_ms"] > max_p99_ms
+        or result["error_rate"] > max_error_rate
+    ]
+
+
+def _print_results(results: dict[str, dict], violations: list[str]) -> None:
+    print(f"{'operation':<32} {'requests':>9} {'req/s':>8} {'p50':>10} "
+          f"{'p99':>10} {'errors':>7}")
+    for operation, result in results.items():
+        print(
+            f"{operation:<32} {result['requests']:>9} "
+            f"{result['throughput_rps']:>8.2f} "
+            f"{result['p50_ms']:>8.2f}ms {result['p99_ms']:>8.2f}ms "
+            f"{result['error_rate']:>7.2%}"
+            f"{'  OVER BUDGET' if operation in violations else ''}"
+        )
+
+
+def main() -> None:
+    args = _parse_args()
+    os.chdir(CORE_DIRECTORY)
+    workload = scenarios.Workload(
+        editors=args.editors,
+        viewers=args.viewers,
+        duration=args.duration,
+        ramp_up=args.ramp_up,
+        think_seconds=args.think_seconds,
+        trigger_seconds=args.trigger_seconds,
+        seed=args.seed,
+    )
+
+    with tempfile.TemporaryDirectory(prefix="scystream-load-") as tmp:
+        workdir = Path(tmp)
+        fake_airflow = airflow.FakeAirflow(
+            dag_dir=str(workdir / "dags"),
+            task_seconds=args.task_seconds,
+            failure_rate=args.failure_rate,
+            seed=args.seed,
+        )
+        fake_s3 = s3.FakeS3()
+        servers = [
+            BackgroundServer(airflow.create_app(
+                fake_airflow, latency_ms=args.airflow_latency_ms
+            )),
+            BackgroundServer(s3.create_app(fake_s3)),
+            BackgroundServer(keycloak.create_app()),
+        ]
+        for server in servers:
+            server.start()
+        fake_airflow.start()
+        airflow_server, s3_server, keycloak_server = servers
+
+        core_port = _free_port()
+        configure_environment(args.database, workdir, airflow_server.url,
+                              s3_server.port)
+        os.environ.update({
+            "KEYCLOAK_SERVER_URL": keycloak_server.url,
+            # the simulated runs report their events to core
+            "AIRFLOW_CALLBACK_URL": f"http://127.0.0.1:{core_port}",
+            "RUN_SYNC_INTERVAL_SECONDS": "60",
+        })
+        repos.write_block_repo(workdir / "repos", args.inputs, args.outputs)
+        repos.write_template_repo(
+            workdir / "repos",
+            TEMPLATE_IDENTIFIER,
+            args.blocks,
+            args.inputs,
+            args.outputs,
+            args.edges,
+            args.seed,
+        )
+
+        recreate_database()
+
+        # core modules read their settings on import
+        from benchmarks import seed
+
+        project_ids = [
+            seed.seed_project(f"load {p}", TEMPLATE_IDENTIFIER)
+            for p in range(args.projects or max(1, args.editors))
+        ]
+        for project_id in project_ids:
+            seed.seed_output_files(project_id, fake_s3)
+
+        core = _start_core(core_port, args.workers)
+        try:
+            results = asyncio.run(scenarios.run_load(
+                f"http://127.0.0.1:{core_port}", project_ids, workload
+            ))
+        finally:
+            core.terminate()
+            core.wait(timeout=30)
+            fake_airflow.stop()
+            for server in servers:
+                server.stop()
+
+    violations = check_budgets(results, args.max_p99_ms, args.max_error_rate)
+    _print_results(results, violations)
+
+    commit_id = commit()
+    output = args.output or (
+        CORE_DIRECTORY / "benchmarks" / "results" / f"load-{commit_id}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "commit": commit_id,
+        "created_at": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "workload": workload._asdict(),
+        "parameters": {
+            name: getattr(args, name)
+            for name in ("projects", "blocks", "inputs", "outputs", "edges",
+                         "workers", "task_seconds", "failure_rate",
+                         "airflow_latency_ms", "max_p99_ms",
+                         "max_error_rate")
+        },
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {output}")
+
+    if violations:
+        sys.exit(f"Over budget: {', '.join(violations)}")
+
+
+if __name__ == "__main__":
+    main()
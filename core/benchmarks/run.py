@@ -0,0 +1,186 @@
+"""
+Runs the controller benchmarks against a local PostgreSQL and in-process
+stand-ins for airflow, S3 and the git repositories, and stores the results
+as JSON. Run from the core directory:
+
+    python -m benchmarks.run --blocks 50
+    python -m benchmarks.compare benchmarks/results/<a>.json \
+        benchmarks/results/<b>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import UTC, datetime
+from pathlib import Path
+
+from benchmarks.standins import airflow, repos, s3
+from benchmarks.standins.server import BackgroundServer
+
+CORE_DIRECTORY = Path(__file__).resolve().parent.parent
+TEMPLATE_IDENTIFIER = "benchmark.yaml"
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the core controllers against stand-ins."
+    )
+    parser.add_argument("--blocks", type=int, default=20)
+    parser.add_argument("--inputs", type=int, default=2,
+                        help="file inputs of every block")
+    parser.add_argument("--outputs", type=int, default=2,
+                        help="file outputs of every block")
+    parser.add_argument("--edges", type=int, default=2,
+                        help="incoming edges of every block but the first")
+    parser.add_argument("--runs", type=int, default=50,
+                        help="runs in the history of every project")
+    parser.add_argument("--projects", type=int, default=5,
+                        help="projects seeded next to the measured one")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--only", nargs="*",
+                        help="names of the benchmarks to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database", default="core_benchmark",
+                        help="dropped and recreated on every run")
+    parser.add_argument("--output", type=Path,
+                        help="defaults to benchmarks/results/<commit>.json")
+    return parser.parse_args()
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=CORE_DIRECTORY,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def configure_environment(
+    database: str, workdir: Path, airflow_url: str, s3_port: int
+) -> None:
+    """Points core at the stand-ins, before its settings are loaded."""
+    if "bench" not in database:
+        sys.exit("The benchmark database is dropped, its name must contain "
+                 "'bench'.")
+
+    os.environ.update({
+        "DATABASE_NAME": database,
+        "DATABASE_ASYNC": "false",
+        "DEVELOPMENT": "false",
+        "AIRFLOW_CALLBACK_SECRET": "benchmark",
+        "LOG_LEVEL": "WARNING",
+        "AIRFLOW_HOST": airflow_url,
+        "AIRFLOW_DAG_DIR": str(workdir / "dags"),
+        "REPO_CACHE_DIR": str(workdir / "repos"),
+        "WORKFLOW_TEMPLATE_REPO": repos.TEMPLATE_REPO_URL,
+        "DEFAULT_CB_CONFIG_S3_HOST": "http://127.0.0.1",
+        "DEFAULT_CB_CONFIG_S3_PORT": str(s3_port),
+        "IMAGE_PREWARM": "false",
+        "RUN_SYNC_INTERVAL_SECONDS": "0",
+    })
+
+
+def recreate_database() -> None:
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import create_engine, text
+
+    from utils.config.environment import ENV
+
+    server = create_engine(
+        f"postgresql://{ENV.DATABASE_USER}:{ENV.DATABASE_PASSWORD}"
+        f"@{ENV.DATABASE_HOST}:{ENV.DATABASE_PORT}/postgres",
+        isolation_level="AUTOCOMMIT",
+    )
+    with server.connect() as conn:
+        conn.execute(text(
+            f'DROP DATABASE IF EXISTS "{ENV.DATABASE_NAME}" WITH (FORCE)'
+        ))
+        conn.execute(text(f'CREATE DATABASE "{ENV.DATABASE_NAME}"'))
+    server.dispose()
+
+    command.upgrade(Config(str(CORE_DIRECTORY / "alembic.ini")), "head")
+
+
+def main() -> None:
+    args = _parse_args()
+    os.chdir(CORE_DIRECTORY)
+
+    fake_airflow = airflow.FakeAirflow()
+    fake_s3 = s3.FakeS3()
+    airflow_server = BackgroundServer(airflow.create_app(fake_airflow))
+    s3_server = BackgroundServer(s3.create_app(fake_s3))
+    airflow_server.start()
+    s3_server.start()
+
+    with tempfile.TemporaryDirectory(prefix="scystream-bench-") as tmp:
+        workdir = Path(tmp)
+        configure_environment(args.database, workdir, airflow_server.url,
+                              s3_server.port)
+        repos.write_block_repo(workdir / "repos", args.inputs, args.outputs)
+        repos.write_template_repo(
+            workdir / "repos",
+            TEMPLATE_IDENTIFIER,
+            args.blocks,
+            args.inputs,
+            args.outputs,
+            args.edges,
+            args.seed,
+        )
+
+        recreate_database()
+
+        # core modules read their settings on import
+        from benchmarks import seed, suite
+
+        project_ids = [
+            seed.seed_project(f"benchmark {p}", TEMPLATE_IDENTIFIER)
+            for p in range(args.projects + 1)
+        ]
+        for p, project_id in enumerate(project_ids):
+            seed.seed_output_files(project_id, fake_s3)
+            seed.seed_run_history(project_id, args.runs, fake_airflow,
+                                  args.seed + p)
+
+        results = suite.run_suite(
+            project_ids[0],
+            TEMPLATE_IDENTIFIER,
+            args.repeat,
+            args.warmup,
+            args.only,
+        )
+
+    airflow_server.stop()
+    s3_server.stop()
+
+    commit_id = commit()
+    output = args.output or (
+        CORE_DIRECTORY / "benchmarks" / "results" / f"{commit_id}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "commit": commit_id,
+        "created_at": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "parameters": {
+            name: getattr(args, name)
+            for name in ("blocks", "inputs", "outputs", "edges", "runs",
+                         "projects", "repeat", "warmup", "seed")
+        },
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Load scenarios of the editor and the dashboard, run by simulated users
+against a running core:
+
+- viewers keep the dashboard websocket open
+- editors keep the status websocket of their project open, load its
+  canvas, drag blocks, edit its configurations and trigger runs every
+  trigger_seconds
+"""
+
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+from typing import NamedTuple
+from uuid import UUID
+
+import httpx
+from websockets.asyncio.client import connect
+from websockets.exceptions import WebSocketException
+
+from benchmarks.standins import keycloak
+
+# operations of an editor between two pauses, and how often they are picked
+EDITOR_ACTIONS = {"load_canvas": 3, "drag_block": 4, "edit_configs": 3}
+
+
+class Workload(NamedTuple):
+    editors: int
+    viewers: int
+    duration: float
+    ramp_up: float
+    # pause of an editor between two actions, on average
+    think_seconds: float
+    # 0 never triggers runs
+    trigger_seconds: float
+    seed: int = 0
+
+
+def _percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, round(p * (len(values) - 1)))]
+
+
+class Recorder:
+    def __init__(self):
+        self.durations: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+        # websocket messages received, per operation
+        self.messages: Counter[str] = Counter()
+        # requests before are not measured, they are part of the ramp up
+        self.measuring = False
+
+    def record(
+        self, operation: str, seconds: float, ok: bool, always: bool = False
+    ) -> None:
+        if not (self.measuring or always):
+            return
+        self.durations[operation].append(seconds * 1000)
+        if not ok:
+            self.errors[operation] += 1
+
+    async def request(
+        self,
+        client: httpx.AsyncClient,
+        operation: str,
+        method: str,
+        url: str,
+        **kwargs,
+    ) -> httpx.Response | None:
+        """Sends the request, None if it failed."""
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.record(operation, time.perf_counter() - start, False)
+            return None
+        ok = response.status_code < 400
+        self.record(operation, time.perf_counter() - start, ok)
+        return response if ok else None
+
+    def summary(self, seconds: float) -> dict[str, dict]:
+        results = {}
+        for operation, durations in sorted(self.durations.items()):
+            results[operation] = {
+                "requests": len(durations),
+                "throughput_rps": round(len(durations) / seconds, 2),
+                "p50_ms": round(_percentile(durations, 0.5), 3),
+                "p99_ms": round(_percentile(durations, 0.99), 3),
+                "error_rate": round(
+                    self.errors[operation] / len(durations), 4
+                ),
+            }
+            if operation in self.messages:
+                results[operation]["messages"] = self.messages[operation]
+        return results
+
+
+async def _pause(stop: asyncio.Event, seconds: float) -> None:
+    try:
+        await asyncio.wait_for(stop.wait(), seconds)
+    except TimeoutError:
+        pass
+
+
+async def status_socket(
+    url: str,
+    operation: str,
+    recorder: Recorder,
+    stop: asyncio.Event,
+) -> None:
+    """
+    Holds the websocket open until stop. The time to the first message is
+    measured, a connection closed before stop is an error.
+    """
+    start = time.perf_counter()
+    stopped = asyncio.create_task(stop.wait())
+    try:
+        async with connect(url, open_timeout=30) as websocket:
+            await websocket.recv()
+            # sockets are opened during the ramp up, they are always measured
+            recorder.record(operation, time.perf_counter() - start, True,
+                            always=True)
+            recorder.messages[operation] += 1
+
+            while not stop.is_set():
+                received = asyncio.create_task(websocket.recv())
+                await asyncio.wait(
+                    (received, stopped),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not received.done():
+                    received.cancel()
+                    break
+                received.result()
+                recorder.messages[operation] += 1
+    except (OSError, TimeoutError, WebSocketException):
+        recorder.record(operation, time.perf_counter() - start, False,
+                        always=True)
+    finally:
+        stopped.cancel()
+
+
+def _socket_url(base_url: str, path: str, token: str) -> str:
+    return f"{base_url.replace('http', 'ws', 1)}{path}?token={token}"
+
+
+async def viewer(
+    base_url: str,
+    token: str,
+    recorder: Recorder,
+    stop: asyncio.Event,
+) -> None:
+    await status_socket(
+        _socket_url(base_url, "/workflow/ws/project_status", token),
+        "ws.project_status",
+        recorder,
+        stop,
+    )
+
+
+class Editor:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        token: str,
+        project_id: UUID,
+        workload: Workload,
+        recorder: Recorder,
+        rng: random.Random,
+    ):
+        self.client = client
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.token = token
+        self.project_id = project_id
+        self.workload = workload
+        self.recorder = recorder
+        self.rng = rng
+        self.blocks: list[dict] = []
+        # the canvas is cached like the browser does, by its ETag
+        self.etag: str | None = None
+
+    async def load_canvas(self) -> None:
+        headers = dict(self.headers)
+        if self.etag and self.blocks:
+            headers["If-None-Match"] = self.etag
+        response = await self.recorder.request(
+            self.client,
+            "GET /compute_block/by_project",
+            "GET",
+            f"/compute_block/by_project/{self.project_id}",
+            headers=headers,
+        )
+        if response is not None and response.status_code == 200:
+            self.blocks = response.json()["blocks"]
+            self.etag = response.headers.get("ETag")
+
+    async def drag_block(self) -> None:
+        if not self.blocks:
+            return await self.load_canvas()
+        block = self.rng.choice(self.blocks)
+        position = block["position"]
+        position["x"] += self.rng.uniform(-50, 50)
+        position["y"] += self.rng.uniform(-50, 50)
+        await self.recorder.request(
+            self.client,
+            "PUT /compute_block/",
+            "PUT",
+            "/compute_block/",
+            headers=self.headers,
+            json={
+                "id": block["id"],
+                "x_pos": position["x"],
+                "y_pos": position["y"],
+            },
+        )
+
+    async def edit_configs(self) -> None:
+        response = await self.recorder.request(
+            self.client,
+            "GET /workflow/configurations",
+            "GET",
+            f"/workflow/configurations/{self.project_id}",
+            headers=self.headers,
+        )
+        if response is None or not response.json()["envs"]:
+            return
+        block = self.rng.choice(response.json()["envs"])
+        envs = dict(block["envs"])
+        if envs:
+            envs[self.rng.choice(list(envs))] = str(self.rng.randrange(1000))
+        await self.recorder.request(
+            self.client,
+            "PUT /workflow/configurations",
+            "PUT",
+            f"/workflow/configurations/{self.project_id}",
+            headers=self.headers,
+            json={"envs": [{"block_uuid": block["block_uuid"],
+                            "envs": envs}]},
+        )
+
+    async def trigger(self) -> None:
+        await self.recorder.request(
+            self.client,
+            "POST /workflow/{project_id}",
+            "POST",
+            f"/workflow/{self.project_id}",
+            headers=self.headers,
+        )
+
+    async def run(self, stop: asyncio.Event) -> None:
+        socket = asyncio.create_task(status_socket(
+            _socket_url(
+                str(self.client.base_url),
+                f"/workflow/ws/workflow_status/{self.project_id}",
+                self.token,
+            ),
+            "ws.workflow_status",
+            self.recorder,
+            stop,
+        ))
+        await self.load_canvas()
+
+        next_trigger = None
+        if self.workload.trigger_seconds:
+            next_trigger = time.monotonic() + self.rng.uniform(
+                0, self.workload.trigger_seconds
+            )
+        actions, weights = zip(*EDITOR_ACTIONS.items())
+        while not stop.is_set():
+            await _pause(stop, self.rng.expovariate(
+                1 / self.workload.think_seconds
+            ))
+            if stop.is_set():
+                break
+            if next_trigger is not None and time.monotonic() >= next_trigger:
+                await self.trigger()
+                next_trigger += self.workload.trigger_seconds
+                continue
+            action = self.rng.choices(actions, weights)[0]
+            await getattr(self, action)()
+        await socket
+
+
+async def run_load(
+    base_url: str,
+    project_ids: list[UUID],
+    workload: Workload,
+) -> dict[str, dict]:
+    """
+    Runs the workload against core at base_url, editor i edits the project
+    project_ids[i % len(project_ids)]. Users start evenly spread over the
+    ramp up, which is not part of the measurements.
+    """
+    recorder = Recorder()
+    stop = asyncio.Event()
+    rng = random.Random(workload.seed)
+    users = workload.editors + workload.viewers
+    limits = httpx.Limits(max_connections=max(1, workload.editors))
+
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=30
+    ) as client:
+        tasks = []
+        for u in range(users):
+            await asyncio.sleep(workload.ramp_up / users)
+            token = keycloak.token_for(f"user{u}")
+            if u < workload.editors:
+                editor = Editor(
+                    client,
+                    token,
+                    project_ids[u % len(project_ids)],
+                    workload,
+                    recorder,
+                    random.Random(rng.random()),
+                )
+                tasks.append(asyncio.create_task(editor.run(stop)))
+            else:
+                tasks.append(asyncio.create_task(
+                    viewer(base_url, token, recorder, stop)
+                ))
+
+        # the measurements start once all users are active
+        recorder.measuring = True
+        start = time.monotonic()
+        await asyncio.sleep(workload.duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+        return recorder.summary(time.monotonic() - start)
@@ -0,0 +1,136 @@
+"""
+Seeds synthetic projects through the same controllers the API uses, plus a
+run history in the database and in the airflow stand-in.
+"""
+
+import random
+from datetime import UTC, datetime, timedelta
+from uuid import UUID, uuid4
+
+from sqlalchemy import insert, select
+
+from benchmarks.standins.airflow import FakeAirflow
+from benchmarks.standins.s3 import FakeS3
+from services.workflow_service.controllers import project_controller
+from services.workflow_service.controllers.workflow_controller import (
+    _project_id_to_dag_id,
+)
+from services.workflow_service.models.block import Block
+from services.workflow_service.models.input_output import (
+    InputOutput,
+    InputOutputType,
+)
+from services.workflow_service.models.run import BlockRun, WorkflowRun
+from utils.config.defaults import extract_default_keys_from_io
+from utils.database.session_injector import get_database
+
+BENCHMARK_USER = UUID("00000000-0000-4000-8000-0000000000b1")
+
+
+def _task_id(block_id: UUID) -> str:
+    return f"task_{str(block_id).replace('-', '_')}"
+
+
+def seed_project(name: str, template_identifier: str) -> UUID:
+    return project_controller.create_project_from_template(
+        name, template_identifier, BENCHMARK_USER
+    )
+
+
+def seed_output_files(project_id: UUID, s3: FakeS3) -> int:
+    """Puts a file for every output of the project, returns their count."""
+    db = next(get_database())
+    outputs = db.execute(
+        select(InputOutput)
+        .join(Block, Block.selected_entrypoint_uuid
+              == InputOutput.entrypoint_uuid)
+        .where(
+            Block.project_uuid == project_id,
+            InputOutput.type == InputOutputType.OUTPUT,
+        )
+    ).scalars().all()
+
+    for io in outputs:
+        cfg = extract_default_keys_from_io(io)
+        s3.put(
+            cfg["BUCKET_NAME"],
+            f"{cfg['FILE_PATH'].strip('/')}/{cfg['FILE_NAME']}."
+            f"{cfg['FILE_EXT']}",
+            b"id,value\n1,2\n",
+        )
+    db.close()
+    return len(outputs)
+
+
+def seed_run_history(
+    project_id: UUID,
+    runs: int,
+    airflow: FakeAirflow,
+    seed: int = 0,
+) -> None:
+    """
+    Adds finished runs of all blocks to the database and the airflow
+    stand-in, the latest run is still running.
+    """
+    rng = random.Random(seed)
+    db = next(get_database())
+    block_ids = db.execute(
+        select(Block.uuid).where(Block.project_uuid == project_id)
+    ).scalars().all()
+
+    dag_id = _project_id_to_dag_id(project_id)
+    airflow.add_dag(dag_id, [_task_id(b) for b in block_ids])
+
+    now = datetime.now(UTC)
+    workflow_runs, block_runs = [], []
+    for r in range(runs):
+        started = now - timedelta(hours=runs - r)
+        running = r == runs - 1
+        state = "running" if running else rng.choice(
+            ("success", "success", "success", "failed")
+        )
+        dag_run_id = f"manual__{started.isoformat()}__{uuid4().hex[:8]}"
+        ended = None if running else started + timedelta(minutes=10)
+        workflow_runs.append({
+            "project_uuid": project_id,
+            "dag_run_id": dag_run_id,
+            "state": state,
+            "started_at": started,
+            "ended_at": ended,
+            "triggered_by": BENCHMARK_USER,
+            "updated_at": ended or started,
+        })
+
+        task_states = {}
+        for block_id in block_ids:
+            block_state = state
+            if running:
+                block_state = rng.choice(("success", "running", "scheduled"))
+            task_states[_task_id(block_id)] = block_state
+            block_runs.append({
+                "project_uuid": project_id,
+                "dag_run_id": dag_run_id,
+                "block_uuid": block_id,
+                "state": block_state,
+                "queued_at": started,
+                "started_at": started,
+                "ended_at": ended,
+                "updated_at": ended or started,
+                "cache_key": uuid4().hex,
+                "cached": False,
+            })
+
+        airflow.add_run(
+            dag_id,
+            state=state,
+            task_states=task_states,
+            run_after=started,
+            dag_run_id=dag_run_id,
+        )
+
+    # the transaction was begun by the select of the blocks
+    db.execute(insert(WorkflowRun), workflow_runs)
+    if block_runs:
+        db.execute(insert(BlockRun), block_runs)
+    db.commit()
+    db.close()
@@ -0,0 +1,708 @@
+"""
+Stand-in for the parts of the airflow REST API core calls: the token
+endpoint, DAGs, DAG runs and the batch endpoints of DAG runs and task
+instances.
+
+DAGs are either added by the caller, e.g. the benchmarks, or discovered in
+a DAG directory, from the python DAG files and the specs core generates.
+Once started, triggered runs are simulated: their tasks run in dependency
+order for a configurable duration, fail at a configurable rate and report
+their state to core's run events endpoint like the generated DAGs do. With
+injected latency and errors it stands in for airflow when load testing
+core, or when developing without airflow:
+
+    python -m benchmarks.standins.airflow --dag-dir ../airflow-dags \
+        --task-seconds 5 --failure-rate 0.1 --latency-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+
+from fastapi import Body, FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+
+ANY = "~"
+FINISHED = ("success", "failed", "upstream_failed", "skipped")
+
+_DAG_ID = re.compile(r"^with DAG\(\s*'([^']+)'", re.MULTILINE)
+_TASK = re.compile(r"^\s*(\w+) = (DockerOperator|EmptyOperator)\(",
+                   re.MULTILINE)
+_EDGE = re.compile(r"^\s*(\w+) >> (\w+)\s*$", re.MULTILINE)
+_CONSTANT = re.compile(r"^(RUN_EVENTS_URL|RUN_EVENTS_TOKEN) = '([^']*)'",
+                       re.MULTILINE)
+_MAX_ACTIVE_TASKS = re.compile(r"^\s*max_active_tasks=(\d+),", re.MULTILINE)
+
+
+def _now() -> datetime:
+    return datetime.now(UTC)
+
+
+def _iso(value: datetime | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+def parse_dag_file(path: str) -> dict | None:
+    """
+    Reads the DAG of a python DAG file generated by core, None for any
+    other file, e.g. the DAG factory.
+    """
+    with open(path) as f:
+        code = f.read()
+
+    dag_id = _DAG_ID.search(code)
+    if dag_id is None:
+        return None
+    constants = dict(_CONSTANT.findall(code))
+    max_active_tasks = _MAX_ACTIVE_TASKS.search(code)
+    tasks = _TASK.findall(code)
+    return {
+        "dag_id": dag_id.group(1),
+        "run_events_url": constants.get("RUN_EVENTS_URL"),
+        "run_events_token": constants.get("RUN_EVENTS_TOKEN"),
+        "max_active_tasks": (
+            int(max_active_tasks.group(1)) if max_active_tasks else None
+        ),
+        "tasks": [
+            {"task_id": task_id, "cached": operator == "EmptyOperator"}
+            for task_id, operator in tasks
+        ],
+        "edges": _EDGE.findall(code),
+    }
+
+
+def parse_dag_spec(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+class FakeAirflow:
+    def __init__(
+        self,
+        dag_dir: str | None = None,
+        task_seconds: float = 1.0,
+        task_jitter: float = 0.5,
+        failure_rate: float = 0.0,
+        parse_delay: float = 0.0,
+        seed: int | None = None,
+    ):
+        """
+        dag_dir is scanned for DAGs once started, a DAG file is registered
+        parse_delay seconds after it was written, like airflow's DAG
+        processor does. Simulated tasks run for task_seconds, give or take
+        task_jitter of it, and fail with the probability failure_rate.
+        """
+        self._lock = threading.Lock()
+        # dag id -> {"is_paused": bool, "tasks": [task ids], ...}
+        self.dags: dict[str, dict] = {}
+        # (dag id, dag run id) -> run
+        self.runs: dict[tuple[str, str], dict] = {}
+        # (dag id, dag run id) -> task id -> task instance
+        self.task_instances: dict[tuple[str, str], dict[str, dict]] = {}
+
+        self.dag_dir = dag_dir
+        self.task_seconds = task_seconds
+        self.task_jitter = task_jitter
+        self.failure_rate = failure_rate
+        self.parse_delay = parse_delay
+        self._random = random.Random(seed)
+        # path of a DAG file -> (mtime, dag id) of its last registration
+        self._files: dict[str, tuple[float, str]] = {}
+        self._simulated: set[tuple[str, str]] = set()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._reporter: ThreadPoolExecutor | None = None
+
+    def add_dag(
+        self,
+        dag_id: str,
+        tasks: list[str] = (),
+        edges: list[tuple[str, str]] = (),
+        cached: set[str] = frozenset(),
+        max_active_tasks: int | None = None,
+        run_events: tuple[str, str] | None = None,
+        fileloc: str | None = None,
+    ) -> None:
+        """run_events is the url and token runs report their events to."""
+        with self._lock:
+            self._add_dag(dag_id, tasks, edges, cached, max_active_tasks,
+                          run_events, fileloc)
+
+    def _add_dag(self, dag_id, tasks, edges, cached, max_active_tasks,
+                 run_events, fileloc, is_paused=True) -> None:
+        upstream = {task_id: [] for task_id in tasks}
+        for from_task, to_task in edges:
+            upstream.setdefault(to_task, []).append(from_task)
+        self.dags[dag_id] = {
+            "is_paused": is_paused,
+            "tasks": list(tasks),
+            "upstream": upstream,
+            "cached": set(cached),
+            "max_active_tasks": max_active_tasks,
+            "run_events": run_events,
+            "fileloc": fileloc or f"{dag_id}.py",
+        }
+
+    def add_run(
+        self,
+        dag_id: str,
+        state: str = "queued",
+        task_states: dict[str, str] | None = None,
+        run_after: datetime | None = None,
+        conf: dict | None = None,
+        dag_run_id: str | None = None,
+    ) -> str:
+        """Adds a run of the DAG, returns its id."""
+        run_after = run_after or _now()
+        dag_run_id = dag_run_id or f"manual__{run_after.isoformat()}"
+        finished = state in ("success", "failed")
+        with self._lock:
+            self.runs[(dag_id, dag_run_id)] = {
+                "dag_id": dag_id,
+                "dag_run_id": dag_run_id,
+                "state": state,
+                "run_after": run_after,
+                "queued_at": run_after,
+                "start_date": None if state == "queued" else run_after,
+                "end_date": _now() if finished else None,
+                "conf": conf or {},
+            }
+            tasks = task_states
+            if tasks is None:
+                tasks = {
+                    t: "scheduled" for t in self.dags.get(
+                        dag_id, {"tasks": []}
+                    )["tasks"]
+                }
+            self.task_instances[(dag_id, dag_run_id)] = {
+                task_id: {
+                    "task_id": task_id,
+                    "state": task_state,
+                    "queued_when": run_after,
+                    "start_date": None,
+                    "end_date": None,
+                }
+                for task_id, task_state in tasks.items()
+            }
+        return dag_run_id
+
+    def trigger(
+        self, dag_id: str, conf: dict | None = None,
+        dag_run_id: str | None = None,
+    ) -> str:
+        """Adds a queued run, which is simulated once the fake is started."""
+        dag_run_id = self.add_run(
+            dag_id, conf=conf,
+            dag_run_id=dag_run_id
+            or f"manual__{_now().isoformat()}__{uuid.uuid4().hex[:8]}"
+        )
+        with self._lock:
+            # like in airflow, a run keeps the DAG version it was created of
+            dag = self.dags[dag_id]
+            run = self.runs[(dag_id, dag_run_id)]
+            run["upstream"] = dag["upstream"]
+            run["cached"] = dag["cached"]
+            self._simulated.add((dag_id, dag_run_id))
+        return dag_run_id
+
+    def cancel(self, dag_id: str, dag_run_id: str, state: str) -> dict:
+        """Sets the state of a run, unfinished tasks are skipped."""
+        events = []
+        with self._lock:
+            run = self.runs[(dag_id, dag_run_id)]
+            run["state"] = state
+            run["end_date"] = _now()
+            for ti in self.task_instances[(dag_id, dag_run_id)].values():
+                if ti["state"] not in FINISHED:
+                    ti["state"] = "skipped"
+                    ti["end_date"] = run["end_date"]
+            self._simulated.discard((dag_id, dag_run_id))
+            events.append(self._event(run, None, state))
+        self._report(events)
+        return run
+
+    # DAG directory
+
+    def scan(self) -> None:
+        """Registers new and changed DAG files, removes deleted ones."""
+        if self.dag_dir is None:
+            return
+
+        spec_dir = os.path.join(self.dag_dir, "specs")
+        paths = [
+            os.path.join(directory, name)
+            for directory, suffix in ((self.dag_dir, ".py"),
+                                      (spec_dir, ".json"))
+            if os.path.isdir(directory)
+            for name in os.listdir(directory)
+            if name.endswith(suffix)
+        ]
+        now = time.time()
+
+        for path in paths:
+            try:
+                mtime = os.stat(path).st_mtime
+            except FileNotFoundError:
+                continue
+            known = self._files.get(path)
+            if known is not None and known[0] == mtime:
+                continue
+            if now - mtime < self.parse_delay:
+                continue
+            try:
+                dag = (parse_dag_spec(path) if path.endswith(".json")
+                       else parse_dag_file(path))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not parse the DAG file {path}: {e}")
+                continue
+            if dag is None:
+                self._files[path] = (mtime, None)
+                continue
+
+            tasks = dag["tasks"]
+            with self._lock:
+                previous = self.dags.get(dag["dag_id"])
+                self._add_dag(
+                    dag["dag_id"],
+                    [t["task_id"] for t in tasks],
+                    dag["edges"],
+                    {t["task_id"] for t in tasks if t["cached"]},
+                    dag.get("max_active_tasks"),
+                    (dag["run_events_url"], dag["run_events_token"])
+                    if dag.get("run_events_url") else None,
+                    path,
+                    # a re-parsed DAG keeps its state, like in airflow
+                    is_paused=previous["is_paused"] if previous else True,
+                )
+            self._files[path] = (mtime, dag["dag_id"])
+
+        removed = self._files.keys() - set(paths)
+        with self._lock:
+            for path in removed:
+                dag_id = self._files.pop(path)[1]
+                dag = self.dags.get(dag_id)
+                if dag is not None and dag["fileloc"] == path:
+                    del self.dags[dag_id]
+
+    # Simulation
+
+    def start(self, interval: float = 0.1) -> None:
+        """Scans the DAG directory and advances the triggered runs."""
+        self._reporter = ThreadPoolExecutor(
+            max_workers=8, thread_name_prefix="fake-airflow-events"
+        )
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(interval,), daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._reporter is not None:
+            self._reporter.shutdown(wait=True)
+
+    def _loop(self, interval: float) -> None:
+        last_scan = 0.0
+        while not self._stopped.wait(interval):
+            try:
+                # listing a large DAG directory is not done every tick
+                if time.monotonic() - last_scan >= max(interval, 1.0):
+                    self.scan()
+                    last_scan = time.monotonic()
+                self.advance()
+            except Exception:
+                logging.exception("Simulating the airflow runs failed")
+
+    def _duration(self) -> float:
+        jitter = self.task_seconds * self.task_jitter
+        return max(0.0, self._random.uniform(
+            self.task_seconds - jitter, self.task_seconds + jitter
+        ))
+
+    def advance(self) -> None:
+        """Moves the simulated runs forward to now."""
+        events = []
+        now = _now()
+        with self._lock:
+            running = {
+                dag_id for dag_id, dag_run_id in self._simulated
+                if self.runs[(dag_id, dag_run_id)]["state"] == "running"
+            }
+            # oldest first, a DAG runs one run at a time
+            for key in sorted(self._simulated,
+                              key=lambda k: self.runs[k]["queued_at"]):
+                dag = self.dags.get(key[0])
+                run = self.runs[key]
+                if dag is None:
+                    self._simulated.discard(key)
+                    continue
+                if run["state"] == "queued":
+                    if dag["is_paused"] or key[0] in running:
+                        continue
+                    run["state"] = "running"
+                    run["start_date"] = now
+                    running.add(key[0])
+                events.extend(self._advance_run(dag, run, now))
+                if run["state"] in FINISHED:
+                    self._simulated.discard(key)
+                    running.discard(key[0])
+        self._report(events)
+
+    def _advance_run(self, dag: dict, run: dict, now: datetime) -> list:
+        tis = self.task_instances[(run["dag_id"], run["dag_run_id"])]
+        events = []
+        for ti in tis.values():
+            if ti["state"] == "running" and now >= ti["ends_at"]:
+                ti["state"] = ti.pop("outcome")
+                ti["end_date"] = ti.pop("ends_at")
+                events.append(self._event(run, ti["task_id"], ti["state"]))
+
+        active = sum(ti["state"] == "running" for ti in tis.values())
+        limit = dag["max_active_tasks"] or 16
+        for task_id, ti in tis.items():
+            if ti["state"] != "scheduled":
+                continue
+            upstream = [tis[u]["state"] for u in run["upstream"][task_id]]
+            if any(s in ("failed", "upstream_failed") for s in upstream):
+                ti["state"] = "upstream_failed"
+                ti["end_date"] = now
+                continue
+            if not all(s == "success" for s in upstream) or active >= limit:
+                continue
+
+            cached = task_id in run["cached"]
+            ti["state"] = "running"
+            ti["start_date"] = now
+            ti["ends_at"] = now + timedelta(
+                seconds=0 if cached else self._duration()
+            )
+            ti["outcome"] = (
+                "failed"
+                if not cached and self._random.random() < self.failure_rate
+                else "success"
+            )
+            active += 1
+            events.append(self._event(run, task_id, "running"))
+
+        if all(ti["state"] in FINISHED for ti in tis.values()):
+            failed = any(ti["state"] != "success" for ti in tis.values())
+            run["state"] = "failed" if failed else "success"
+            run["end_date"] = now
+            events.append(self._event(run, None, run["state"]))
+        return events
+
+    def _event(self, run: dict, task_id: str | None, state: str):
+        run_events = self.dags.get(run["dag_id"], {}).get("run_events")
+        if run_events is None:
+            return None
+        return run_events, {
+            "dag_run_id": run["dag_run_id"],
+            "task_id": task_id,
+            "state": state,
+            "timestamp": _now().isoformat(),
+        }
+
+    def _report(self, events: list) -> None:
+        if self._reporter is None:
+            return
+        for event in events:
+            if event is not None:
+                self._reporter.submit(_post_event, *event)
+
+    # Responses
+
+    def dag_response(self, dag_id: str) -> dict:
+        dag = self.dags[dag_id]
+        return {
+            "dag_id": dag_id,
+            "dag_display_name": dag_id,
+            "file_token": dag_id,
+            "fileloc": dag["fileloc"],
+            "has_import_errors": False,
+            "has_task_concurrency_limits": False,
+            "is_paused": dag["is_paused"],
+            "is_stale": False,
+            "max_active_tasks": dag["max_active_tasks"] or 16,
+            "max_active_runs": 1,
+            "max_consecutive_failed_dag_runs": 0,
+            "owners": ["airflow"],
+            "tags": [],
+            "timetable_partitioned": False,
+        }
+
+    @staticmethod
+    def run_response(run: dict) -> dict:
+        return {
+            "dag_id": run["dag_id"],
+            "dag_display_name": run["dag_id"],
+            "dag_run_id": run["dag_run_id"],
+            "dag_versions": [],
+            "run_after": _iso(run["run_after"]),
+            "queued_at": _iso(run["queued_at"]),
+            "start_date": _iso(run["start_date"]),
+            "end_date": _iso(run["end_date"]),
+            "run_type": "manual",
+            "state": run["state"],
+            "conf": run["conf"],
+        }
+
+    @staticmethod
+    def task_instance_response(run: dict, ti: dict) -> dict:
+        return {
+            "id": str(uuid.uuid5(
+                uuid.NAMESPACE_URL,
+                f"{run['dag_id']}/{run['dag_run_id']}/{ti['task_id']}",
+            )),
+            "dag_id": run["dag_id"],
+            "dag_display_name": run["dag_id"],
+            "dag_run_id": run["dag_run_id"],
+            "task_id": ti["task_id"],
+            "task_display_name": ti["task_id"],
+            "run_after": _iso(run["run_after"]),
+            "state": ti["state"],
+            "queued_when": _iso(ti["queued_when"]),
+            "start_date": _iso(ti["start_date"]),
+            "end_date": _iso(ti["end_date"]),
+            "executor_config": "{}",
+            "map_index": -1,
+            "max_tries": 0,
+            "try_number": 1,
+            "pool": "default_pool",
+            "pool_slots": 1,
+        }
+
+
+def _post_event(run_events: tuple[str, str], event: dict) -> None:
+    # like the generated DAGs, reporting is best effort
+    url, token = run_events
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(event).encode(),
+        headers={
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {token}",
+        },
+        method="POST",
+    )
+    try:
+        urllib.request.urlopen(request, timeout=2).close()
+    except Exception as e:
+        logging.warning(f"Could not report {event['state']} to core: {e}")
+
+
+def _page(items: list, body: dict) -> tuple[list, int]:
+    offset = body.get("page_offset") or 0
+    limit = body.get("page_limit") or 100
+    return items[offset:offset + limit], len(items)
+
+
+def create_app(
+    airflow: FakeAirflow,
+    latency_ms: float = 0,
+    latency_jitter_ms: float = 0,
+    error_rate: float = 0,
+) -> FastAPI:
+    """
+    Every API request is delayed by latency_ms, give or take
+    latency_jitter_ms, and fails with a 503 with the probability
+    error_rate.
+    """
+    app = FastAPI(title="fake-airflow")
+
+    if latency_ms or latency_jitter_ms or error_rate:
+        @app.middleware("http")
+        async def inject_latency_and_errors(request: Request, call_next):
+            delay = latency_ms + random.uniform(
+                -latency_jitter_ms, latency_jitter_ms
+            )
+            if delay > 0:
+                await asyncio.sleep(delay / 1000)
+            if random.random() < error_rate:
+                return JSONResponse(
+                    {"detail": "Injected error"}, status_code=503
+                )
+            return await call_next(request)
+
+    def get_dag_or_404(dag_id: str) -> dict:
+        if dag_id not in airflow.dags:
+            raise HTTPException(404, detail=f"DAG {dag_id} not found")
+        return airflow.dags[dag_id]
+
+    @app.post("/auth/token", status_code=201)
+    def token():
+        return {"access_token": "fake-airflow-token"}
+
+    @app.get("/api/v2/dags")
+    def list_dags(
+        limit: int = 100,
+        offset: int = 0,
+        dag_id_pattern: str | None = None,
+        paused: bool | None = None,
+    ):
+        with airflow._lock:
+            dag_ids = sorted(
+                dag_id for dag_id, dag in airflow.dags.items()
+                if (dag_id_pattern is None or dag_id_pattern in dag_id)
+                and (paused is None or dag["is_paused"] == paused)
+            )
+            return {
+                "dags": [
+                    airflow.dag_response(dag_id)
+                    for dag_id in dag_ids[offset:offset + limit]
+                ],
+                "total_entries": len(dag_ids),
+            }
+
+    @app.get("/api/v2/dags/{dag_id}")
+    def get_dag(dag_id: str):
+        get_dag_or_404(dag_id)
+        return airflow.dag_response(dag_id)
+
+    @app.patch("/api/v2/dags/{dag_id}")
+    def patch_dag(dag_id: str, body: dict = Body(...)):
+        dag = get_dag_or_404(dag_id)
+        if "is_paused" in body:
+            dag["is_paused"] = body["is_paused"]
+        return airflow.dag_response(dag_id)
+
+    @app.delete("/api/v2/dags/{dag_id}", status_code=204)
+    def delete_dag(dag_id: str):
+        get_dag_or_404(dag_id)
+        with airflow._lock:
+            airflow.dags.pop(dag_id)
+        return Response(status_code=204)
+
+    @app.post("/api/v2/dags/{dag_id}/dagRuns")
+    def trigger_dag_run(dag_id: str, body: dict = Body(...)):
+        get_dag_or_404(dag_id)
+        if (dag_id, body.get("dag_run_id")) in airflow.runs:
+            raise HTTPException(409, detail="The run exists already")
+        dag_run_id = airflow.trigger(
+            dag_id, conf=body.get("conf"), dag_run_id=body.get("dag_run_id")
+        )
+        return airflow.run_response(airflow.runs[(dag_id, dag_run_id)])
+
+    @app.patch("/api/v2/dags/{dag_id}/dagRuns/{dag_run_id}")
+    def patch_dag_run(dag_id: str, dag_run_id: str, body: dict = Body(...)):
+        if (dag_id, dag_run_id) not in airflow.runs:
+            raise HTTPException(404, detail=f"Run {dag_run_id} not found")
+        run = airflow.runs[(dag_id, dag_run_id)]
+        if "state" in body:
+            run = airflow.cancel(dag_id, dag_run_id, body["state"])
+        return airflow.run_response(run)
+
+    @app.post("/api/v2/dags/{dag_id}/dagRuns/list")
+    def list_dag_runs(dag_id: str, body: dict = Body(...)):
+        dag_ids = body.get("dag_ids") or (
+            None if dag_id == ANY else [dag_id]
+        )
+        run_after_gte = body.get("run_after_gte")
+        if run_after_gte is not None:
+            run_after_gte = datetime.fromisoformat(run_after_gte)
+
+        with airflow._lock:
+            runs = [
+                r for r in airflow.runs.values()
+                if (dag_ids is None or r["dag_id"] in dag_ids)
+                and (run_after_gte is None or r["run_after"] >= run_after_gte)
+            ]
+            runs.sort(key=lambda r: r["run_after"])
+            page, total = _page(runs, body)
+            return {
+                "dag_runs": [airflow.run_response(r) for r in page],
+                "total_entries": total,
+            }
+
+    @app.post("/api/v2/dags/{dag_id}/dagRuns/{dag_run_id}/taskInstances/list")
+    def list_task_instances(
+        dag_id: str, dag_run_id: str, body: dict = Body(...)
+    ):
+        dag_ids = body.get("dag_ids")
+        dag_run_ids = body.get("dag_run_ids")
+
+        with airflow._lock:
+            instances = [
+                (airflow.runs[key], ti)
+                for key, tis in airflow.task_instances.items()
+                if (dag_ids is None or key[0] in dag_ids)
+                and (dag_run_ids is None or key[1] in dag_run_ids)
+                for ti in tis.values()
+            ]
+            page, total = _page(instances, body)
+            return {
+                "task_instances": [
+                    airflow.task_instance_response(run, ti)
+                    for run, ti in page
+                ],
+                "total_entries": total,
+            }
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(
+        description="Serves a simulated airflow REST API."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--dag-dir", default=os.environ.get(
+        "AIRFLOW_DAG_DIR", "../airflow-dags"
+    ))
+    parser.add_argument("--parse-delay", type=float, default=2.0,
+                        help="seconds until a written DAG file is registered")
+    parser.add_argument("--task-seconds", type=float, default=5.0)
+    parser.add_argument("--task-jitter", type=float, default=0.5,
+                        help="share of --task-seconds a task may deviate")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="probability of a task to fail")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="probability of a request to fail with a 503")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    airflow = FakeAirflow(
+        dag_dir=args.dag_dir,
+        task_seconds=args.task_seconds,
+        task_jitter=args.task_jitter,
+        failure_rate=args.failure_rate,
+        parse_delay=args.parse_delay,
+        seed=args.seed,
+    )
+    airflow.start()
+    try:
+        uvicorn.run(
+            create_app(
+                airflow,
+                latency_ms=args.latency_ms,
+                latency_jitter_ms=args.latency_jitter_ms,
+                error_rate=args.error_rate,
+            ),
+            host=args.host,
+            port=args.port,
+            log_level="warning",
+        )
+    finally:
+        airflow.stop()
+
+
+if __name__ == "__main__":
+    main()
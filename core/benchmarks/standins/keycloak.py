@@ -0,0 +1,39 @@
+"""
+Stand-in for the keycloak userinfo endpoint core verifies tokens with.
+Every token with the prefix is accepted, the user is derived from it,
+so a token stands for the same user across requests.
+"""
+
+import uuid
+
+from fastapi import FastAPI, Header, HTTPException
+
+TOKEN_PREFIX = "load-"
+
+
+def token_for(name: str) -> str:
+    return f"{TOKEN_PREFIX}{name}"
+
+
+def user_for(token: str) -> dict:
+    name = token.removeprefix(TOKEN_PREFIX)
+    return {
+        "sub": str(uuid.uuid5(uuid.NAMESPACE_URL, token)),
+        "preferred_username": name,
+        "email": f"{name}@scystream.invalid",
+        "email_verified": True,
+        "name": name,
+    }
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(title="fake-keycloak")
+
+    @app.get("/realms/{realm}/protocol/openid-connect/userinfo")
+    def userinfo(realm: str, authorization: str = Header(...)):
+        token = authorization.removeprefix("Bearer ")
+        if not token.startswith(TOKEN_PREFIX):
+            raise HTTPException(401, detail="Invalid token")
+        return user_for(token)
+
+    return app
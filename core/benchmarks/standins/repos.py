@@ -0,0 +1,111 @@
+"""
+Stand-ins for the git repositories of compute blocks and workflow
+templates. Core clones repositories into REPO_CACHE_DIR only if they are
+not cached yet, so writing them into the cache keeps git and the network
+out of the measurements.
+"""
+
+import random
+from pathlib import Path
+
+import yaml
+
+BLOCK_REPO_URL = "https://scystream.invalid/benchmarks/bench-block.git"
+TEMPLATE_REPO_URL = "https://scystream.invalid/benchmarks/bench-templates.git"
+ENTRYPOINT = "process"
+
+_FILE_KEYS = (
+    "S3_HOST", "S3_PORT", "S3_ACCESS_KEY", "S3_SECRET_KEY", "BUCKET_NAME",
+    "FILE_PATH", "FILE_NAME", "FILE_EXT",
+)
+
+
+def _repo_path(cache_dir: Path, repo_url: str) -> Path:
+    return cache_dir / repo_url.rsplit("/", 1)[-1].removesuffix(".git")
+
+
+def _file_io(name: str, description: str) -> dict:
+    config = {f"{name}_{key}": None for key in _FILE_KEYS}
+    config[f"{name}_FILE_EXT"] = "csv"
+    return {"type": "file", "description": description, "config": config}
+
+
+def write_block_repo(cache_dir: Path, inputs: int, outputs: int) -> None:
+    """A compute block with one entrypoint of file inputs and outputs."""
+    path = _repo_path(cache_dir, BLOCK_REPO_URL)
+    path.mkdir(parents=True, exist_ok=True)
+    cbc = {
+        "name": "Benchmark Block",
+        "description": "Synthetic block of the benchmark suite",
+        "author": "scystream",
+        "docker_image": "ghcr.io/rwth-time/scystream/bench-block:latest",
+        "entrypoints": {
+            ENTRYPOINT: {
+                "description": "Processes its inputs",
+                "envs": {"BENCH_MODE": "fast", "BENCH_ROWS": 1000},
+                "inputs": {
+                    f"in_{i}": _file_io(f"in_{i}", f"Input {i}")
+                    for i in range(inputs)
+                },
+                "outputs": {
+                    f"out_{o}": _file_io(f"out_{o}", f"Output {o}")
+                    for o in range(outputs)
+                },
+            },
+        },
+    }
+    (path / "cbc.yaml").write_text(yaml.safe_dump(cbc, sort_keys=False))
+
+
+def write_template_repo(
+    cache_dir: Path,
+    identifier: str,
+    blocks: int,
+    inputs: int,
+    outputs: int,
+    edges: int,
+    seed: int = 0,
+) -> None:
+    """
+    A template of blocks instances of the benchmark block. Every block but
+    the first is connected to up to edges distinct earlier blocks, the first
+    of them chosen such that the workflow is connected.
+    """
+    rng = random.Random(seed)
+    template_blocks = []
+    for b in range(blocks):
+        upstreams = []
+        if b > 0:
+            upstreams = [rng.randrange(b)]
+            others = [u for u in range(b) if u != upstreams[0]]
+            upstreams += rng.sample(
+                others, min(len(others), max(0, min(edges, inputs) - 1))
+            )
+
+        template_blocks.append({
+            "name": f"block_{b}",
+            "repo_url": BLOCK_REPO_URL,
+            "entrypoint": ENTRYPOINT,
+            "inputs": [
+                {
+                    "identifier": f"in_{i}",
+                    "depends_on": {
+                        "block": f"block_{u}",
+                        "output": f"out_{rng.randrange(outputs)}",
+                    },
+                }
+                for i, u in enumerate(upstreams)
+            ],
+        })
+
+    path = _repo_path(cache_dir, TEMPLATE_REPO_URL)
+    path.mkdir(parents=True, exist_ok=True)
+    template = {
+        "pipeline": {
+            "name": "Benchmark",
+            "description": f"Synthetic workflow of {blocks} blocks",
+            "tags": ["benchmark"],
+        },
+        "blocks": template_blocks,
+    }
+    (path / identifier).write_text(yaml.safe_dump(template, sort_keys=False))
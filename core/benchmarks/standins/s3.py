@@ -0,0 +1,72 @@
+"""
+In-memory S3 stand-in, implementing the path style object operations core
+uses: HEAD, GET, PUT and DELETE of objects. Signatures are not checked and
+buckets exist as soon as an object is put into them.
+"""
+
+import hashlib
+import threading
+
+from fastapi import FastAPI, Request, Response
+
+_NO_SUCH_KEY = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    "<Error><Code>NoSuchKey</Code>"
+    "<Message>The specified key does not exist.</Message></Error>"
+)
+
+
+class FakeS3:
+    def __init__(self):
+        self._objects: dict[tuple[str, str], bytes] = {}
+        self._lock = threading.Lock()
+
+    def put(self, bucket: str, key: str, body: bytes) -> str:
+        with self._lock:
+            self._objects[(bucket, key)] = body
+        return self.etag(body)
+
+    def get(self, bucket: str, key: str) -> bytes | None:
+        with self._lock:
+            return self._objects.get((bucket, key))
+
+    def delete(self, bucket: str, key: str) -> None:
+        with self._lock:
+            self._objects.pop((bucket, key), None)
+
+    @staticmethod
+    def etag(body: bytes) -> str:
+        return f'"{hashlib.md5(body).hexdigest()}"'
+
+
+def create_app(s3: FakeS3) -> FastAPI:
+    app = FastAPI(title="fake-s3")
+
+    @app.api_route("/{bucket}/{key:path}", methods=["HEAD", "GET"])
+    def get_object(bucket: str, key: str, request: Request):
+        body = s3.get(bucket, key)
+        if body is None:
+            if request.method == "HEAD":
+                return Response(status_code=404)
+            return Response(
+                _NO_SUCH_KEY, status_code=404, media_type="application/xml"
+            )
+
+        headers = {"ETag": s3.etag(body), "Content-Length": str(len(body))}
+        if request.method == "HEAD":
+            return Response(headers=headers)
+        return Response(
+            body, headers=headers, media_type="application/octet-stream"
+        )
+
+    @app.put("/{bucket}/{key:path}")
+    async def put_object(bucket: str, key: str, request: Request):
+        etag = s3.put(bucket, key, await request.body())
+        return Response(headers={"ETag": etag})
+
+    @app.delete("/{bucket}/{key:path}")
+    def delete_object(bucket: str, key: str):
+        s3.delete(bucket, key)
+        return Response(status_code=204)
+
+    return app
@@ -0,0 +1,147 @@
+"""
+Profiles the startup of core: imports main in fresh interpreters with
+python -X importtime and reports the import time of main and of the
+packages it spends it in. Every uvicorn worker pays for it on start, so
+it is kept under a budget. Exits with 1 if the median import time exceeds
+--budget-ms, or if one of the packages core only imports on first use is
+imported at startup. Run from the core directory:
+
+    python -m benchmarks.startup --runs 5 --budget-ms 2000
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import NamedTuple
+
+from benchmarks.run import CORE_DIRECTORY
+
+# imported by the functions using them, see the modules importing them
+DEFERRED = (
+    "airflow_client",
+    "boto3",
+    "git",
+    "jinja2",
+    "keycloak",
+    "networkx",
+    "scystream",
+)
+
+
+class Import(NamedTuple):
+    name: str
+    # microseconds, of the module alone and including its imports
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> list[Import]:
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix(
+            "import time:"
+        ).split("|")
+        imports.append(Import(
+            name=name.strip(),
+            self_us=int(self_us),
+            cumulative_us=int(cumulative_us),
+            depth=(len(name) - len(name.lstrip()) - 1) // 2,
+        ))
+    return imports
+
+
+def measure(module: str) -> list[Import]:
+    """The imports of module in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=CORE_DIRECTORY,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"Importing {module} failed:\n{result.stderr}")
+    return parse_importtime(result.stderr)
+
+
+def _total_ms(imports: list[Import], module: str) -> float:
+    return next(
+        i.cumulative_us for i in imports if i.name == module and i.depth == 0
+    ) / 1000
+
+
+def _packages_ms(imports: list[Import]) -> dict[str, float]:
+    packages = defaultdict(float)
+    for i in imports:
+        packages[i.name.split(".")[0]] += i.self_us / 1000
+    return packages
+
+
+def _print_report(runs: list[list[Import]], module: str, top: int) -> float:
+    totals = [_total_ms(imports, module) for imports in runs]
+    total = statistics.median(totals)
+    print(f"import {module}: {total:.0f}ms median of {len(runs)} runs "
+          f"({min(totals):.0f}ms - {max(totals):.0f}ms)\n")
+
+    packages = defaultdict(list)
+    for imports in runs:
+        for package, ms in _packages_ms(imports).items():
+            packages[package].append(ms)
+    medians = {p: statistics.median(ms) for p, ms in packages.items()}
+    print(f"{'package':<32} {'self':>10} {'share':>7}")
+    for package, ms in sorted(
+        medians.items(), key=lambda item: item[1], reverse=True
+    )[:top]:
+        print(f"{package:<32} {ms:>8.1f}ms {ms / total:>7.1%}")
+
+    # the imports of main itself, with everything they pull in
+    direct = defaultdict(list)
+    for imports in runs:
+        for i in imports:
+            if i.depth == 1:
+                direct[i.name].append(i.cumulative_us / 1000)
+    print(f"\n{'imported by ' + module:<60} {'cumulative':>10}")
+    for name, ms in sorted(
+        direct.items(), key=lambda item: statistics.median(item[1]),
+        reverse=True,
+    )[:top]:
+        print(f"{name:<60} {statistics.median(ms):>8.1f}ms")
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Profiles and budgets the import time of core."
+    )
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15,
+                        help="packages and imports listed")
+    parser.add_argument("--budget-ms", type=float, default=2000,
+                        help="allowed median import time of the module")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    total = _print_report(runs, args.module, args.top)
+
+    imported = sorted({
+        i.name.split(".")[0] for i in runs[0]
+    }.intersection(DEFERRED))
+    failures = []
+    if total > args.budget_ms:
+        failures.append(
+            f"import {args.module} took {total:.0f}ms, "
+            f"the budget is {args.budget_ms:.0f}ms"
+        )
+    if imported:
+        failures.append(f"imported at startup: {', '.join(imported)}")
+    if failures:
+        sys.exit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
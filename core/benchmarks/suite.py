@@ -0,0 +1,209 @@
+import statistics
+import time
+from typing import Any, Callable, NamedTuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import event, select
+
+from benchmarks import seed
+from services.workflow_service.controllers import (
+    compute_block_controller,
+    project_controller,
+    run_controller,
+    workflow_controller,
+)
+from services.workflow_service.models.block import Block, block_dependencies
+from services.workflow_service.models.input_output import InputOutput
+from utils.database.connection import SessionLocal, engine
+
+
+class Benchmark(NamedTuple):
+    name: str
+    # called with the value returned by setup, which is not measured
+    run: Callable[[Any], Any]
+    setup: Callable[[], Any] | None = None
+    teardown: Callable[[Any], None] | None = None
+
+
+class _StatementCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *_):
+        self.count += 1
+
+
+def _percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, round(p * (len(values) - 1)))]
+
+
+def measure(
+    benchmark: Benchmark,
+    repeat: int,
+    warmup: int,
+    counter: _StatementCounter,
+) -> dict:
+    durations, statements = [], []
+    for i in range(warmup + repeat):
+        state = benchmark.setup() if benchmark.setup else None
+        try:
+            before = counter.count
+            start = time.perf_counter()
+            benchmark.run(state)
+            duration = time.perf_counter() - start
+            executed = counter.count - before
+        finally:
+            if benchmark.teardown:
+                benchmark.teardown(state)
+        if i >= warmup:
+            durations.append(duration * 1000)
+            statements.append(executed)
+
+    return {
+        "runs": repeat,
+        "mean_ms": round(statistics.fmean(durations), 3),
+        "p50_ms": round(_percentile(durations, 0.5), 3),
+        "p95_ms": round(_percentile(durations, 0.95), 3),
+        "min_ms": round(min(durations), 3),
+        "max_ms": round(max(durations), 3),
+        "statements": max(statements),
+    }
+
+
+def _session_benchmark(name: str, fn: Callable) -> Benchmark:
+    """Runs fn on a fresh session, like a request would."""
+    def setup():
+        return SessionLocal()
+
+    def teardown(db):
+        db.close()
+
+    return Benchmark(name, fn, setup, teardown)
+
+
+def _rolled_back_benchmark(name: str, fn: Callable) -> Benchmark:
+    """Runs fn in a transaction that is rolled back, keeping data stable."""
+    def setup():
+        db = SessionLocal()
+        db.begin()
+        return db
+
+    def teardown(db):
+        db.rollback()
+        db.close()
+
+    return Benchmark(name, fn, setup, teardown)
+
+
+def _connected_output(project_id: UUID) -> tuple[UUID, str]:
+    """An output with downstream inputs and its FILE_NAME config key."""
+    db = SessionLocal()
+    try:
+        output_id = db.execute(
+            select(block_dependencies.c.upstream_output_uuid)
+            .join(Block, Block.uuid
+                  == block_dependencies.c.upstream_block_uuid)
+            .where(Block.project_uuid == project_id)
+            .limit(1)
+        ).scalar_one()
+        config = db.get(InputOutput, output_id).config
+        key = next(k for k in config if k.endswith("FILE_NAME"))
+        return output_id, key
+    finally:
+        db.close()
+
+
+def benchmarks(project_id: UUID, template_identifier: str) -> list[Benchmark]:
+    output_id, file_name_key = _connected_output(project_id)
+
+    def create_from_template(_):
+        return project_controller.create_project_from_template(
+            f"benchmark {uuid4().hex[:8]}",
+            template_identifier,
+            seed.BENCHMARK_USER,
+        )
+
+    created = []
+
+    def delete_created(_):
+        while created:
+            project_controller.delete_project(created.pop())
+
+    return [
+        _session_benchmark(
+            "get_compute_blocks_by_project",
+            lambda db: compute_block_controller.get_compute_blocks_by_project(
+                project_id, db
+            ),
+        ),
+        _session_benchmark(
+            "get_block_nodes_by_project",
+            lambda db: compute_block_controller.get_block_nodes_by_project(
+                project_id, db
+            ),
+        ),
+        _session_benchmark(
+            "get_workflow_configurations",
+            lambda db: workflow_controller.get_workflow_configurations(
+                project_id, db
+            ),
+        ),
+        Benchmark(
+            "translate_project_to_dag",
+            lambda _: workflow_controller.translate_project_to_dag(
+                project_id
+            ),
+        ),
+        _rolled_back_benchmark(
+            "update_ios",
+            lambda db: compute_block_controller.update_ios(
+                {output_id: {file_name_key: f"bench_{uuid4().hex}"}}, db
+            ),
+        ),
+        _session_benchmark(
+            "status.get_latest_run_states",
+            run_controller.get_latest_run_states,
+        ),
+        _session_benchmark(
+            "status.get_run_snapshot",
+            lambda db: run_controller.get_run_snapshot(project_id, db),
+        ),
+        _session_benchmark(
+            "status.list_runs",
+            lambda db: run_controller.list_runs(project_id, 20, None, db),
+        ),
+        _rolled_back_benchmark(
+            "status.sync_runs",
+            run_controller.sync_runs,
+        ),
+        # last, the projects it creates are removed only after each run
+        Benchmark(
+            "create_project_from_template",
+            lambda state: created.append(create_from_template(state)),
+            teardown=delete_created,
+        ),
+    ]
+
+
+def run_suite(
+    project_id: UUID,
+    template_identifier: str,
+    repeat: int,
+    warmup: int,
+    only: list[str] | None = None,
+) -> dict[str, dict]:
+    counter = _StatementCounter()
+    results = {}
+    for benchmark in benchmarks(project_id, template_identifier):
+        if only and benchmark.name not in only:
+            continue
+        results[benchmark.name] = measure(benchmark, repeat, warmup, counter)
+        print(
+            f"{benchmark.name:<32} "
+            f"p50 {results[benchmark.name]['p50_ms']:>9.2f}ms  "
+            f"p95 {results[benchmark.name]['p95_ms']:>9.2f}ms  "
+            f"{results[benchmark.name]['statements']:>4} statements"
+        )
+    return results
@@ -1,4 +1,33 @@
+from contextlib import contextmanager
+
+import pytest
+
 from utils.database.connection import Base
+from utils.database.query_monitor import monitor_queries
 
 
 Base.metadata.clear()
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Asserts that the statements executed within stay in the budget of the
+    route in QUERY_BUDGETS. Only monitored engines are counted, see
+    monitor_engine:
+
+        with query_budget("/project/{project_id}"):
+            client.get(f"/project/{project_id}")
+    """
+
+    @contextmanager
+    def check(route: str):
+        with monitor_queries({"path": route}) as queries:
+            yield queries
+        assert queries.budget > 0, f"{route} has no budget"
+        assert queries.count <= queries.budget, (
+            f"{route} executed {queries.count} statements, "
+            f"its budget is {queries.budget}"
+        )
+
+    return check
@@ -0,0 +1,40 @@
+"""
+Configuration of the production server, read by gunicorn from the working
+directory: gunicorn main:app
+
+Core is imported once by the gunicorn master, the workers are forked from
+it and share its memory, instead of importing core on their own. Every
+worker serves requests and websockets with uvicorn, with its share of the
+database connections. Background tasks, like
+the run sync, run in one of the workers only, see run_singleton.
+
+On SIGTERM the workers stop accepting connections, close the websockets
+with 1012 (service restart) so clients reconnect to another instance, and
+finish the requests in flight within SERVER_GRACEFUL_TIMEOUT_SECONDS.
+"""
+
+import os
+
+from utils.config.environment import ENV
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '80')}"
+workers = ENV.SERVER_WORKERS or min(os.process_cpu_count() or 1, 8)
+# read by connection.py when the app is preloaded, the workers share the
+# DATABASE_POOL_SIZE and DATABASE_MAX_OVERFLOW connections
+ENV.SERVER_WORKERS = workers
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+graceful_timeout = ENV.SERVER_GRACEFUL_TIMEOUT_SECONDS
+
+loglevel = ENV.LOG_LEVEL.lower()
+accesslog = "-"
+
+
+def post_fork(server, worker):
+    # connections the master may have opened must not be shared with the
+    # workers, they open their own on first use
+    from utils.database.connection import async_engine, engine
+
+    engine.dispose(close=False)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close=False)
@@ -1,27 +1,53 @@
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
-from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
+from services.workflow_service.controllers import (
+    image_controller,
+    run_controller,
+    workflow_controller,
+)
 from services.workflow_service.views import compute_block as compute_block_view
 from services.workflow_service.views import project as project_view
 from services.workflow_service.views import workflow as workflow_view
 from sqlalchemy.exc import OperationalError
 from utils.config.environment import ENV
-from utils.database.connection import engine
-from utils.security.token import authenticate_user, keycloak_openid
+from utils.database.connection import async_engine, engine
+from utils.database.locks import run_singleton
+from utils.database.query_monitor import (
+    QueryMonitorMiddleware,
+    monitor_engine,
+)
+from utils.http import outbound
+from utils.metrics import registry
+from utils.metrics.middleware import MetricsMiddleware, instrument_engine
+from utils.profiling import profiler
+from utils.profiling.middleware import ProfilingMiddleware
+from utils.security.token import (
+    authenticate_user,
+    check_callback_secret,
+    get_keycloak_openid,
+    verify_profiling_token,
+)
+from utils.tracing import tracer
+from utils.tracing.middleware import TracingMiddleware, trace_engine
 from utils.config.registry import RepoRegistry
 
 logging.basicConfig(
-    format="%(asctime)s %(levelname)-8s %(message)s",
+    format="%(asctime)s %(levelname)-8s [%(request_id)s] %(message)s",
     level=ENV.LOG_LEVEL,
     datefmt="%Y-%m-%d %H:%M:%S",
 )
+for handler in logging.getLogger().handlers:
+    handler.addFilter(tracer.RequestIdLogFilter())
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
+    check_callback_secret()
     try:
         engine.connect()
         RepoRegistry()  # loads repos initially
@@ -29,10 +55,63 @@ async def lifespan(_: FastAPI):
         logging.exception("Connection to database failed.")
         raise RuntimeError("Shutdown, database connection failed.")
     finally:
+        if ENV.IMAGE_PREWARM:
+            # give airflow time to register the DAG before the first pull
+            try:
+                workflow_controller.ensure_static_dag(
+                    image_controller.PREWARM_DAG_FILE
+                )
+            except OSError:
+                logging.exception("Could not write the image prewarm DAG.")
+
+        # run states published by the other workers
+        relay = asyncio.create_task(run_controller.relay_run_states())
+
+        # with several workers, only one of them syncs the runs
+        run_sync = None
+        if ENV.RUN_SYNC_INTERVAL_SECONDS > 0:
+            run_sync = asyncio.create_task(
+                run_singleton("run_sync", run_controller.run_sync_loop)
+            )
+
         yield
 
+    for task in (relay, run_sync):
+        if task is None:
+            continue
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    if async_engine is not None:
+        await async_engine.dispose()
+
 app = FastAPI(title="scystream-core", lifespan=lifespan)
 
+if ENV.METRICS_ENABLED:
+    instrument_engine(engine, "sync")
+    if async_engine is not None:
+        instrument_engine(async_engine.sync_engine, "async")
+    app.add_middleware(MetricsMiddleware)
+
+if tracer.enabled():
+    trace_engine(engine)
+    if async_engine is not None:
+        trace_engine(async_engine.sync_engine)
+if ENV.QUERY_MONITOR or ENV.SLOW_QUERY_MS > 0:
+    monitor_engine(engine)
+    if async_engine is not None:
+        monitor_engine(async_engine.sync_engine)
+if ENV.QUERY_MONITOR:
+    app.add_middleware(QueryMonitorMiddleware)
+
+# requests do not pass the profiler unless profiling is configured
+if ENV.PROFILING_TOKEN or ENV.PROFILING_SLOWEST > 0:
+    app.add_middleware(ProfilingMiddleware)
+
+# request ids are assigned even without tracing, they are part of the logs
+app.add_middleware(TracingMiddleware)
+
 origins = ["*" if ENV.DEVELOPMENT else ENV.EXTERNAL_URL]
 app.add_middleware(
     CORSMiddleware,
@@ -40,6 +119,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Request-ID"],
 )
 
 
@@ -48,6 +128,49 @@ app.include_router(project_view.router)
 app.include_router(compute_block_view.router)
 
 
+@app.get("/health")
+async def health():
+    """
+    Core itself is up if this answers. The circuit breakers of the services
+    core calls tell which of them are unavailable, while they are, calls to
+    them fail fast and the last known run states are served.
+    """
+    dependencies = outbound.breaker_states()
+    degraded = any(d["state"] != "closed" for d in dependencies.values())
+    return {
+        "status": "degraded" if degraded else "ok",
+        "dependencies": dependencies,
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not ENV.METRICS_ENABLED:
+        raise HTTPException(status_code=404)
+
+    return Response(
+        content=registry.render(),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+@app.get("/profiling/slowest", include_in_schema=False)
+async def slowest_requests(_: None = Depends(verify_profiling_token)):
+    """The slowest recent requests per route, of this worker."""
+    return profiler.slowest.snapshot()
+
+
+@app.get("/profiling/profiles/{request_id}", include_in_schema=False)
+async def request_profile(
+    request_id: str,
+    _: None = Depends(verify_profiling_token),
+):
+    profile = await asyncio.to_thread(profiler.load_profile, request_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return Response(content=profile, media_type="text/plain")
+
+
 @app.get("/callback", include_in_schema=False)
 async def callback(request: Request):
     keycode = request.query_params.get("code") or ""
@@ -65,7 +188,7 @@ async def callback(request: Request):
 
 @app.get("/login", response_class=RedirectResponse, include_in_schema=False)
 async def login(request: Request):
-    auth_url = keycloak_openid.auth_url(
+    auth_url = get_keycloak_openid().auth_url(
         redirect_uri=ENV.KEYCLOAK_REDIRECT_URL
         or str(request.url_for("callback")),
         scope="openid profile email",
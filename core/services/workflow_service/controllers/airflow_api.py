@@ -0,0 +1,173 @@
+"""
+Client of the airflow REST API. The generated airflow client imports all
+of its apis and models at once, which takes seconds, so this module is
+only imported by the functions calling airflow, not at startup.
+"""
+
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+from airflow_client.client.api.dag_api import DAGApi
+from airflow_client.client.api.dag_run_api import DagRunApi
+from airflow_client.client.api.task_instance_api import TaskInstanceApi
+from airflow_client.client.api_client import ApiClient
+from airflow_client.client.configuration import Configuration
+from airflow_client.client.exceptions import ApiException
+from airflow_client.client.models.dag_patch_body import DAGPatchBody
+from airflow_client.client.models.dag_run_patch_body import DAGRunPatchBody
+from airflow_client.client.models.dag_run_patch_states import (
+    DAGRunPatchStates,
+)
+from airflow_client.client.models.dag_runs_batch_body import DAGRunsBatchBody
+from airflow_client.client.models.task_instances_batch_body import (
+    TaskInstancesBatchBody,
+)
+from airflow_client.client.models.trigger_dag_run_post_body import (
+    TriggerDAGRunPostBody,
+)
+from pydantic import BaseModel
+
+from utils.config.environment import ENV
+from utils.http import outbound
+from utils.tracing import tracer
+
+
+# with the apis and models of the calls core makes, for the controllers
+# importing this module on first use
+__all__ = [
+    "AirflowAccessTokenResponse",
+    "AirflowApiClient",
+    "ApiException",
+    "DAGApi",
+    "DAGPatchBody",
+    "DAGRunPatchBody",
+    "DAGRunPatchStates",
+    "DAGRunsBatchBody",
+    "DagRunApi",
+    "TaskInstanceApi",
+    "TaskInstancesBatchBody",
+    "TriggerDAGRunPostBody",
+    "client",
+    "get_airflow_client_access_token",
+    "get_airflow_config",
+]
+
+
+class AirflowAccessTokenResponse(BaseModel):
+    access_token: str
+
+
+def _airflow_unavailable(error: Exception) -> bool:
+    if isinstance(error, ApiException):
+        return error.status is None or error.status >= 500
+    return isinstance(
+        error, (requests.RequestException, urllib3.exceptions.HTTPError)
+    )
+
+
+def _request_access_token(url: str, payload: dict) -> requests.Response:
+    response = requests.post(
+        url,
+        json=payload,
+        headers={"Content-Type": "application/json"},
+        timeout=ENV.AIRFLOW_TIMEOUT_SECONDS,
+    )
+    if response.status_code >= 500:
+        response.raise_for_status()
+    return response
+
+
+def get_airflow_client_access_token(
+    host: str,
+    username: str,
+    password: str,
+) -> str:
+    url = f"{host}/auth/token"
+    payload = {
+        "username": username,
+        "password": password,
+    }
+    response = outbound.call(
+        "airflow",
+        _request_access_token,
+        url,
+        payload,
+        is_unavailable=_airflow_unavailable,
+    )
+    if response.status_code != 201:
+        raise RuntimeError(
+            f"Failed to get access token: \
+            {response.status_code} {response.text}",
+        )
+    response_success = AirflowAccessTokenResponse(**response.json())
+    return response_success.access_token
+
+
+def get_airflow_config() -> Configuration:
+    airflow_config = Configuration(
+        host=ENV.AIRFLOW_HOST,
+    )
+
+    airflow_config.access_token = get_airflow_client_access_token(
+        host=airflow_config.host,
+        username=ENV.AIRFLOW_USER,
+        password=ENV.AIRFLOW_PASS,
+    )
+
+    return airflow_config
+
+
+class AirflowApiClient(ApiClient):
+    """
+    ApiClient calling airflow through its circuit breaker, with a timeout.
+    """
+
+    def call_api(
+        self,
+        method,
+        url,
+        header_params=None,
+        body=None,
+        post_params=None,
+        _request_timeout=None,
+    ):
+        with tracer.span(
+            "airflow.request", method=method, path=urlsplit(url).path
+        ):
+            return outbound.call(
+                "airflow",
+                self._call_api,
+                method,
+                url,
+                header_params,
+                body,
+                post_params,
+                _request_timeout or ENV.AIRFLOW_TIMEOUT_SECONDS,
+                is_unavailable=_airflow_unavailable,
+                # the batch endpoints only read, but are POSTs
+                idempotent=method != "POST" or url.endswith("/list"),
+            )
+
+    def _call_api(
+        self, method, url, header_params, body, post_params, _request_timeout
+    ):
+        response = super().call_api(
+            method,
+            url,
+            header_params=header_params,
+            body=body,
+            post_params=post_params,
+            _request_timeout=_request_timeout,
+        )
+        # the generated apis raise on errors only after the call, too late
+        # for the breaker
+        if response.status >= 500:
+            response.read()
+            raise ApiException(http_resp=response)
+        return response
+
+
+def client() -> AirflowApiClient:
+    """Client of the configured airflow, with a new access token."""
+    return AirflowApiClient(get_airflow_config())
@@ -0,0 +1,197 @@
+"""
+Content addressed cache of block results. Every block of a DAG gets a key
+hashed from everything that determines its outputs: image, entrypoint,
+environment, the keys of its upstream blocks and the ETags of the files it
+reads from outside the project. A block does not need to be executed
+again if the latest run that executed it succeeded with the same key, and
+its output files still exist. Earlier runs do not count, their outputs were
+overwritten by the latest one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from typing import TYPE_CHECKING
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from services.workflow_service.models.block import Block, block_dependencies
+from services.workflow_service.models.input_output import (
+    DataType,
+    InputOutputType,
+)
+from services.workflow_service.models.run import BlockRun
+from utils.data.file_handling import bulk_file_etags_from_ios
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+
+def _external_inputs(db: Session, blocks: list[Block]):
+    """
+    Returns the inputs of the blocks that are not fed by another block of
+    the project, i.e. the data the project reads from outside.
+    """
+    connected = set(
+        db.execute(
+            select(block_dependencies.c.downstream_input_uuid).where(
+                block_dependencies.c.downstream_block_uuid.in_(
+                    [b.uuid for b in blocks]
+                )
+            )
+        ).scalars()
+    )
+
+    return {
+        block.uuid: [
+            io for io in block.selected_entrypoint.input_outputs
+            if io.type == InputOutputType.INPUT and io.uuid not in connected
+        ]
+        for block in blocks
+    }
+
+
+def compute_cache_keys(
+    db: Session, blocks: list[Block], graph: nx.DiGraph
+) -> dict[UUID, str | None]:
+    """
+    Returns the cache key of every block in the graph built by create_graph.
+    Blocks reading external database tables, or external files that do not
+    exist, have no cheap fingerprint of their inputs and get no key, as do
+    all blocks downstream of them.
+    """
+    import networkx as nx
+
+    external = _external_inputs(db, blocks)
+    etags = bulk_file_etags_from_ios(
+        [io for ios in external.values() for io in ios]
+    )
+
+    keys: dict[UUID, str | None] = {}
+    for block_id in nx.topological_sort(graph):
+        node = graph.nodes[block_id]
+        upstream = [keys[u] for u in graph.predecessors(block_id)]
+        inputs = {}
+        for io in external[block_id]:
+            if io.data_type != DataType.FILE or io.uuid not in etags:
+                inputs = None
+                break
+            inputs[str(io.uuid)] = etags[io.uuid]
+
+        if inputs is None or None in upstream:
+            keys[block_id] = None
+            continue
+
+        keys[block_id] = hashlib.sha256(
+            json.dumps(
+                {
+                    "image": node["image"],
+                    "entry_name": node["entry_name"],
+                    "environment": node["environment"],
+                    "upstream": sorted(upstream),
+                    "inputs": inputs,
+                },
+                sort_keys=True,
+            ).encode()
+        ).hexdigest()
+
+    return keys
+
+
+def _latest_executions(db: Session, block_ids) -> dict[UUID, BlockRun]:
+    """
+    Returns the latest run of every block in which it was executed, or is
+    being executed. Only the outputs of that run are in place.
+    """
+    executed_at = func.coalesce(BlockRun.started_at, BlockRun.ended_at)
+    return {
+        block_run.block_uuid: block_run
+        for block_run in db.execute(
+            select(BlockRun)
+            .where(
+                BlockRun.block_uuid.in_(list(block_ids)),
+                BlockRun.cached.is_(False),
+                executed_at.is_not(None),
+            )
+            .order_by(BlockRun.block_uuid, executed_at.desc())
+            .distinct(BlockRun.block_uuid)
+        ).scalars()
+    }
+
+
+def _drop_missing_outputs(
+    blocks: list[Block], reusable: set[UUID], files_only: bool = False
+) -> None:
+    """
+    Removes blocks whose output files do not exist anymore. With files_only
+    blocks with other outputs, e.g. database tables, are removed as well,
+    there is no way to tell whether they are still in place.
+    """
+    entrypoints = {
+        b.selected_entrypoint_uuid: b.uuid
+        for b in blocks if b.uuid in reusable
+    }
+    outputs = [
+        io
+        for block in blocks if block.uuid in reusable
+        for io in block.selected_entrypoint.input_outputs
+        if io.type == InputOutputType.OUTPUT
+    ]
+    if files_only:
+        for io in outputs:
+            if io.data_type != DataType.FILE:
+                reusable.discard(entrypoints[io.entrypoint_uuid])
+
+    outputs = [io for io in outputs if io.data_type == DataType.FILE]
+    existing = bulk_file_etags_from_ios(outputs)
+    for io in outputs:
+        if io.uuid not in existing:
+            logging.debug(f"Output {io.uuid} is gone, not reusing its block")
+            reusable.discard(entrypoints[io.entrypoint_uuid])
+
+
+def find_cached_blocks(
+    db: Session, blocks: list[Block], cache_keys: dict[UUID, str | None]
+) -> set[UUID]:
+    """
+    Returns the blocks whose latest execution succeeded with their current
+    key, and whose output files still exist, so their previous outputs can
+    be reused. Blocks with outputs other than files are never reused.
+    """
+    candidates = {b: k for b, k in cache_keys.items() if k is not None}
+    if not candidates:
+        return set()
+
+    cached = {
+        block_id
+        for block_id, block_run in _latest_executions(db, candidates).items()
+        if block_run.state == "success"
+        and block_run.cache_key == candidates[block_id]
+    }
+    _drop_missing_outputs(blocks, cached, files_only=True)
+
+    return cached
+
+
+def find_blocks_with_results(
+    db: Session, blocks: list[Block], block_ids: set[UUID]
+) -> set[UUID]:
+    """
+    Returns the blocks whose latest execution succeeded and whose output
+    files still exist, regardless of whether their configs changed since.
+    """
+    if not block_ids:
+        return set()
+
+    with_results = {
+        block_id
+        for block_id, block_run in _latest_executions(db, block_ids).items()
+        if block_run.state == "success"
+    }
+    _drop_missing_outputs(blocks, with_results)
+
+    return with_results
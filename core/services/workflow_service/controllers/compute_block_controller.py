@@ -1,43 +1,170 @@
+from __future__ import annotations
+
+from utils.database.connection import AsyncSessionLocal
 from utils.database.session_injector import get_database
 from uuid import UUID, uuid4
-from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy.orm import Session, contains_eager, joinedload
 from fastapi import HTTPException
 from pydantic import BaseModel
 import os
 import logging
 import base64
 
-from typing import Literal
-from sqlalchemy import select, case, asc, delete
+from typing import TYPE_CHECKING, Literal
+from sqlalchemy import select, case, asc, delete, update, tuple_, func
 from utils.config.defaults import (
     get_file_cfg_defaults_dict,
-    SETTINGS_CLASS,
+    settings_class,
     extract_default_keys_from_io,
     get_pg_cfg_defaults_dict_with_setup,
 )
 import utils.data.file_handling as fh
+from services.workflow_service.controllers import graph_controller
 from utils.config.registry import RepoRegistry
 from services.workflow_service.models.block import Block, block_dependencies
 from services.workflow_service.models.entrypoint import Entrypoint
+from services.workflow_service.models.project import Project
 from services.workflow_service.models.input_output import (
     DataType,
     InputOutput,
     InputOutputType,
 )
 from services.workflow_service.schemas.compute_block import (
+    BlockResourcesDTO,
     ConfigType,
     InputOutputDTO,
 )
 from services.workflow_service.schemas.compute_block import BaseInputOutputDTO
-from scystream.sdk.config import load_config
-from scystream.sdk.config.models import (
-    ComputeBlock as SDKComputeBlock,
-)
+
+if TYPE_CHECKING:
+    from scystream.sdk.config.models import (
+        ComputeBlock as SDKComputeBlock,
+    )
 
 CBC_FILE_IDENTIFIER = "cbc.yaml"
 
 
+def bump_project_versions(db: Session, project_ids) -> None:
+    """
+    Increments the version of the given projects inside the callers
+    transaction. project_ids can be a list or a select of project uuids.
+    Every change to blocks, edges or configs has to bump the version, or
+    clients will keep serving cached graphs and configurations.
+    """
+    db.execute(
+        update(Project)
+        .where(Project.uuid.in_(project_ids))
+        .values(version=Project.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _project_ids_of_blocks(block_ids: list[UUID]):
+    return select(Block.project_uuid).where(Block.uuid.in_(block_ids))
+
+
+def _get_project_id_of_block(db: Session, block_id: UUID) -> UUID:
+    project_id = db.execute(
+        select(Block.project_uuid).where(Block.uuid == block_id)
+    ).scalar_one_or_none()
+
+    if project_id is None:
+        raise HTTPException(status_code=404, detail="Block not found.")
+
+    return project_id
+
+
+def _project_ids_of_ios(io_ids: list[UUID]):
+    return (
+        select(Block.project_uuid)
+        .join(
+            InputOutput,
+            InputOutput.entrypoint_uuid == Block.selected_entrypoint_uuid,
+        )
+        .where(InputOutput.uuid.in_(io_ids))
+    )
+
+
+def _block_ids_of_ios(io_ids):
+    return (
+        select(Block.uuid)
+        .join(
+            InputOutput,
+            InputOutput.entrypoint_uuid == Block.selected_entrypoint_uuid,
+        )
+        .where(InputOutput.uuid.in_(io_ids))
+    )
+
+
+def validate_value(value) -> bool:
+    """Returns True if the config value is not set."""
+    return value is None or value in ("", [], {})
+
+
+def _missing_config_keys(
+    envs: ConfigType | None, ios: list[InputOutput]
+) -> list[str]:
+    missing = [k for k, v in (envs or {}).items() if validate_value(v)]
+    for io in ios:
+        missing.extend(
+            k for k, v in (io.config or {}).items() if validate_value(v)
+        )
+    return missing
+
+
+def refresh_block_readiness(db: Session, block_ids) -> None:
+    """
+    Recomputes the persisted missing config keys of the given blocks.
+    block_ids can be a list or a select of block uuids. Has to be called
+    by every controller that writes envs or io configs.
+    """
+    blocks = (
+        db.query(Block)
+        .filter(Block.uuid.in_(block_ids))
+        .options(
+            joinedload(Block.selected_entrypoint).selectinload(
+                Entrypoint.input_outputs
+            )
+        )
+        .all()
+    )
+
+    for block in blocks:
+        missing = _missing_config_keys(
+            block.selected_entrypoint.envs,
+            block.selected_entrypoint.input_outputs,
+        )
+        block.missing_configs = missing
+        block.missing_config_count = len(missing)
+
+
+def get_project_readiness(
+    project_id: UUID, db: Session | None = None
+) -> tuple[int, dict[UUID, list[str]]]:
+    """
+    Returns the number of blocks in the project and the missing config keys
+    of all blocks that are not fully configured.
+    """
+    if db is None:
+        db = next(get_database())
+
+    block_count = db.execute(
+        select(func.count()).where(Block.project_uuid == project_id)
+    ).scalar_one()
+
+    missing = db.execute(
+        select(Block.uuid, Block.missing_configs).where(
+            Block.project_uuid == project_id,
+            Block.missing_config_count > 0,
+        )
+    ).all()
+
+    return block_count, dict(missing)
+
+
 def _get_cb_info_from_repo(repo_url: str) -> SDKComputeBlock:
+    from scystream.sdk.config import load_config
+
     registry = RepoRegistry()
     cached_path = registry.get_repo(repo_url)
 
@@ -95,11 +222,11 @@ def updated_configs_with_values(
     )
     new_config = io.config.copy() if io.config else {}
 
-    settings_class = SETTINGS_CLASS.get(type)
-    if not settings_class:
+    settings = settings_class(type)
+    if not settings:
         return new_config
 
-    default_keys = settings_class.__annotations__.keys()
+    default_keys = settings.__annotations__.keys()
     cfg_keys = {key: key for key in new_config}
 
     for dk in default_keys:
@@ -208,6 +335,7 @@ def create_compute_block(
             db.flush()
 
         # (3) Create Block
+        missing_configs = _missing_config_keys(envs, input_outputs)
         cb = Block(
             name=name,
             project_uuid=project_id,
@@ -219,10 +347,15 @@ def create_compute_block(
             x_pos=x_pos,
             y_pos=y_pos,
             selected_entrypoint_uuid=entry.uuid,
+            missing_configs=missing_configs,
+            missing_config_count=len(missing_configs),
         )
         db.add(cb)
         db.flush()
 
+        bump_project_versions(db, [project_id])
+        graph_controller.forget_project_graph(db, project_id)
+
         db.refresh(entry)
         logging.info(f"Compute block created succesfully: {cb.uuid}")
         return cb
@@ -258,31 +391,171 @@ def get_io_for_entrypoint(
     )
 
 
-def get_compute_blocks_by_project(project_id: UUID) -> list[Block]:
-    db: Session = next(get_database())
-
-    order_case = case(
+def _io_order_case():
+    return case(
         (InputOutput.data_type == DataType.FILE, 1),
         (InputOutput.data_type == DataType.DBTABLE, 2),
         (InputOutput.data_type == DataType.CUSTOM, 3),
         else_=4,
     )
 
-    blocks = (
-        db.query(Block)
+
+def _compute_blocks_by_project_query(project_id: UUID):
+    return (
+        select(Block)
         .join(Block.selected_entrypoint)
         .outerjoin(Entrypoint.input_outputs)
-        .filter(Block.project_uuid == project_id)
-        .order_by(order_case, asc(InputOutput.name))
+        .where(Block.project_uuid == project_id)
+        .order_by(_io_order_case(), asc(InputOutput.name))
         .options(
             contains_eager(Block.selected_entrypoint).contains_eager(
                 Entrypoint.input_outputs
             )
         )
+    )
+
+
+def get_compute_blocks_by_project(
+    project_id: UUID, db: Session | None = None
+) -> list[Block]:
+    if db is None:
+        db = next(get_database())
+
+    return (
+        db.execute(_compute_blocks_by_project_query(project_id))
+        .unique()
+        .scalars()
         .all()
     )
 
-    return blocks
+
+class BlockNodeRecord:
+    """
+    Column projected read-model of a block, holding only what the canvas
+    listing needs. Inputs and outputs are rows of (uuid, name, type,
+    data_type, entrypoint_uuid), configs are never loaded.
+    """
+
+    __slots__ = (
+        "uuid",
+        "name",
+        "custom_name",
+        "description",
+        "author",
+        "docker_image",
+        "x_pos",
+        "y_pos",
+        "entrypoint_uuid",
+        "entrypoint_name",
+        "cpus",
+        "memory_limit",
+        "pool",
+        "priority_weight",
+        "inputs",
+        "outputs",
+    )
+
+    def __init__(self, row):
+        (
+            self.uuid,
+            self.name,
+            self.custom_name,
+            self.description,
+            self.author,
+            self.docker_image,
+            self.x_pos,
+            self.y_pos,
+            self.entrypoint_uuid,
+            self.entrypoint_name,
+            self.cpus,
+            self.memory_limit,
+            self.pool,
+            self.priority_weight,
+        ) = row
+        self.inputs = []
+        self.outputs = []
+
+
+def _block_nodes_query(project_id: UUID):
+    return (
+        select(
+            Block.uuid,
+            Block.name,
+            Block.custom_name,
+            Block.description,
+            Block.author,
+            Block.docker_image,
+            Block.x_pos,
+            Block.y_pos,
+            Entrypoint.uuid,
+            Entrypoint.name,
+            Block.cpus,
+            Block.memory_limit,
+            Block.pool,
+            Block.priority_weight,
+        )
+        .join(Block.selected_entrypoint)
+        .where(Block.project_uuid == project_id)
+    )
+
+
+def _block_node_ios_query(project_id: UUID):
+    return (
+        select(
+            InputOutput.uuid,
+            InputOutput.name,
+            InputOutput.type,
+            InputOutput.data_type,
+            InputOutput.entrypoint_uuid,
+        )
+        .join(
+            Block,
+            Block.selected_entrypoint_uuid == InputOutput.entrypoint_uuid,
+        )
+        .where(Block.project_uuid == project_id)
+        .order_by(_io_order_case(), asc(InputOutput.name))
+    )
+
+
+def _assemble_block_nodes(block_rows, io_rows) -> list[BlockNodeRecord]:
+    nodes = {row[8]: BlockNodeRecord(row) for row in block_rows}
+
+    for io in io_rows:
+        node = nodes.get(io.entrypoint_uuid)
+        if node is None:
+            continue
+        if io.type == InputOutputType.INPUT:
+            node.inputs.append(io)
+        else:
+            node.outputs.append(io)
+
+    return list(nodes.values())
+
+
+def get_block_nodes_by_project(
+    project_id: UUID, db: Session | None = None
+) -> list[BlockNodeRecord]:
+    """
+    Lightweight alternative to get_compute_blocks_by_project for listings,
+    does not hydrate ORM objects.
+    """
+    if db is None:
+        db = next(get_database())
+
+    block_rows = db.execute(_block_nodes_query(project_id)).all()
+    io_rows = db.execute(_block_node_ios_query(project_id)).all()
+
+    return _assemble_block_nodes(block_rows, io_rows)
+
+
+async def get_block_nodes_by_project_async(
+    project_id: UUID,
+) -> list[BlockNodeRecord]:
+    async with AsyncSessionLocal() as db:
+        block_rows = (await db.execute(_block_nodes_query(project_id))).all()
+        io_rows = (await db.execute(_block_node_ios_query(project_id))).all()
+
+    return _assemble_block_nodes(block_rows, io_rows)
 
 
 def get_block_dependencies_for_blocks(block_ids: list[UUID]) -> list:
@@ -394,6 +667,9 @@ def update_ios(
         updated_downstreams = _update_io(db, io, update_dict.get(io.uuid))
         ids.extend(updated_downstreams)
 
+    refresh_block_readiness(db, _block_ids_of_ios(ids))
+    bump_project_versions(db, _project_ids_of_ios(ids))
+
     updated = (
         db.query(InputOutput).filter(InputOutput.uuid.in_(set(ids))).all()
     )
@@ -433,7 +709,12 @@ class BulkBlockEnvsUpdate(BaseModel):
 def bulk_update_block_envs(updates: list[BulkBlockEnvsUpdate], db: Session):
     block_ids = [item.block_id for item in updates]
 
-    blocks = db.query(Block).filter(Block.uuid.in_(block_ids)).all()
+    blocks = (
+        db.query(Block)
+        .filter(Block.uuid.in_(block_ids))
+        .options(joinedload(Block.selected_entrypoint))
+        .all()
+    )
     block_map = {block.uuid: block for block in blocks}
 
     updated_blocks = []
@@ -465,6 +746,9 @@ def bulk_update_block_envs(updates: list[BulkBlockEnvsUpdate], db: Session):
 
         updated_blocks.append(block)
 
+    refresh_block_readiness(db, block_ids)
+    bump_project_versions(db, _project_ids_of_blocks(block_ids))
+
     return updated_blocks
 
 
@@ -474,6 +758,7 @@ def update_block(
     custom_name: str | None,
     x_pos: float | None,
     y_pos: float | None,
+    resources: BlockResourcesDTO | None = None,
 ) -> Block:
     db: Session = next(get_database())
 
@@ -501,6 +786,16 @@ def update_block(
     if y_pos is not None:
         block.y_pos = y_pos
 
+    if resources is not None:
+        block.cpus = resources.cpus
+        block.memory_limit = resources.memory_limit
+        block.pool = resources.pool
+        block.priority_weight = resources.priority_weight
+
+    if envs:
+        refresh_block_readiness(db, [block.uuid])
+    bump_project_versions(db, [block.project_uuid])
+
     db.commit()
     db.refresh(block)
 
@@ -516,6 +811,9 @@ def delete_block(id: UUID):
     if not block:
         raise HTTPException(status_code=404, detail="Block not found.")
 
+    bump_project_versions(db, [block.project_uuid])
+    graph_controller.forget_project_graph(db, block.project_uuid)
+
     db.delete(block)
     db.commit()
     logging.info(f"Successfully deleted Compute Block with id {id}")
@@ -541,15 +839,21 @@ def create_stream_and_update_target_cfg(
         "downstream_input_uuid": to_input_uuid,
     }
 
+    io_map = _load_edge_ios(
+        db,
+        [(from_block_uuid, from_output_uuid, to_block_uuid, to_input_uuid)],
+    )
+    project_id = _get_project_id_of_block(db, from_block_uuid)
+    graph_controller.add_edges(
+        db, project_id, [(from_block_uuid, to_block_uuid)]
+    )
+
     db.execute(block_dependencies.insert().values(dependency))
+    bump_project_versions(db, [project_id])
 
     # Compare the cfgs, overwrite the cfgs
-    target_io = (
-        db.query(InputOutput).filter_by(uuid=to_input_uuid).one_or_none()
-    )
-    source_io = (
-        db.query(InputOutput).filter_by(uuid=from_output_uuid).one_or_none()
-    )
+    target_io = io_map[to_input_uuid]
+    source_io = io_map[from_output_uuid]
 
     if target_io.data_type != source_io.data_type:
         # Data types do not match, dont allow connection
@@ -573,6 +877,7 @@ def create_stream_and_update_target_cfg(
     target_io.config = updated_configs_with_values(
         target_io, extracted_defaults, target_io.data_type
     )
+    refresh_block_readiness(db, [to_block_uuid])
 
     return target_io.entrypoint_uuid
 
@@ -596,5 +901,217 @@ def delete_edge(
         block_dependencies.c.downstream_input_uuid == to_input_uuid,
     )
 
+    project_id = _get_project_id_of_block(db, from_block_uuid)
+    graph_controller.remove_edges(
+        db, project_id, [(from_block_uuid, to_block_uuid)]
+    )
+
     db.execute(stmt)
+    bump_project_versions(db, [project_id])
     db.commit()
+
+
+# (upstream_block, upstream_output, downstream_block, downstream_input)
+Edge = tuple[UUID, UUID, UUID, UUID]
+
+
+def _load_edge_ios(db: Session, edges: list[Edge]) -> dict[UUID, InputOutput]:
+    """
+    Loads the IOs of the edges by uuid, and checks that every edge connects
+    an output of its upstream block to an input of its downstream block.
+    """
+    io_map = {
+        io.uuid: io
+        for io in get_ios_by_ids(
+            list({e[1] for e in edges} | {e[3] for e in edges}), db
+        )
+    }
+    entrypoints = dict(
+        db.execute(
+            select(Block.uuid, Block.selected_entrypoint_uuid).where(
+                Block.uuid.in_({e[0] for e in edges} | {e[2] for e in edges})
+            )
+        ).all()
+    )
+
+    for from_block, from_output, to_block, to_input in edges:
+        source_io = io_map.get(from_output)
+        target_io = io_map.get(to_input)
+
+        if source_io is None or target_io is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Input or output not found: {from_output}-{to_input}",
+            )
+
+        if (
+            source_io.type != InputOutputType.OUTPUT
+            or source_io.entrypoint_uuid != entrypoints.get(from_block)
+        ):
+            raise HTTPException(
+                status_code=400,
+                detail=f"{from_output} is no output of block {from_block}",
+            )
+
+        if (
+            target_io.type != InputOutputType.INPUT
+            or target_io.entrypoint_uuid != entrypoints.get(to_block)
+        ):
+            raise HTTPException(
+                status_code=400,
+                detail=f"{to_input} is no input of block {to_block}",
+            )
+
+    return io_map
+
+
+def create_streams_and_update_target_cfgs(
+    db: Session, project_id: UUID, edges: list[Edge]
+) -> list[InputOutput]:
+    """
+    Batch variant of create_stream_and_update_target_cfg. Inserts all edges
+    with one statement and loads all involved IOs with one query.
+    Returns the inputs whose configs were overwritten.
+    """
+    if not edges:
+        return []
+
+    io_map = _load_edge_ios(db, edges)
+    graph_controller.add_edges(db, project_id, [(e[0], e[2]) for e in edges])
+
+    db.execute(
+        block_dependencies.insert(),
+        [
+            {
+                "upstream_block_uuid": from_block,
+                "upstream_output_uuid": from_output,
+                "downstream_block_uuid": to_block,
+                "downstream_input_uuid": to_input,
+            }
+            for from_block, from_output, to_block, to_input in edges
+        ],
+    )
+
+    updated_targets = []
+    for _, from_output, _, to_input in edges:
+        source_io = io_map[from_output]
+        target_io = io_map[to_input]
+
+        if target_io.data_type != source_io.data_type:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Source & Target types do not match: {to_input}",
+            )
+
+        # Custom inputs are not overwritten
+        if target_io.data_type is DataType.CUSTOM:
+            continue
+
+        target_io.config = updated_configs_with_values(
+            target_io,
+            extract_default_keys_from_io(source_io),
+            target_io.data_type,
+        )
+        updated_targets.append(target_io)
+
+    if updated_targets:
+        refresh_block_readiness(
+            db, _block_ids_of_ios([io.uuid for io in updated_targets])
+        )
+
+    return updated_targets
+
+
+def delete_streams(db: Session, project_id: UUID, edges: list[Edge]) -> None:
+    if not edges:
+        return
+
+    graph_controller.remove_edges(
+        db, project_id, [(e[0], e[2]) for e in edges]
+    )
+
+    db.execute(
+        delete(block_dependencies).where(
+            tuple_(
+                block_dependencies.c.upstream_block_uuid,
+                block_dependencies.c.upstream_output_uuid,
+                block_dependencies.c.downstream_block_uuid,
+                block_dependencies.c.downstream_input_uuid,
+            ).in_(edges)
+        )
+    )
+
+
+class BlockPositionUpdate(BaseModel):
+    block_id: UUID
+    x_pos: float
+    y_pos: float
+
+
+def apply_canvas_mutations(
+    db: Session,
+    project_id: UUID,
+    positions: list[BlockPositionUpdate],
+    envs: list[BulkBlockEnvsUpdate],
+    create_edges: list[Edge],
+    delete_edges: list[Edge],
+) -> tuple[list[Block], list[InputOutput], int]:
+    """
+    Applies a batch of canvas changes in the callers transaction, using
+    set-based statements instead of one transaction per block or edge.
+    Edges are deleted before new ones are created, so an edge can be
+    moved within one batch.
+
+    Returns:
+        :list[Block]: Blocks whose envs were updated
+        :list[InputOutput]: Inputs reconfigured by the created edges
+        :int: The new project version
+    """
+    logging.debug(
+        f"Applying canvas mutations to project {project_id}: "
+        f"{len(positions)} positions, {len(envs)} envs, "
+        f"{len(create_edges)} new edges, {len(delete_edges)} deleted edges"
+    )
+
+    referenced_blocks = (
+        {p.block_id for p in positions}
+        | {e.block_id for e in envs}
+        | {e[0] for e in create_edges + delete_edges}
+        | {e[2] for e in create_edges + delete_edges}
+    )
+    project_blocks = set(
+        db.execute(
+            select(Block.uuid).where(
+                Block.project_uuid == project_id,
+                Block.uuid.in_(referenced_blocks),
+            )
+        ).scalars()
+    )
+    if missing := referenced_blocks - project_blocks:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Blocks not found in project: {sorted(map(str, missing))}",
+        )
+
+    delete_streams(db, project_id, delete_edges)
+    updated_inputs = create_streams_and_update_target_cfgs(
+        db, project_id, create_edges
+    )
+
+    if positions:
+        db.execute(
+            update(Block),
+            [
+                {"uuid": p.block_id, "x_pos": p.x_pos, "y_pos": p.y_pos}
+                for p in positions
+            ],
+        )
+
+    updated_blocks = bulk_update_block_envs(envs, db) if envs else []
+
+    bump_project_versions(db, [project_id])
+    version = db.execute(
+        select(Project.version).where(Project.uuid == project_id)
+    ).scalar_one()
+
+    return updated_blocks, updated_inputs, version
@@ -0,0 +1,368 @@
+"""
+Keeps a per-project adjacency of the block graph in memory, so that new
+edges can be checked for cycles with a DFS over the affected part of the
+graph, instead of rebuilding the whole graph with networkx.
+
+Cached graphs are keyed by the project version. Any mutation bumps the
+version, so graphs changed by other workers or by mutations that do not
+maintain the cache are rebuilt on next use. Changes made inside a
+transaction are staged on the session and only published on commit. The
+graphs of the least recently used projects are dropped from the cache.
+"""
+
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from services.workflow_service.models.block import Block, block_dependencies
+from services.workflow_service.models.project import Project
+from utils.metrics.registry import CACHE_LOOKUPS
+
+_PENDING_KEY = "pending_project_graphs"
+
+# project -> graph, least recently used first
+_cache: OrderedDict[UUID, "ProjectGraph"] = OrderedDict()
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 256
+
+
+class ProjectGraph:
+    __slots__ = (
+        "version", "downstream", "_acyclic", "_parent", "_components",
+    )
+
+    def __init__(self, version: int, blocks, edges):
+        self.version = version
+        # block -> downstream block -> number of io connections
+        self.downstream: dict[UUID, dict[UUID, int]] = {
+            b: defaultdict(int) for b in blocks
+        }
+        self._acyclic: bool | None = None
+        self._parent: dict[UUID, UUID] | None = None
+        self._components: int | None = None
+
+        for upstream, downstream in edges:
+            self.downstream[upstream][downstream] += 1
+
+    def copy(self) -> "ProjectGraph":
+        graph = ProjectGraph.__new__(ProjectGraph)
+        graph.version = self.version
+        graph.downstream = {
+            b: defaultdict(int, d) for b, d in self.downstream.items()
+        }
+        graph._acyclic = self._acyclic
+        graph._parent = dict(self._parent) if self._parent else None
+        graph._components = self._components
+        return graph
+
+    @property
+    def acyclic(self) -> bool:
+        if self._acyclic is None:
+            self._acyclic = self._is_acyclic()
+        return self._acyclic
+
+    def _is_acyclic(self) -> bool:
+        indegree = dict.fromkeys(self.downstream, 0)
+        for targets in self.downstream.values():
+            for target in targets:
+                indegree[target] += 1
+
+        ready = [b for b, d in indegree.items() if d == 0]
+        visited = 0
+        while ready:
+            block = ready.pop()
+            visited += 1
+            for target in self.downstream[block]:
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    ready.append(target)
+
+        return visited == len(self.downstream)
+
+    def reaches(self, source: UUID, target: UUID) -> bool:
+        """
+        DFS from source along downstream edges. Only visits blocks
+        downstream of source, and stops as soon as target is found.
+        """
+        if source == target:
+            return True
+
+        stack = [source]
+        seen = {source}
+        while stack:
+            for nxt in self.downstream.get(stack.pop(), ()):
+                if nxt == target:
+                    return True
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return False
+
+    def critical_path(
+        self, weights: dict[UUID, float]
+    ) -> tuple[list[UUID], float]:
+        """
+        Returns the path with the highest sum of block weights and that sum.
+        Blocks without weight count as 0. The graph has to be acyclic.
+        """
+        indegree = dict.fromkeys(self.downstream, 0)
+        for targets in self.downstream.values():
+            for target in targets:
+                indegree[target] += 1
+
+        # longest path ending in a block, and the block before it
+        length = {b: weights.get(b, 0.0) for b in self.downstream}
+        previous: dict[UUID, UUID | None] = dict.fromkeys(self.downstream)
+
+        ready = [b for b, d in indegree.items() if d == 0]
+        while ready:
+            block = ready.pop()
+            for target in self.downstream[block]:
+                candidate = length[block] + weights.get(target, 0.0)
+                if candidate > length[target]:
+                    length[target] = candidate
+                    previous[target] = block
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    ready.append(target)
+
+        if not length:
+            return [], 0.0
+
+        block = max(length, key=length.get)
+        total = length[block]
+        path = []
+        while block is not None:
+            path.append(block)
+            block = previous[block]
+        return path[::-1], total
+
+    def _find(self, block: UUID) -> UUID:
+        parent = self._parent
+        root = block
+        while parent[root] != root:
+            root = parent[root]
+        while parent[block] != root:
+            parent[block], block = root, parent[block]
+        return root
+
+    def _union(self, a: UUID, b: UUID) -> None:
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a != root_b:
+            self._parent[root_a] = root_b
+            self._components -= 1
+
+    def _build_components(self) -> None:
+        self._parent = {b: b for b in self.downstream}
+        self._components = len(self.downstream)
+        for upstream, targets in self.downstream.items():
+            for downstream in targets:
+                self._union(upstream, downstream)
+
+    def component_count(self) -> int:
+        if self._components is None:
+            self._build_components()
+        return self._components
+
+    def is_connected(self) -> bool:
+        return self.component_count() <= 1
+
+    def add_edge(self, upstream: UUID, downstream: UUID) -> None:
+        """Adds an edge, the caller has to check for cycles first."""
+        self.downstream[upstream][downstream] += 1
+        if self._parent is not None:
+            self._union(upstream, downstream)
+
+    def remove_edge(self, upstream: UUID, downstream: UUID) -> None:
+        targets = self.downstream.get(upstream)
+        if not targets or downstream not in targets:
+            return
+
+        targets[downstream] -= 1
+        if targets[downstream] == 0:
+            del targets[downstream]
+            # Union-find cannot split components, recount lazily
+            self._parent = None
+            self._components = None
+            # the edge may have closed the only cycle
+            if self._acyclic is False:
+                self._acyclic = None
+
+
+def _cache_graphs(graphs: dict[UUID, "ProjectGraph"]) -> None:
+    with _cache_lock:
+        for project_id, graph in graphs.items():
+            _cache[project_id] = graph
+            _cache.move_to_end(project_id)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _load_project_graph(
+    db: Session, project_id: UUID, version: int
+) -> ProjectGraph:
+    logging.debug(f"Building graph of project {project_id}")
+
+    blocks = db.execute(
+        select(Block.uuid).where(Block.project_uuid == project_id)
+    ).scalars().all()
+
+    edges = db.execute(
+        select(
+            block_dependencies.c.upstream_block_uuid,
+            block_dependencies.c.downstream_block_uuid,
+        )
+        .join(Block, Block.uuid == block_dependencies.c.upstream_block_uuid)
+        .where(Block.project_uuid == project_id)
+    ).all()
+
+    return ProjectGraph(version, blocks, edges)
+
+
+def get_blocks_graph(db: Session, blocks: list[UUID]) -> ProjectGraph:
+    """
+    Returns the graph of the given blocks and the current edges between
+    them. It is not cached, and has no version.
+    """
+    edges = db.execute(
+        select(
+            block_dependencies.c.upstream_block_uuid,
+            block_dependencies.c.downstream_block_uuid,
+        ).where(
+            block_dependencies.c.upstream_block_uuid.in_(blocks),
+            block_dependencies.c.downstream_block_uuid.in_(blocks),
+        )
+    ).all()
+
+    return ProjectGraph(0, blocks, edges)
+
+
+def get_project_graph(
+    db: Session, project_id: UUID, for_update: bool = False
+) -> ProjectGraph:
+    """
+    Returns the graph of the project as seen by the sessions transaction.
+    for_update locks the project row, serializing edge changes per project.
+    Graphs returned with for_update are staged on the session and may be
+    modified, changes are published to the cache on commit.
+    """
+    pending = db.info.setdefault(_PENDING_KEY, {})
+    if project_id in pending:
+        return pending[project_id]
+
+    query = select(Project.version).where(Project.uuid == project_id)
+    if for_update:
+        query = query.with_for_update()
+
+    version = db.execute(query).scalar_one_or_none()
+    if version is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    with _cache_lock:
+        cached = _cache.get(project_id)
+        if cached is not None:
+            _cache.move_to_end(project_id)
+
+    if cached is not None and cached.version == version:
+        CACHE_LOOKUPS.inc(cache="project_graph", result="hit")
+        graph = cached.copy() if for_update else cached
+    else:
+        CACHE_LOOKUPS.inc(cache="project_graph", result="miss")
+        graph = _load_project_graph(db, project_id, version)
+        if not for_update:
+            _cache_graphs({project_id: graph})
+
+    if for_update:
+        pending[project_id] = graph
+
+    return graph
+
+
+def add_edges(
+    db: Session, project_id: UUID, edges: list[tuple[UUID, UUID]]
+) -> None:
+    """
+    Checks that the given (upstream, downstream) block edges keep the
+    project acyclic and adds them to the staged project graph.
+    """
+    graph = get_project_graph(db, project_id, for_update=True)
+
+    for upstream, downstream in edges:
+        if upstream not in graph.downstream or (
+            downstream not in graph.downstream
+        ):
+            raise HTTPException(
+                status_code=404,
+                detail="Both blocks of an edge must be in the project.",
+            )
+
+        if graph.reaches(downstream, upstream):
+            raise HTTPException(
+                status_code=400,
+                detail="The edge would make the project cyclic.",
+            )
+
+        graph.add_edge(upstream, downstream)
+
+
+def remove_edges(
+    db: Session, project_id: UUID, edges: list[tuple[UUID, UUID]]
+) -> None:
+    graph = get_project_graph(db, project_id, for_update=True)
+
+    for upstream, downstream in edges:
+        graph.remove_edge(upstream, downstream)
+
+
+def forget_project_graph(db: Session, project_id: UUID) -> None:
+    """
+    Drops the staged graph of the project. Used by mutations that change
+    the blocks of a project, the graph is rebuilt on next use.
+    """
+    db.info.get(_PENDING_KEY, {}).pop(project_id, None)
+
+
+def drop_project_graph(project_id: UUID) -> None:
+    """Drops the cached graph of a deleted project."""
+    with _cache_lock:
+        _cache.pop(project_id, None)
+
+
+@event.listens_for(Session, "before_commit")
+def _version_pending_graphs(session: Session) -> None:
+    pending = session.info.get(_PENDING_KEY)
+    if not pending:
+        return
+
+    versions = dict(
+        session.execute(
+            select(Project.uuid, Project.version).where(
+                Project.uuid.in_(list(pending))
+            )
+        ).all()
+    )
+    for project_id, graph in list(pending.items()):
+        if project_id not in versions:
+            # project was deleted in this transaction
+            del pending[project_id]
+            continue
+        graph.version = versions[project_id]
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_graphs(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    _cache_graphs(pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_graphs(session: Session, _) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,206 @@
+"""
+The generated DAGs do not pull the images of their blocks, so the first run
+of a new block would block on a cold pull. Images in use by compute blocks
+are therefore pulled ahead of time by a prewarm DAG on the airflow workers,
+which reports every pull back to core.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from services.workflow_service.controllers import workflow_controller
+from services.workflow_service.models.block import Block
+from services.workflow_service.models.image import DockerImage
+from services.workflow_service.schemas.compute_block import (
+    DockerImageDTO,
+    ImagePullEventDTO,
+)
+from utils.config.environment import ENV
+from utils.database.session_injector import get_database
+from utils.security.token import image_callback_token
+
+PREWARM_DAG_ID = "scystream_image_prewarm"
+PREWARM_DAG_FILE = "scystream_image_prewarm.py"
+# pending pulls older than this are assumed lost and requested again
+PREWARM_TIMEOUT = timedelta(minutes=30)
+
+
+def images_in_use(db: Session, project_id: UUID | None = None) -> list[str]:
+    """Returns the images of all blocks, or of the blocks of a project."""
+    query = select(Block.docker_image).distinct().order_by(Block.docker_image)
+    if project_id is not None:
+        query = query.where(Block.project_uuid == project_id)
+    return list(db.execute(query).scalars())
+
+
+def list_images(db: Session) -> list[DockerImageDTO]:
+    """Returns the pull state of every image in use by a compute block."""
+    in_use = select(Block.docker_image.label("image")).distinct().subquery()
+    rows = db.execute(
+        select(in_use.c.image, DockerImage)
+        .outerjoin(DockerImage, DockerImage.image == in_use.c.image)
+        .order_by(in_use.c.image)
+    ).all()
+
+    return [
+        DockerImageDTO(image=image, status="unknown")
+        if state is None
+        else DockerImageDTO(
+            image=image,
+            status=state.status,
+            requested_at=state.requested_at,
+            pulled_at=state.pulled_at,
+            pull_seconds=state.pull_seconds,
+            error=state.error,
+        )
+        for image, state in rows
+    ]
+
+
+def _trigger_prewarm(images: list[str]) -> str:
+    workflow_controller.ensure_static_dag(PREWARM_DAG_FILE)
+    if not workflow_controller.wait_for_dag_registration(PREWARM_DAG_ID):
+        raise HTTPException(
+            status_code=503,
+            detail="The image prewarm DAG is not registered in airflow yet.",
+        )
+
+    return workflow_controller.trigger_workflow_run(
+        PREWARM_DAG_ID,
+        {
+            "images": images,
+            "pull_events_url": (
+                f"{ENV.AIRFLOW_CALLBACK_URL}/compute_block/images/pull_events"
+            ),
+            "pull_events_token": image_callback_token(),
+        },
+    )
+
+
+def prewarm_images(
+    images: list[str] | None = None,
+    force: bool = False,
+    db: Session | None = None,
+) -> tuple[str | None, list[str]]:
+    """
+    Pulls the given images, or all images in use, on the airflow workers.
+    Images pulled before or being pulled right now are skipped, unless
+    force is set. Returns the id of the prewarm run and the images it
+    pulls.
+    """
+    db = db or next(get_database())
+
+    in_use = set(images_in_use(db))
+    wanted = in_use if images is None else set(images)
+    unknown = wanted - in_use
+    if unknown:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Images {sorted(unknown)} are not used by any block.",
+        )
+
+    now = datetime.now(timezone.utc)
+    if not force and wanted:
+        wanted -= set(
+            db.execute(
+                select(DockerImage.image).where(
+                    DockerImage.image.in_(wanted),
+                    or_(
+                        DockerImage.status == "pulled",
+                        and_(
+                            DockerImage.status.in_(("pending", "pulling")),
+                            DockerImage.requested_at > now - PREWARM_TIMEOUT,
+                        ),
+                    ),
+                )
+            ).scalars()
+        )
+
+    if not wanted:
+        return None, []
+
+    wanted = sorted(wanted)
+    dag_run_id = _trigger_prewarm(wanted)
+
+    query = insert(DockerImage).values(
+        [
+            {
+                "image": image,
+                "status": "pending",
+                "dag_run_id": dag_run_id,
+                "requested_at": now,
+                "error": None,
+                "updated_at": now,
+            }
+            for image in wanted
+        ]
+    )
+    db.execute(
+        query.on_conflict_do_update(
+            index_elements=["image"],
+            set_={
+                "status": query.excluded.status,
+                "dag_run_id": query.excluded.dag_run_id,
+                "requested_at": query.excluded.requested_at,
+                "error": query.excluded.error,
+                "updated_at": query.excluded.updated_at,
+            },
+        )
+    )
+    db.commit()
+
+    logging.info(f"Prewarming images {wanted} in run {dag_run_id}")
+    return dag_run_id, wanted
+
+
+def prewarm_in_background(images: list[str] | None = None) -> None:
+    """
+    Prewarms images after a response was sent, e.g. for newly created
+    blocks. Failures are only logged, the images are pulled by the first
+    run of their blocks then.
+    """
+    if not ENV.IMAGE_PREWARM:
+        return
+
+    try:
+        prewarm_images(images)
+    except Exception as e:
+        logging.warning(f"Could not prewarm images {images}: {e}")
+
+
+def record_pull_event(db: Session, event: ImagePullEventDTO) -> None:
+    """Stores a pull reported by the prewarm DAG."""
+    pulled = event.status == "pulled"
+    query = insert(DockerImage).values(
+        image=event.image,
+        status=event.status,
+        requested_at=event.timestamp,
+        pulled_at=event.timestamp if pulled else None,
+        pull_seconds=event.duration_seconds,
+        error=event.error,
+        updated_at=event.timestamp,
+    )
+    db.execute(
+        query.on_conflict_do_update(
+            index_elements=["image"],
+            set_={
+                "status": query.excluded.status,
+                # a failed pull keeps the image of the last successful one
+                "pulled_at": func.coalesce(
+                    query.excluded.pulled_at, DockerImage.pulled_at
+                ),
+                "pull_seconds": func.coalesce(
+                    query.excluded.pull_seconds, DockerImage.pull_seconds
+                ),
+                "error": query.excluded.error,
+                "updated_at": query.excluded.updated_at,
+            },
+            where=DockerImage.updated_at <= query.excluded.updated_at,
+        )
+    )
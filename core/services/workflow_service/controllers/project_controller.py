@@ -1,4 +1,6 @@
+from utils.database.connection import AsyncSessionLocal
 from utils.database.session_injector import get_database
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 import logging
 from datetime import datetime, timezone
@@ -8,6 +10,7 @@ from fastapi import HTTPException
 from services.workflow_service.models.project import Project
 from services.workflow_service.controllers import (
     compute_block_controller,
+    graph_controller,
     template_controller,
 )
 from services.workflow_service.schemas.workflow import WorkflowTemplate
@@ -79,9 +82,10 @@ def create_project_from_template(
         raise e
 
 
-def read_project(project_uuid: UUID) -> Project:
+def read_project(project_uuid: UUID, db: Session | None = None) -> Project:
     logging.debug(f"Reading project with UUID: {project_uuid}")
-    db: Session = next(get_database())
+    if db is None:
+        db = next(get_database())
 
     project = db.query(Project).filter_by(uuid=project_uuid).one_or_none()
 
@@ -92,6 +96,33 @@ def read_project(project_uuid: UUID) -> Project:
     return project
 
 
+def get_project_version(project_uuid: UUID) -> int:
+    db: Session = next(get_database())
+
+    version = db.execute(
+        select(Project.version).where(Project.uuid == project_uuid)
+    ).scalar_one_or_none()
+
+    if version is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    return version
+
+
+async def get_project_version_async(project_uuid: UUID) -> int:
+    async with AsyncSessionLocal() as db:
+        version = (
+            await db.execute(
+                select(Project.version).where(Project.uuid == project_uuid)
+            )
+        ).scalar_one_or_none()
+
+    if version is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    return version
+
+
 def rename_project(project_uuid: UUID, new_name: str, db: Session) -> Project:
     logging.debug(f"Renaming project {project_uuid} to {new_name}.")
 
@@ -107,6 +138,29 @@ def rename_project(project_uuid: UUID, new_name: str, db: Session) -> Project:
     return project
 
 
+def update_project_settings(
+    project_uuid: UUID,
+    default_retries: int,
+    max_active_tasks: int | None,
+    db: Session,
+) -> Project:
+    logging.debug(f"Updating settings of project {project_uuid}.")
+
+    project = db.query(Project).filter_by(uuid=project_uuid).one_or_none()
+
+    if not project:
+        logging.error(f"Project {project_uuid} not found.")
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    project.default_retries = default_retries
+    project.max_active_tasks = max_active_tasks
+    # the settings end up in the DAG, which has to be regenerated
+    compute_block_controller.bump_project_versions(db, [project_uuid])
+
+    logging.info(f"Settings of project {project_uuid} updated successfully")
+    return project
+
+
 def add_user(project_uuid: UUID, user_uuid: UUID) -> None:
     logging.debug(f"Adding user {user_uuid} to project {project_uuid}.")
     db: Session = next(get_database())
@@ -169,6 +223,7 @@ def delete_project(project_uuid: UUID) -> None:
 
     db.delete(project)
     db.commit()
+    graph_controller.drop_project_graph(project_uuid)
 
     logging.info(f"Project {project_uuid} deleted successfully")
 
@@ -199,3 +254,24 @@ def read_projects_by_user_uuid(user_uuid: UUID) -> list[Project]:
     logging.info(f"Retrieved {len(projects)} projects for user {user_uuid}")
 
     return projects
+
+
+async def read_projects_by_user_uuid_async(user_uuid: UUID) -> list[Project]:
+    logging.debug(f"Fetching projects for user UUID: {user_uuid}")
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Project).where(Project.users.contains([user_uuid]))
+        )
+        projects = result.scalars().all()
+
+    if not projects:
+        logging.error(f"No projects found for user {user_uuid}")
+        raise HTTPException(
+            status_code=404,
+            detail="No projects found for user",
+        )
+
+    logging.info(f"Retrieved {len(projects)} projects for user {user_uuid}")
+
+    return projects
@@ -0,0 +1,939 @@
+"""
+Keeps the state of DAG runs in the database. The generated DAGs report
+every state change of the run and its tasks through callbacks, the states
+are stored here and pushed to the websocket subscribers of the project.
+Airflow is not polled for states anymore, a background sync reconciles
+the history with airflow in a long interval instead.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from typing import NamedTuple
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from services.workflow_service.controllers import (
+    graph_controller,
+    workflow_controller,
+)
+from services.workflow_service.models.block import Block
+from services.workflow_service.models.project import Project
+from services.workflow_service.models.run import BlockRun, WorkflowRun
+from services.workflow_service.schemas.workflow import (
+    BlockProfileDTO,
+    RunEventDTO,
+    WorkflowRunProfile,
+)
+from utils.config.environment import ENV
+from utils.database import notifications
+from utils.database.locks import advisory_xact_lock
+from utils.database.session_injector import get_database
+from utils.http import outbound
+from utils.http.pagination import decode_cursor, encode_cursor
+from utils.metrics.registry import Gauge
+
+# airflow states after which a run or task does not change anymore
+FINISHED_STATES = (
+    "success", "failed", "skipped", "upstream_failed", "removed",
+)
+
+# airflow states of runs that did not finish yet
+ACTIVE_STATES = ("queued", "running")
+
+# states of runs core did not hand to airflow yet: deferred until the
+# unfinished runs of the project finished, or being started by core
+PENDING_STATES = ("deferred", "starting")
+# runs starting for longer are assumed lost with their worker
+STARTING_TIMEOUT = timedelta(minutes=5)
+
+# margin for the clocks of core and airflow when syncing
+SYNC_CLOCK_SKEW = timedelta(minutes=5)
+
+# postgres channel relaying published run states to the other workers
+RUN_STATES_CHANNEL = "scystream_run_states"
+
+_subscribers: dict[UUID | None, set[tuple[asyncio.AbstractEventLoop,
+                                          asyncio.Queue]]] = {}
+_subscribers_lock = threading.Lock()
+
+
+def _count_subscribers() -> dict[tuple, int]:
+    with _subscribers_lock:
+        return {
+            ("all",): len(_subscribers.get(None, ())),
+            ("project",): sum(
+                len(queues) for project_id, queues in _subscribers.items()
+                if project_id is not None
+            ),
+        }
+
+
+Gauge(
+    "scystream_websocket_subscribers",
+    "Status websockets subscribed to the run states of all projects, or "
+    "of a single project",
+    labels=("scope",),
+    fn=_count_subscribers,
+)
+
+
+class RunSnapshot(NamedTuple):
+    project_id: UUID
+    dag_run_id: str | None
+    state: str | None
+    # block uuid -> airflow task state
+    blocks: dict[UUID, str]
+
+    @property
+    def fingerprint(self) -> str:
+        """Short digest of the states, changes with every state change."""
+        states = sorted((str(b), s) for b, s in self.blocks.items())
+        return hashlib.sha1(
+            repr((self.dag_run_id, self.state, states)).encode()
+        ).hexdigest()[:12]
+
+
+def _block_id_of_task(task_id: str) -> UUID:
+    return UUID(task_id.removeprefix("task_").replace("_", "-"))
+
+
+def _upsert_block_runs(db: Session, rows: list[dict]) -> None:
+    """
+    Inserts or updates block runs. All rows have to set the same columns,
+    only those are updated on conflict.
+    """
+    query = insert(BlockRun).values(rows)
+    db.execute(
+        query.on_conflict_do_update(
+            index_elements=["project_uuid", "dag_run_id", "block_uuid"],
+            set_={
+                column: query.excluded[column]
+                for column in rows[0]
+                if column not in ("project_uuid", "dag_run_id", "block_uuid")
+            },
+            # callbacks run on different airflow components and may arrive
+            # out of order, never replace a newer state by an older one
+            where=BlockRun.updated_at <= query.excluded.updated_at,
+        )
+    )
+
+
+def record_triggered_run(
+    db: Session,
+    project_id: UUID,
+    dag_run_id: str,
+    timestamp: datetime,
+    cache_keys: dict[UUID, str | None] | None = None,
+    cached: set[UUID] = frozenset(),
+) -> None:
+    """
+    Records a run airflow accepted as queued, with all blocks scheduled, so
+    subscribers see the run before the first callback arrives.
+    Blocks whose results are reused from the cache are finished right away.
+    """
+    db.execute(
+        update(WorkflowRun)
+        .where(
+            WorkflowRun.project_uuid == project_id,
+            WorkflowRun.dag_run_id == dag_run_id,
+            WorkflowRun.state == "starting",
+        )
+        .values(state="queued", updated_at=timestamp)
+    )
+
+    block_ids = db.execute(
+        select(Block.uuid).where(Block.project_uuid == project_id)
+    ).scalars().all()
+    if block_ids:
+        cache_keys = cache_keys or {}
+        _upsert_block_runs(db, [
+            {
+                "project_uuid": project_id,
+                "dag_run_id": dag_run_id,
+                "block_uuid": block_id,
+                "state": "success" if block_id in cached else "scheduled",
+                "queued_at": timestamp,
+                "ended_at": timestamp if block_id in cached else None,
+                "cache_key": cache_keys.get(block_id),
+                "cached": block_id in cached,
+                "updated_at": timestamp,
+            }
+            for block_id in block_ids
+        ])
+
+
+class TriggeredRun(NamedTuple):
+    dag_run_id: str
+    # an earlier or concurrent request triggered the run already
+    coalesced: bool
+    # active runs failed by the cancel_previous policy
+    cancelled: list[str]
+    # the run starts once the active run of the project finished
+    deferred: bool = False
+
+
+def _fail_runs(
+    db: Session, project_id: UUID, dag_run_ids: list[str], timestamp: datetime
+) -> None:
+    if not dag_run_ids:
+        return
+    db.execute(
+        update(WorkflowRun)
+        .where(
+            WorkflowRun.project_uuid == project_id,
+            WorkflowRun.dag_run_id.in_(dag_run_ids),
+            WorkflowRun.state.not_in(FINISHED_STATES),
+        )
+        .values(state="failed", ended_at=timestamp, updated_at=timestamp)
+    )
+
+
+def _unfinished_runs(
+    db: Session, project_id: UUID, now: datetime
+) -> list[WorkflowRun]:
+    """
+    Returns the unfinished runs of the project, latest first. Runs stuck in
+    starting, e.g. because their worker died, are failed.
+    """
+    runs = db.execute(
+        select(WorkflowRun)
+        .where(
+            WorkflowRun.project_uuid == project_id,
+            WorkflowRun.state.in_(PENDING_STATES + ACTIVE_STATES),
+        )
+        .order_by(WorkflowRun.started_at.desc())
+    ).scalars().all()
+
+    stuck = [
+        r for r in runs
+        if r.state == "starting" and r.updated_at < now - STARTING_TIMEOUT
+    ]
+    _fail_runs(db, project_id, [r.dag_run_id for r in stuck], now)
+    return [r for r in runs if r not in stuck]
+
+
+def trigger_run(
+    db: Session,
+    project_id: UUID,
+    triggered_by: UUID | None = None,
+    use_cache: bool = True,
+    run_from: list[UUID] | None = None,
+    idempotency_key: str | None = None,
+    policy: str | None = None,
+) -> TriggeredRun:
+    """
+    Records a run of the project and starts it, or defers it until the
+    active run finished. Triggers of a project are serialized by a lock
+    held only while the run is recorded, so concurrent requests coalesce: a
+    request with the idempotency key of an earlier one, or without key
+    right after another trigger, gets the run of that one.
+    Otherwise an unfinished run is handled by the policy. reject fails with
+    409, queue defers the run until the unfinished ones finished, and
+    cancel_previous fails the active runs, once the DAG of the new run was
+    generated. A run still being started by another request is never
+    cancelled, the run waits for it instead.
+    The DAG is generated and the run triggered in airflow after the run was
+    recorded, outside of any transaction.
+    """
+    policy = policy or ENV.TRIGGER_ACTIVE_RUN_POLICY
+    requested_at = datetime.now(UTC)
+
+    with db.begin():
+        advisory_xact_lock(db, f"trigger:{project_id}")
+
+        if idempotency_key is not None:
+            dag_run_id = db.execute(
+                select(WorkflowRun.dag_run_id).where(
+                    WorkflowRun.project_uuid == project_id,
+                    WorkflowRun.idempotency_key == idempotency_key,
+                )
+            ).scalar_one_or_none()
+            if dag_run_id is not None:
+                return TriggeredRun(dag_run_id, True, [])
+
+        unfinished = _unfinished_runs(db, project_id, requested_at)
+        coalesce_after = requested_at - timedelta(
+            seconds=ENV.TRIGGER_COALESCE_SECONDS
+        )
+        if (
+            idempotency_key is None
+            and unfinished
+            and unfinished[0].started_at >= coalesce_after
+        ):
+            return TriggeredRun(unfinished[0].dag_run_id, True, [])
+
+        if unfinished and policy == "reject":
+            raise HTTPException(
+                status_code=409,
+                detail=f"Run {unfinished[0].dag_run_id} of the project is "
+                "still active.",
+            )
+
+        cancel = []
+        if policy == "cancel_previous":
+            # deferred runs never reached airflow
+            _fail_runs(
+                db,
+                project_id,
+                [r.dag_run_id for r in unfinished if r.state == "deferred"],
+                requested_at,
+            )
+            cancel = [
+                r.dag_run_id for r in unfinished if r.state in ACTIVE_STATES
+            ]
+            unfinished = [r for r in unfinished if r.state == "starting"]
+
+        dag_run_id = (
+            f"manual__{requested_at.isoformat()}__{uuid4().hex[:8]}"
+        )
+        deferred = bool(unfinished)
+        db.execute(
+            insert(WorkflowRun).values(
+                project_uuid=project_id,
+                dag_run_id=dag_run_id,
+                state="deferred" if deferred else "starting",
+                started_at=requested_at,
+                triggered_by=triggered_by,
+                idempotency_key=idempotency_key,
+                use_cache=use_cache,
+                run_from=run_from or None,
+                updated_at=requested_at,
+            )
+        )
+
+    if deferred:
+        return TriggeredRun(dag_run_id, False, [], deferred=True)
+
+    cancelled = _start_run(
+        db, project_id, dag_run_id, use_cache, run_from, cancel
+    )
+    return TriggeredRun(dag_run_id, False, cancelled)
+
+
+def _start_run(
+    db: Session,
+    project_id: UUID,
+    dag_run_id: str,
+    use_cache: bool,
+    run_from: list[UUID] | None,
+    cancel: list[str] = (),
+) -> list[str]:
+    """
+    Generates the DAG of a run in starting, fails the runs to cancel and
+    triggers the run in airflow. A run that could not be started is failed.
+    Returns the cancelled runs.
+    """
+    dag_id = workflow_controller._project_id_to_dag_id(project_id)
+    try:
+        translation = workflow_controller.translate_project_to_dag(
+            project_id,
+            use_cache=use_cache,
+            run_from=run_from,
+            db=db,
+        )
+        # nothing is held while airflow is called
+        db.rollback()
+
+        # Make sure airflow has enough time to create the dag internally
+        if not workflow_controller.wait_for_dag_registration(dag_id):
+            logging.error(f"DAG {dag_id} was not registered in time.")
+            raise HTTPException(
+                status_code=500,
+                detail="DAG was not registered in time.",
+            )
+
+        for previous in cancel:
+            workflow_controller.cancel_dag_run(dag_id, previous)
+        if cancel:
+            with db.begin():
+                _fail_runs(db, project_id, cancel, datetime.now(UTC))
+
+        workflow_controller.trigger_workflow_run(dag_id, dag_run_id=dag_run_id)
+    except Exception:
+        db.rollback()
+        with db.begin():
+            _fail_runs(db, project_id, [dag_run_id], datetime.now(UTC))
+        raise
+
+    with db.begin():
+        record_triggered_run(
+            db,
+            project_id,
+            dag_run_id,
+            datetime.now(UTC),
+            cache_keys=translation.cache_keys,
+            cached=translation.cached,
+        )
+    return list(cancel)
+
+
+def advance_runs(project_id: UUID) -> None:
+    """
+    Called once a run of the project finished. Starts the oldest deferred
+    run if no other run is unfinished. Otherwise, if the latest run was a
+    partial one, regenerates the DAG of all blocks: its DAG does not execute
+    the blocks it skipped, and runs triggered in airflow directly must not
+    use it. Failures are only logged.
+    """
+    db = next(get_database())
+    try:
+        now = datetime.now(UTC)
+        with db.begin():
+            advisory_xact_lock(db, f"trigger:{project_id}")
+            unfinished = _unfinished_runs(db, project_id, now)
+            if any(r.state != "deferred" for r in unfinished):
+                return
+
+            if unfinished:
+                run = unfinished[-1]
+                run.state = "starting"
+                run.updated_at = now
+                started = (run.dag_run_id, run.use_cache, run.run_from)
+            else:
+                started = None
+                latest = db.execute(
+                    select(WorkflowRun.run_from)
+                    .where(WorkflowRun.project_uuid == project_id)
+                    .order_by(WorkflowRun.started_at.desc())
+                    .limit(1)
+                ).first()
+                if latest is not None and latest.run_from is not None:
+                    workflow_controller.translate_project_to_dag(
+                        project_id, use_cache=False, db=db
+                    )
+
+        if started is not None:
+            logging.info(f"Starting deferred run {started[0]}")
+            _start_run(db, project_id, *started)
+            publish(get_run_snapshot(project_id, db))
+    except Exception as e:
+        logging.warning(f"Could not advance the runs of {project_id}: {e}")
+    finally:
+        db.close()
+
+
+def record_run_event(
+    db: Session,
+    project_id: UUID,
+    event: RunEventDTO,
+) -> bool:
+    """
+    Stores a state change reported by a DAG callback. Events without a
+    task_id describe the DAG run, all others a task of the run.
+    Returns False if the event was dropped, because it references a block
+    that is not part of the project (anymore).
+    """
+    block_id = None
+    if event.task_id is not None:
+        try:
+            block_id = _block_id_of_task(event.task_id)
+        except ValueError:
+            logging.warning(f"Dropping event of unknown task {event.task_id}")
+            return False
+
+        exists = db.execute(
+            select(Block.uuid).where(
+                Block.uuid == block_id,
+                Block.project_uuid == project_id,
+            )
+        ).scalar_one_or_none()
+        if exists is None:
+            logging.debug(
+                f"Dropping event of block {block_id}, not in project "
+                f"{project_id}"
+            )
+            return False
+
+    finished = event.state in FINISHED_STATES
+    query = insert(WorkflowRun).values(
+        project_uuid=project_id,
+        dag_run_id=event.dag_run_id,
+        state=event.state if block_id is None else "running",
+        started_at=event.timestamp,
+        ended_at=event.timestamp if block_id is None and finished else None,
+        updated_at=event.timestamp,
+    )
+
+    if block_id is None:
+        query = query.on_conflict_do_update(
+            index_elements=["project_uuid", "dag_run_id"],
+            set_={
+                "state": query.excluded.state,
+                "ended_at": query.excluded.ended_at,
+                "updated_at": query.excluded.updated_at,
+            },
+            where=WorkflowRun.updated_at <= query.excluded.updated_at,
+        )
+    else:
+        # a task event only moves a queued run to running
+        query = query.on_conflict_do_update(
+            index_elements=["project_uuid", "dag_run_id"],
+            set_={"state": "running"},
+            where=WorkflowRun.state == "queued",
+        )
+    db.execute(query)
+
+    if block_id is not None:
+        row = {
+            "project_uuid": project_id,
+            "dag_run_id": event.dag_run_id,
+            "block_uuid": block_id,
+            "state": event.state,
+            "updated_at": event.timestamp,
+        }
+        if event.state == "running":
+            row["started_at"] = event.timestamp
+        elif finished:
+            row["ended_at"] = event.timestamp
+        _upsert_block_runs(db, [row])
+
+    return True
+
+
+def _sync_watermark(db: Session) -> datetime | None:
+    """
+    Runs queued after the watermark are fetched from airflow: the start of
+    the oldest unfinished run, or of the latest run if all are finished.
+    """
+    # pending runs are not known to airflow
+    unfinished = db.execute(
+        select(func.min(WorkflowRun.started_at)).where(
+            WorkflowRun.state.not_in(FINISHED_STATES + PENDING_STATES)
+        )
+    ).scalar_one()
+    if unfinished is not None:
+        return unfinished - SYNC_CLOCK_SKEW
+
+    latest = db.execute(select(func.max(WorkflowRun.started_at))).scalar_one()
+    return latest - SYNC_CLOCK_SKEW if latest is not None else None
+
+
+def sync_runs(db: Session) -> set[UUID]:
+    """
+    Reconciles the run history with airflow. Picks up runs triggered outside
+    of core, states of lost callbacks and the exact timings of the tasks.
+    Returns the ids of the projects whose runs changed.
+    """
+    dag_ids = {
+        workflow_controller._project_id_to_dag_id(project_id): project_id
+        for project_id in db.execute(select(Project.uuid)).scalars()
+    }
+    if not dag_ids:
+        return set()
+
+    dag_runs = workflow_controller.get_dag_runs(
+        list(dag_ids),
+        run_after_gte=_sync_watermark(db),
+    )
+    if not dag_runs:
+        return set()
+
+    known = {
+        (project_id, dag_run_id): (state, ended_at)
+        for project_id, dag_run_id, state, ended_at in db.execute(
+            select(
+                WorkflowRun.project_uuid,
+                WorkflowRun.dag_run_id,
+                WorkflowRun.state,
+                WorkflowRun.ended_at,
+            ).where(
+                tuple_(WorkflowRun.project_uuid, WorkflowRun.dag_run_id).in_(
+                    [(dag_ids[r.dag_id], r.dag_run_id) for r in dag_runs]
+                )
+            )
+        )
+    }
+
+    now = datetime.now(UTC)
+    changed = [
+        r for r in dag_runs
+        if known.get((dag_ids[r.dag_id], r.dag_run_id))
+        != (r.state.value, r.end_date)
+        or r.state.value not in FINISHED_STATES
+    ]
+    if not changed:
+        return set()
+
+    query = insert(WorkflowRun).values([
+        {
+            "project_uuid": dag_ids[r.dag_id],
+            "dag_run_id": r.dag_run_id,
+            "state": r.state.value,
+            "started_at": r.start_date or r.run_after,
+            "ended_at": r.end_date,
+            "updated_at": now,
+        }
+        for r in changed
+    ])
+    db.execute(
+        query.on_conflict_do_update(
+            index_elements=["project_uuid", "dag_run_id"],
+            set_={
+                "state": query.excluded.state,
+                "started_at": query.excluded.started_at,
+                "ended_at": query.excluded.ended_at,
+                "updated_at": query.excluded.updated_at,
+            },
+        )
+    )
+
+    blocks = set(
+        db.execute(
+            select(Block.uuid).where(
+                Block.project_uuid.in_({dag_ids[r.dag_id] for r in changed})
+            )
+        ).scalars()
+    )
+    rows = []
+    for ti in workflow_controller.get_task_instances(
+        list({r.dag_id for r in changed}),
+        [r.dag_run_id for r in changed],
+    ):
+        if ti.state is None:
+            continue
+        try:
+            block_id = _block_id_of_task(ti.task_id)
+        except ValueError:
+            continue
+        if block_id not in blocks:
+            continue
+
+        rows.append({
+            "project_uuid": dag_ids[ti.dag_id],
+            "dag_run_id": ti.dag_run_id,
+            "block_uuid": block_id,
+            "state": ti.state.value,
+            "queued_at": ti.queued_when,
+            "started_at": ti.start_date,
+            "ended_at": ti.end_date,
+            "updated_at": now,
+        })
+    if rows:
+        _upsert_block_runs(db, rows)
+
+    return {dag_ids[r.dag_id] for r in changed}
+
+
+def sync_and_publish() -> None:
+    db = next(get_database())
+    try:
+        with db.begin():
+            changed = sync_runs(db)
+            # deferred runs whose start failed, or whose finish hook was lost
+            deferred = set(
+                db.execute(
+                    select(WorkflowRun.project_uuid).where(
+                        WorkflowRun.state == "deferred"
+                    )
+                ).scalars()
+            )
+
+        for project_id in changed:
+            publish(get_run_snapshot(project_id, db))
+    finally:
+        db.close()
+
+    for project_id in changed | deferred:
+        advance_runs(project_id)
+
+
+async def run_sync_loop() -> None:
+    """Background task syncing the run history every interval."""
+    while True:
+        await asyncio.sleep(ENV.RUN_SYNC_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(sync_and_publish)
+        except outbound.ServiceUnavailable:
+            # the last known states stay in place until airflow is back
+            logging.info("Skipping run sync, airflow is unavailable")
+        except Exception as e:
+            logging.exception(f"Error syncing runs from airflow: {e}")
+
+
+def get_run_snapshot(
+    project_id: UUID, db: Session | None = None
+) -> RunSnapshot:
+    """Returns the states of the latest run of the project."""
+    if db is None:
+        db = next(get_database())
+
+    run = db.execute(
+        select(WorkflowRun.dag_run_id, WorkflowRun.state)
+        .where(WorkflowRun.project_uuid == project_id)
+        .order_by(WorkflowRun.started_at.desc())
+        .limit(1)
+    ).first()
+
+    if run is None:
+        return RunSnapshot(project_id, None, None, {})
+
+    blocks = db.execute(
+        select(BlockRun.block_uuid, BlockRun.state).where(
+            BlockRun.project_uuid == project_id,
+            BlockRun.dag_run_id == run.dag_run_id,
+        )
+    ).all()
+
+    return RunSnapshot(project_id, run.dag_run_id, run.state, dict(blocks))
+
+
+def get_latest_run_states(db: Session | None = None) -> dict[UUID, str]:
+    """Returns the state of the latest run of every project."""
+    if db is None:
+        db = next(get_database())
+
+    runs = db.execute(
+        select(WorkflowRun.project_uuid, WorkflowRun.state)
+        .distinct(WorkflowRun.project_uuid)
+        .order_by(WorkflowRun.project_uuid, WorkflowRun.started_at.desc())
+    ).all()
+
+    return dict(runs)
+
+
+def _run_cursor(run) -> str:
+    return encode_cursor(run.started_at.isoformat(), run.dag_run_id)
+
+
+def list_runs(
+    project_id: UUID,
+    limit: int,
+    cursor: str | None = None,
+    db: Session | None = None,
+) -> tuple[list[WorkflowRun], dict[str, list[BlockRun]], str | None]:
+    """
+    Returns a page of the run history of the project, newest first, the
+    block runs by dag run id and the cursor of the next page. Uses keyset
+    pagination, so deep pages are as cheap as the first one.
+    """
+    if db is None:
+        db = next(get_database())
+
+    query = (
+        select(WorkflowRun)
+        .where(WorkflowRun.project_uuid == project_id)
+        .order_by(
+            WorkflowRun.started_at.desc(),
+            WorkflowRun.dag_run_id.desc(),
+        )
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        try:
+            started_at, dag_run_id = decode_cursor(cursor)
+            started_at = datetime.fromisoformat(started_at)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=422, detail="Invalid cursor")
+
+        query = query.where(
+            tuple_(WorkflowRun.started_at, WorkflowRun.dag_run_id)
+            < (started_at, dag_run_id)
+        )
+
+    runs = db.execute(query).scalars().all()
+    next_cursor = None
+    if len(runs) > limit:
+        runs = runs[:limit]
+        next_cursor = _run_cursor(runs[-1])
+
+    blocks = defaultdict(list)
+    if runs:
+        for block_run in db.execute(
+            select(BlockRun)
+            .where(
+                BlockRun.project_uuid == project_id,
+                BlockRun.dag_run_id.in_([r.dag_run_id for r in runs]),
+            )
+            .order_by(BlockRun.started_at.asc().nulls_last())
+        ).scalars():
+            blocks[block_run.dag_run_id].append(block_run)
+
+    return runs, blocks, next_cursor
+
+
+def _seconds(start: datetime | None, end: datetime | None) -> float | None:
+    if start is None or end is None:
+        return None
+    return max((end - start).total_seconds(), 0.0)
+
+
+def profile_run(
+    db: Session, project_id: UUID, dag_run_id: str
+) -> WorkflowRunProfile:
+    """
+    Splits the time of a run into queue wait and execution per block and
+    finds the critical path through the blocks of the run, weighted by their
+    execution times. Blocks added since are not part of it, but the edges
+    between the blocks of the run are the current ones.
+    """
+    run = db.execute(
+        select(WorkflowRun).where(
+            WorkflowRun.project_uuid == project_id,
+            WorkflowRun.dag_run_id == dag_run_id,
+        )
+    ).scalar_one_or_none()
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    block_runs = db.execute(
+        select(BlockRun).where(
+            BlockRun.project_uuid == project_id,
+            BlockRun.dag_run_id == dag_run_id,
+        )
+    ).scalars().all()
+
+    execution = {}
+    blocks = []
+    for br in block_runs:
+        profile = BlockProfileDTO(
+            block_uuid=br.block_uuid,
+            state=br.state,
+            queue_wait_seconds=_seconds(br.queued_at, br.started_at),
+            execution_seconds=_seconds(br.started_at, br.ended_at),
+        )
+        if profile.execution_seconds is not None:
+            execution[br.block_uuid] = profile.execution_seconds
+        blocks.append(profile)
+
+    graph = graph_controller.get_blocks_graph(
+        db, [br.block_uuid for br in block_runs]
+    )
+    path, path_seconds = graph.critical_path(execution)
+    on_path = set(path)
+    for profile in blocks:
+        profile.on_critical_path = profile.block_uuid in on_path
+
+    wall_time = _seconds(run.started_at, run.ended_at)
+    total_execution = sum(execution.values())
+
+    return WorkflowRunProfile(
+        dag_run_id=run.dag_run_id,
+        state=run.state,
+        wall_time_seconds=wall_time,
+        total_execution_seconds=total_execution,
+        total_queue_wait_seconds=sum(
+            b.queue_wait_seconds or 0.0 for b in blocks
+        ),
+        critical_path=path,
+        critical_path_seconds=path_seconds,
+        parallelism=(
+            total_execution / wall_time if wall_time else None
+        ),
+        max_speedup=(
+            wall_time / path_seconds if wall_time and path_seconds else None
+        ),
+        blocks=sorted(
+            blocks,
+            key=lambda b: b.execution_seconds or 0.0,
+            reverse=True,
+        ),
+    )
+
+
+@contextmanager
+def subscribe(project_id: UUID | None = None):
+    """
+    Yields a queue receiving a RunSnapshot on every state change of the
+    project, or of all projects if no project_id is given.
+    Has to be used from within the event loop.
+    """
+    subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+
+    with _subscribers_lock:
+        _subscribers.setdefault(project_id, set()).add(subscriber)
+    try:
+        yield subscriber[1]
+    finally:
+        with _subscribers_lock:
+            subscribers = _subscribers.get(project_id)
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del _subscribers[project_id]
+
+
+def _publisher_id() -> str:
+    # the workers are forked after core was imported, they differ by pid
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def publish(snapshot: RunSnapshot) -> None:
+    """
+    Pushes the snapshot to all subscribers of its project, and notifies the
+    other workers, see relay_run_states. Blocks on the database, call it
+    from worker threads.
+    """
+    _deliver(snapshot)
+    try:
+        notifications.notify(
+            RUN_STATES_CHANNEL,
+            f"{_publisher_id()} {snapshot.project_id}",
+        )
+    except SQLAlchemyError as e:
+        # the websockets of the other workers refresh on their own
+        logging.warning(
+            f"Could not relay the run states of {snapshot.project_id}: {e}"
+        )
+
+
+def _deliver(snapshot: RunSnapshot) -> None:
+    """Pushes the snapshot to the subscribers of this worker."""
+    with _subscribers_lock:
+        subscribers = [
+            *_subscribers.get(snapshot.project_id, ()),
+            *_subscribers.get(None, ()),
+        ]
+
+    for loop, queue in subscribers:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, snapshot)
+        except RuntimeError:
+            # the loop of the subscriber was closed
+            pass
+
+
+def _deliver_latest(project_id: UUID) -> None:
+    db = next(get_database())
+    try:
+        _deliver(get_run_snapshot(project_id, db))
+    except Exception as e:
+        logging.warning(f"Could not load the run states of {project_id}: {e}")
+    finally:
+        db.close()
+
+
+def _relayed(payload: str) -> None:
+    publisher, _, project_id = payload.partition(" ")
+    if publisher == _publisher_id():
+        return
+    try:
+        project_id = UUID(project_id)
+    except ValueError:
+        return
+
+    with _subscribers_lock:
+        subscribed = project_id in _subscribers or None in _subscribers
+    if subscribed:
+        # the snapshot may not fit into a notification, it is reloaded
+        asyncio.get_running_loop().run_in_executor(
+            None, _deliver_latest, project_id
+        )
+
+
+async def relay_run_states() -> None:
+    """
+    Background task of every worker, pushing the run states published by
+    the other workers to the subscribers of this one. Runs until cancelled.
+    """
+    await notifications.listen(RUN_STATES_CHANNEL, _relayed)
@@ -1,7 +1,9 @@
+from __future__ import annotations
+
 import os
 from fastapi import HTTPException
+from typing import TYPE_CHECKING
 from uuid import UUID, uuid4
-import networkx as nx
 import logging
 from pydantic import ValidationError
 import yaml
@@ -18,11 +20,6 @@ from services.workflow_service.schemas.workflow import (
     Input as InputTemplate,
     Output as OutputTemplate,
 )
-from scystream.sdk.config.models import (
-    ComputeBlock,
-    Entrypoint as SDKEntrypoint,
-    InputOutputModel,
-)
 from services.workflow_service.models.block import Block
 from services.workflow_service.models.input_output import (
     InputOutput,
@@ -40,6 +37,14 @@ from utils.config.defaults import (
     get_pg_cfg_defaults_dict_with_setup,
 )
 
+if TYPE_CHECKING:
+    import networkx as nx
+    from scystream.sdk.config.models import (
+        ComputeBlock,
+        Entrypoint as SDKEntrypoint,
+        InputOutputModel,
+    )
+
 
 def get_workflow_template_by_identifier(identifier: str) -> WorkflowTemplate:
     """
@@ -117,6 +122,7 @@ def build_workflow_graph(template: WorkflowTemplate):
     Parses the Workflow Template into a Networkx DAG and
     assigns positions for the workbench.
     """
+    import networkx as nx
 
     G = nx.MultiDiGraph()
 
@@ -347,6 +353,8 @@ def configure_and_create_blocks(
         :dict[str, [str, UUID]]: Mapping of block names from
             templates to their inputs database uuids
     """
+    import networkx as nx
+
     block_name_to_model = {}
     block_outputs_by_name = {}
     block_inputs_by_name = {}
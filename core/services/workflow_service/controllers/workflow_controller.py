@@ -1,32 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
+import threading
 import time
 from collections import defaultdict
-from typing import TYPE_CHECKING
-
-import networkx as nx
-import requests
-from airflow_client.client.api.dag_api import DAGApi
-from airflow_client.client.api.dag_run_api import DagRunApi
-from airflow_client.client.api.task_instance_api import TaskInstanceApi
-from airflow_client.client.api_client import ApiClient
-from airflow_client.client.configuration import Configuration
-from airflow_client.client.exceptions import ApiException, NotFoundException
-from airflow_client.client.models.dag_patch_body import DAGPatchBody
-from airflow_client.client.models.dag_runs_batch_body import (
-    DAGRunsBatchBody,
-)
-from airflow_client.client.models.trigger_dag_run_post_body import (
-    TriggerDAGRunPostBody,
-)
+from datetime import datetime
+from typing import TYPE_CHECKING, NamedTuple
+
 from fastapi import HTTPException
-from jinja2 import Environment, FileSystemLoader
-from pydantic import BaseModel
 from services.workflow_service.controllers import (
+    cache_controller,
     compute_block_controller,
+    graph_controller,
     template_controller,
 )
 from services.workflow_service.controllers.project_controller import (
@@ -41,10 +29,7 @@ from services.workflow_service.models.input_output import (
     InputOutput,
     InputOutputType,
 )
-from services.workflow_service.schemas.compute_block import (
-    BlockStatus,
-    ConfigType,
-)
+from services.workflow_service.schemas.compute_block import ConfigType
 from services.workflow_service.schemas.workflow import (
     WorfklowValidationError,
     WorkflowEnvsWithBlockInfo,
@@ -52,53 +37,45 @@ from services.workflow_service.schemas.workflow import (
 )
 from utils.config.environment import ENV
 from utils.data.file_handling import bulk_presigned_urls_from_ios
+from utils.database.connection import AsyncSessionLocal
 from utils.database.session_injector import get_database
+from utils.metrics.registry import CACHE_LOOKUPS, Histogram
+from utils.security.token import project_callback_token
+from utils.tracing import tracer
 
 if TYPE_CHECKING:
     from uuid import UUID
 
+    import networkx as nx
+    from airflow_client.client.models.dag_run_response import DAGRunResponse
+    from airflow_client.client.models.task_instance_response import (
+        TaskInstanceResponse,
+    )
     from sqlalchemy.orm import Session
 
-DAG_DIRECTORY = ENV.AIRFLOW_DAG_DIR
-
-
-class AirflowAccessTokenResponse(BaseModel):
-    access_token: str
-
-
-def get_airflow_client_access_token(
-    host: str,
-    username: str,
-    password: str,
-) -> str:
-    url = f"{host}/auth/token"
-    payload = {
-        "username": username,
-        "password": password,
-    }
-    headers = {"Content-Type": "application/json"}
-    response = requests.post(url, json=payload, headers=headers)
-    if response.status_code != 201:
-        raise RuntimeError(
-            f"Failed to get access token: \
-            {response.status_code} {response.text}",
-        )
-    response_success = AirflowAccessTokenResponse(**response.json())
-    return response_success.access_token
+    from services.workflow_service.models.project import Project
 
+DAG_DIRECTORY = ENV.AIRFLOW_DAG_DIR
+# specs of the DAGs materialized by the DAG factory, in spec mode
+DAG_SPEC_DIRECTORY = os.path.join(DAG_DIRECTORY, "specs")
+DAG_FACTORY_FILE = "scystream_dag_factory.py"
+DAG_GENERATION_SECONDS = Histogram(
+    "scystream_dag_generation_duration_seconds",
+    "Time to render and write the DAG of a project",
+    labels=("mode",),
+)
+TEMPLATES_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "templates",
+)
 
-def get_airflow_config() -> Configuration:
-    airflow_config = Configuration(
-        host=ENV.AIRFLOW_HOST,
-    )
 
-    airflow_config.access_token = get_airflow_client_access_token(
-        host=airflow_config.host,
-        username=ENV.AIRFLOW_USER,
-        password=ENV.AIRFLOW_PASS,
-    )
+def _airflow():
+    """The airflow client and its models, imported on first use."""
+    from services.workflow_service.controllers import airflow_api
 
-    return airflow_config
+    return airflow_api
 
 
 def _project_id_to_dag_id(pi: UUID | str) -> str:
@@ -146,13 +123,19 @@ def _get_unconfigured_envs(block: Block) -> ConfigType | None:
     return _filter_unconfigured(block.selected_entrypoint.envs)
 
 
-def _get_unconfigured_ios(ios: list[InputOutput]) -> list[InputOutput]:
+def _get_unconfigured_ios(
+    ios: list[InputOutput],
+    ready: bool = False,
+) -> list[InputOutput]:
     """Filters the unconfigured config entrys from the passed ios and returns
-    io objects."""
+    io objects. If the block is known to be ready, the configs are not
+    inspected."""
     result = []
 
     for io in ios:
-        unconfigured_fields = _filter_unconfigured(io.config)
+        unconfigured_fields = (
+            None if ready else _filter_unconfigured(io.config)
+        )
         result.append(
             InputOutput(
                 uuid=io.uuid,
@@ -168,7 +151,10 @@ def _get_unconfigured_ios(ios: list[InputOutput]) -> list[InputOutput]:
     return result
 
 
-def get_workflow_configurations(project_id: UUID) -> tuple[
+def get_workflow_configurations(
+    project_id: UUID,
+    db: Session | None = None,
+) -> tuple[
     list[WorkflowEnvsWithBlockInfo],
     list[InputOutput],  # Workflow Inputs
     list[InputOutput],  # Intermediates
@@ -217,6 +203,8 @@ def get_workflow_configurations(project_id: UUID) -> tuple[
     Args:
         project_id (UUID): The project ID for which the workflow configuration
         is retrieved.
+        db (Session | None): Session to run the queries on, a new one is
+        opened if omitted.
 
     Returns:
         Tuple containing:
@@ -226,26 +214,48 @@ def get_workflow_configurations(project_id: UUID) -> tuple[
             - List of InputOutput for workflow outputs
             - Dictionary mapping entrypoint UUIDs to Block instances
     """
-    db: Session = next(get_database())
+    if db is None:
+        db = next(get_database())
+        try:
+            return get_workflow_configurations(project_id, db)
+        finally:
+            db.close()
+
+    return _with_presigned_urls(*_load_workflow_configurations(project_id, db))
 
+
+def _load_workflow_configurations(project_id: UUID, db: Session) -> tuple:
+    """
+    The database part of get_workflow_configurations, returning the loaded
+    IOs in place of their presigned URLs.
+    """
     # 1. Load blocks
-    blocks = compute_block_controller.get_compute_blocks_by_project(project_id)
+    with tracer.span("workflow_configurations.load_blocks") as span:
+        blocks = compute_block_controller.get_compute_blocks_by_project(
+            project_id,
+            db,
+        )
+        if span is not None:
+            span.attributes["blocks"] = len(blocks)
     block_by_entry_id = {b.selected_entrypoint_uuid: b for b in blocks}
     entry_ids = list(block_by_entry_id.keys())
 
     # 2. Load IOs
-    ios = (
-        db.query(InputOutput)
-        .filter(
-            InputOutput.entrypoint_uuid.in_(entry_ids),
+    with tracer.span("workflow_configurations.load_ios") as span:
+        ios = (
+            db.query(InputOutput)
+            .filter(
+                InputOutput.entrypoint_uuid.in_(entry_ids),
+            )
+            .all()
         )
-        .all()
-    )
-    presigned_urls = bulk_presigned_urls_from_ios(ios)
+        if span is not None:
+            span.attributes["ios"] = len(ios)
     io_map = _group_ios_by_block(ios, block_by_entry_id)
 
     # 3. Load dependencies
-    deps = db.execute(block_dependencies.select()).fetchall()
+    with tracer.span("workflow_configurations.load_dependencies"):
+        deps = db.execute(block_dependencies.select()).fetchall()
     has_upstream = {dep.downstream_block_uuid for dep in deps}
     has_downstream = {dep.upstream_block_uuid for dep in deps}
     connected_input_uuids = {dep.downstream_input_uuid for dep in deps}
@@ -257,8 +267,13 @@ def get_workflow_configurations(project_id: UUID) -> tuple[
     intermediates = []
 
     for block in blocks:
+        # Fully configured blocks have nothing to filter
+        ready = block.missing_config_count == 0
+
         # Unconfigured ENV blocks
-        if (block_envs := _get_unconfigured_envs(block)) is not None:
+        if not ready and (
+            block_envs := _get_unconfigured_envs(block)
+        ) is not None:
             unconfigured_envs.append(
                 WorkflowEnvsWithBlockInfo(
                     block_uuid=block.uuid,
@@ -272,7 +287,10 @@ def get_workflow_configurations(project_id: UUID) -> tuple[
         downstream = block.uuid in has_downstream
 
         # Get only unconfigured IOs for this block
-        unconfigured_ios = _get_unconfigured_ios(io_map.get(block.uuid, []))
+        unconfigured_ios = _get_unconfigured_ios(
+            io_map.get(block.uuid, []),
+            ready,
+        )
 
         for io in unconfigured_ios:
             if io.type == InputOutputType.INPUT:
@@ -293,11 +311,39 @@ def get_workflow_configurations(project_id: UUID) -> tuple[
         workflow_inputs,
         intermediates,
         workflow_outputs,
+        ios,
+        block_by_entry_id,
+    )
+
+
+def _with_presigned_urls(
+    envs, inputs, intermediates, outputs, ios, block_by_entry_id
+) -> tuple:
+    # looks up the files in S3, blocking on every request
+    with tracer.span("workflow_configurations.presigned_urls"):
+        presigned_urls = bulk_presigned_urls_from_ios(ios)
+    return (
+        envs,
+        inputs,
+        intermediates,
+        outputs,
         presigned_urls,
         block_by_entry_id,
     )
 
 
+async def get_workflow_configurations_async(project_id: UUID) -> tuple:
+    """Same as get_workflow_configurations, but runs the queries on the
+    asyncpg engine so the event loop is not blocked while waiting on the
+    database. The S3 lookups are blocking, they run in a worker thread.
+    """
+    async with AsyncSessionLocal() as db:
+        configurations = await db.run_sync(
+            lambda session: _load_workflow_configurations(project_id, session),
+        )
+    return await asyncio.to_thread(_with_presigned_urls, *configurations)
+
+
 def get_tagged_workflow_templates() -> dict[str, list[WorkflowTemplate]]:
     templates = template_controller.get_workflow_templates()
 
@@ -312,8 +358,13 @@ def get_tagged_workflow_templates() -> dict[str, list[WorkflowTemplate]]:
     return dict(grouped)
 
 
-def create_graph(project):
-    graph = nx.DiGraph()
+def create_graph(project, db: Session):
+    import networkx as nx
+
+    graph = nx.DiGraph(
+        retries=project.default_retries or 0,
+        max_active_tasks=project.max_active_tasks,
+    )
 
     for block in project.blocks:
         entrypoint = block.selected_entrypoint
@@ -330,6 +381,10 @@ def create_graph(project):
             image=block.docker_image,
             entry_name=block.selected_entrypoint.name,
             environment=merged_configs,
+            cpus=block.cpus,
+            memory_limit=block.memory_limit,
+            pool=block.pool,
+            priority_weight=block.priority_weight,
         )
 
     # Add edges (dependencies)
@@ -337,14 +392,16 @@ def create_graph(project):
         for upstream in block.upstream_blocks:
             graph.add_edge(upstream.uuid, block.uuid)
 
-    # Ensure the graph is a valid DAG
-    if not nx.is_directed_acyclic_graph(graph):
+    # Ensure the graph is a valid DAG, edges are checked for cycles when
+    # they are created, the project graph keeps track of the result
+    project_graph = graph_controller.get_project_graph(db, project.uuid)
+    if not project_graph.acyclic:
         raise HTTPException(
             status_code=400,
             detail="The project is not acyclic.",
         )
 
-    if not nx.is_connected(graph.to_undirected()):
+    if not project_graph.is_connected():
         raise HTTPException(
             status_code=400,
             detail="Not all compute blocks are connected.",
@@ -354,23 +411,43 @@ def create_graph(project):
 
 
 def init_templates():
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    templates_dir = os.path.join(base_dir, "..", "templates")
+    from jinja2 import Environment, FileSystemLoader
 
-    env = Environment(loader=FileSystemLoader(templates_dir))
+    env = Environment(loader=FileSystemLoader(TEMPLATES_DIRECTORY))
     return {
         "dag": env.get_template("dag_base.py.j2"),
         "algorithm": env.get_template("algorithm_docker.py.j2"),
         "dependency": env.get_template("dependency.py.j2"),
+        "cached": env.get_template("cached.py.j2"),
     }
 
 
-def generate_dag_code(graph, templates, dag_id, project_uuid):
-    parts = [templates["dag"].render(dag_id=dag_id)]
+def _run_events_url(project_uuid: UUID) -> str:
+    return f"{ENV.AIRFLOW_CALLBACK_URL}/workflow/{project_uuid}/run_events"
+
+
+def generate_dag_code(graph, templates, dag_id, project_uuid, cached=()):
+    """
+    Blocks in cached are rendered as no-op tasks, their outputs from a
+    previous run are reused.
+    """
+    parts = [
+        templates["dag"].render(
+            dag_id=dag_id,
+            run_events_url=_run_events_url(project_uuid),
+            run_events_token=project_callback_token(project_uuid),
+            retries=graph.graph["retries"],
+            max_active_tasks=graph.graph["max_active_tasks"],
+        ),
+    ]
 
     # Convert to Airflow-compatible representation
     for node, data in graph.nodes(data=True):
         task_id = _cb_id_to_task_id(node)
+        if node in cached:
+            parts.append(templates["cached"].render(task_id=task_id))
+            continue
+
         parts.append(
             templates["algorithm"].render(
                 task_id=task_id,
@@ -382,6 +459,10 @@ def generate_dag_code(graph, templates, dag_id, project_uuid):
                 environment=data["environment"],
                 local_storage_path_external="/tmp/scystream-data",
                 network_mode=ENV.CB_NETWORK_MODE,
+                cpus=data["cpus"],
+                memory_limit=data["memory_limit"],
+                pool=data["pool"],
+                priority_weight=data["priority_weight"],
             ),
         )
 
@@ -409,49 +490,118 @@ def save_dag_to_file(dag_code, dag_id):
     return filename
 
 
-def validate_value(value: str | list | None) -> bool:
-    return value is None or value in ("", [])
+def generate_dag_spec(graph, dag_id, project_uuid, cached=()) -> dict:
+    """
+    Same as generate_dag_code, but returns the DAG as a spec the DAG factory
+    materializes it from.
+    """
+    return {
+        "dag_id": dag_id,
+        "run_events_url": _run_events_url(project_uuid),
+        "run_events_token": project_callback_token(project_uuid),
+        "retries": graph.graph["retries"],
+        "max_active_tasks": graph.graph["max_active_tasks"],
+        "tasks": [
+            {
+                "task_id": _cb_id_to_task_id(node),
+                "cached": node in cached,
+                "image": data["image"],
+                "entry_name": data["entry_name"],
+                "environment": data["environment"],
+                "network_mode": ENV.CB_NETWORK_MODE,
+                "cpus": data["cpus"],
+                "memory_limit": data["memory_limit"],
+                "pool": data["pool"],
+                "priority_weight": data["priority_weight"],
+            }
+            for node, data in graph.nodes(data=True)
+        ],
+        "edges": [
+            [_cb_id_to_task_id(from_task), _cb_id_to_task_id(to_task)]
+            for from_task, to_task in graph.edges
+        ],
+    }
+
+
+def ensure_static_dag(file_name: str) -> None:
+    """
+    Copies a DAG file shipped with core, e.g. the DAG factory, into the DAG
+    directory, if it is outdated.
+    """
+    source = os.path.join(TEMPLATES_DIRECTORY, file_name)
+    target = os.path.join(DAG_DIRECTORY, file_name)
+
+    with open(source) as f:
+        factory = f.read()
+
+    try:
+        with open(target) as f:
+            if f.read() == factory:
+                return
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(DAG_DIRECTORY, exist_ok=True)
+    _write_atomically(target, factory)
+
+
+def _write_atomically(filename: str, content: str) -> None:
+    # airflow parses the directory continuously, it must never see a
+    # partially written file. Workers may write the same file at once, the
+    # last one wins
+    tmp = f"{filename}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(content)
+    os.replace(tmp, filename)
+
+
+def save_dag_spec(spec: dict, dag_id: str) -> str:
+    os.makedirs(DAG_SPEC_DIRECTORY, exist_ok=True)
+    filename = os.path.join(DAG_SPEC_DIRECTORY, f"{dag_id}.json")
+    _write_atomically(filename, json.dumps(spec, separators=(",", ":")))
+    return filename
+
+
+def _remove_dag_files(dag_id: str, python: bool = True, spec: bool = True):
+    filenames = []
+    if python:
+        filenames.append(os.path.join(DAG_DIRECTORY, f"{dag_id}.py"))
+    if spec:
+        filenames.append(os.path.join(DAG_SPEC_DIRECTORY, f"{dag_id}.json"))
+
+    for filename in filenames:
+        try:
+            os.remove(filename)
+        except FileNotFoundError:
+            pass
 
 
 def validate_workflow(project_uuid: UUID) -> None:
     """Checks:
     - Are there compute blocks?
     - Are all envs and configs set?
+
+    Uses the readiness persisted on the blocks, no configs are loaded.
     """
-    blocks_in_project = compute_block_controller.get_compute_blocks_by_project(
-        project_uuid,
+    block_count, missing_configs = (
+        compute_block_controller.get_project_readiness(project_uuid)
     )
 
-    if len(blocks_in_project) == 0:
+    if block_count == 0:
         raise HTTPException(
             status_code=422,
             detail="Project is missing blocks.",
         )
 
-    # Collect all inputs & outputs
-    confs = {}
-    missing_values = {}
-
-    for block in blocks_in_project:
-        block_id = block.uuid
-
-        for ek, ev in block.selected_entrypoint.envs.items():
-            confs[ek] = ev
-            if validate_value(ev):
-                missing_values.setdefault(str(block_id), []).append(ek)
-
-        for io in block.selected_entrypoint.input_outputs:
-            for ck, cv in io.config.items():
-                confs[ck] = cv
-                if validate_value(cv):
-                    missing_values.setdefault(str(block_id), []).append(ck)
-
-    if missing_values:
+    if missing_configs:
         raise HTTPException(
             status_code=422,
             detail=WorfklowValidationError(
                 project_id=str(project_uuid),
-                missing_configs=missing_values,
+                missing_configs={
+                    str(block_id): keys
+                    for block_id, keys in missing_configs.items()
+                },
             ).model_dump(),
         )
 
@@ -461,15 +611,17 @@ def wait_for_dag_registration(
     timeout: int = 10,
     wait: float = 0.5,
 ) -> bool:
-    with ApiClient(get_airflow_config()) as api_client:
-        api = DAGApi(api_client)
+    airflow = _airflow()
+
+    with airflow.client() as api_client:
+        api = airflow.DAGApi(api_client)
         start_time = time.time()
 
         while time.time() - start_time < timeout:
             try:
                 api.get_dag(dag_id)
                 return True
-            except ApiException as e:
+            except airflow.ApiException as e:
                 if e.status == 404:
                     time.sleep(wait)
                 else:
@@ -478,119 +630,278 @@ def wait_for_dag_registration(
     return False
 
 
-def translate_project_to_dag(project_uuid: UUID) -> str:
+def _partial_run(
+    db: Session,
+    project: Project,
+    graph: nx.DiGraph,
+    run_from: list[UUID],
+    cache_keys: dict[UUID, str | None],
+) -> tuple[set[UUID], dict[UUID, str | None]]:
+    """
+    Returns the blocks to skip when running only run_from and the blocks
+    downstream of them, and the cache keys to record for the run.
+    """
+    unknown = [b for b in run_from if b not in graph]
+    if unknown:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Blocks {unknown} are not part of the project.",
+        )
+
+    import networkx as nx
+
+    run = set(run_from).union(*(nx.descendants(graph, b) for b in run_from))
+    skipped = set(graph) - run
+
+    # the blocks feeding the subgraph have to provide their outputs
+    feeding = {u for b in run for u in graph.predecessors(b)} - run
+    missing = feeding - cache_controller.find_blocks_with_results(
+        db, project.blocks, feeding
+    )
+    if missing:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Blocks {sorted(map(str, missing))} have no outputs to "
+            "reuse yet, run them as well.",
+        )
+
+    # skipped blocks only keep their key if their outputs match it,
+    # otherwise later runs would reuse outputs of outdated configs
+    valid = cache_controller.find_cached_blocks(
+        db,
+        project.blocks,
+        {b: cache_keys[b] for b in skipped},
+    )
+    return skipped, {
+        b: key if b not in skipped or b in valid else None
+        for b, key in cache_keys.items()
+    }
+
+
+class DagTranslation(NamedTuple):
+    dag_id: str
+    # cache key of every block, None if the block can not be cached
+    cache_keys: dict[UUID, str | None]
+    # blocks that are not executed, their previous outputs are reused
+    cached: set[UUID]
+
+
+def translate_project_to_dag(
+    project_uuid: UUID,
+    use_cache: bool = True,
+    run_from: list[UUID] | None = None,
+    db: Session | None = None,
+) -> DagTranslation:
     """Parses a project and its blocks into a DAG, validates it, and saves
-    it."""
-    project = read_project(project_uuid)
-    graph = create_graph(project)
-    templates = init_templates()
+    it.
+    With run_from only the given blocks and the blocks downstream of them
+    are executed, all other blocks reuse the outputs of their last run.
+    """
+    if db is None:
+        db = next(get_database())
+        try:
+            return translate_project_to_dag(
+                project_uuid, use_cache, run_from, db
+            )
+        finally:
+            db.close()
+
+    with tracer.span("translate.load_project"):
+        project = read_project(project_uuid, db)
+        graph = create_graph(project, db)
+
+    with tracer.span("translate.block_result_cache"):
+        cache_keys = cache_controller.compute_cache_keys(
+            db, project.blocks, graph
+        )
+        cached = set()
+        if run_from:
+            cached, cache_keys = _partial_run(
+                db, project, graph, run_from, cache_keys
+            )
+        elif use_cache and ENV.BLOCK_RESULT_CACHE:
+            cached = cache_controller.find_cached_blocks(
+                db, project.blocks, cache_keys
+            )
+    logging.info(
+        f"Reusing results of {len(cached)} of {len(cache_keys)} blocks "
+        f"of project {project_uuid}"
+    )
+    if not run_from:
+        CACHE_LOOKUPS.inc(len(cached), cache="block_result", result="hit")
+        CACHE_LOOKUPS.inc(
+            len(cache_keys) - len(cached), cache="block_result", result="miss"
+        )
+
     dag_id = _project_id_to_dag_id(project_uuid)
-    dag_code = generate_dag_code(graph, templates, dag_id, project_uuid)
-    save_dag_to_file(dag_code, dag_id)
-    return dag_id
+    with (
+        DAG_GENERATION_SECONDS.time(mode=ENV.AIRFLOW_DAG_MODE),
+        tracer.span("translate.generate_dag", mode=ENV.AIRFLOW_DAG_MODE),
+    ):
+        if ENV.AIRFLOW_DAG_MODE == "spec":
+            ensure_static_dag(DAG_FACTORY_FILE)
+            spec = generate_dag_spec(graph, dag_id, project_uuid, cached)
+            save_dag_spec(spec, dag_id)
+            # a DAG file from the python mode would define the same DAG
+            _remove_dag_files(dag_id, spec=False)
+        else:
+            templates = init_templates()
+            dag_code = generate_dag_code(
+                graph, templates, dag_id, project_uuid, cached
+            )
+            save_dag_to_file(dag_code, dag_id)
+            _remove_dag_files(dag_id, python=False)
+    return DagTranslation(dag_id, cache_keys, cached)
 
 
 def unpause_dag(dag_id: str, is_paused: bool = False) -> None:
-    with ApiClient(get_airflow_config()) as api_client:
-        api = DAGApi(api_client)
+    airflow = _airflow()
+
+    with airflow.client() as api_client:
+        api = airflow.DAGApi(api_client)
         try:
-            api.patch_dag(dag_id, DAGPatchBody(is_paused=is_paused))
-        except ApiException as e:
+            api.patch_dag(
+                dag_id, airflow.DAGPatchBody(is_paused=is_paused)
+            )
+        except airflow.ApiException as e:
             logging.exception(f"Exception while trying to unpause dag {e}")
             raise
 
 
-def trigger_workflow_run(dag_id: str) -> None:
-    with ApiClient(get_airflow_config()) as api_client:
+def trigger_workflow_run(
+    dag_id: str, conf: dict | None = None, dag_run_id: str | None = None
+) -> str:
+    """
+    Triggers a run of the DAG and returns the id of the DAG run, dag_run_id
+    if given. The id of the current request is passed to the run, its tasks
+    get it as SCYSTREAM_REQUEST_ID.
+    """
+    airflow = _airflow()
+
+    request_id = tracer.current_request_id()
+    if request_id is not None:
+        conf = {**(conf or {}), "scystream_request_id": request_id}
+
+    with airflow.client() as api_client:
         unpause_dag(dag_id)
-        api = DagRunApi(api_client)
+        api = airflow.DagRunApi(api_client)
 
         try:
-            api.trigger_dag_run(dag_id, TriggerDAGRunPostBody())
-        except ApiException as e:
+            return api.trigger_dag_run(
+                dag_id,
+                airflow.TriggerDAGRunPostBody(
+                    conf=conf, dag_run_id=dag_run_id
+                ),
+            ).dag_run_id
+        except airflow.ApiException as e:
             logging.exception(
                 f"Execption while trying to start the workflow {e}",
             )
             raise
 
 
-def get_all_dags():
-    with ApiClient(get_airflow_config()) as api_client:
-        api = DAGApi(api_client)
+def cancel_dag_run(dag_id: str, dag_run_id: str) -> None:
+    """Fails the DAG run, its running tasks are stopped by airflow."""
+    airflow = _airflow()
 
+    with airflow.client() as api_client:
+        api = airflow.DagRunApi(api_client)
         try:
-            dags = api.get_dags()
-            return [d.dag_id for d in dags.dags]
-        except ApiException as e:
-            logging.exception(
-                f"Exception while trying to query the DAGs from airflow: {e}",
+            api.patch_dag_run(
+                dag_id,
+                dag_run_id,
+                airflow.DAGRunPatchBody(
+                    state=airflow.DAGRunPatchStates.FAILED
+                ),
             )
+        except airflow.ApiException as e:
+            if e.status == 404:
+                # the run is gone, there is nothing to cancel
+                return
+            logging.exception(f"Exception while cancelling {dag_run_id}: {e}")
             raise
 
 
-def last_dag_run_overview(dag_ids: list[str]) -> dict:
-    with ApiClient(get_airflow_config()) as api_client:
-        api = DagRunApi(api_client)
-        most_recent_runs = {}
+def get_dag_runs(
+    dag_ids: list[str],
+    run_after_gte: datetime | None = None,
+    page_limit: int = 100,
+) -> list[DAGRunResponse]:
+    """Returns all runs of the DAGs queued after run_after_gte."""
+    airflow = _airflow()
 
-        # TODO: refactor this method. Its way to strong querying all the dag
-        # and their batch runs without sql limitations
-        for dag_id in dag_ids:
-            try:
-                all_runs = api.get_list_dag_runs_batch(
+    with airflow.client() as api_client:
+        api = airflow.DagRunApi(api_client)
+        dag_runs = []
+
+        try:
+            while True:
+                page = api.get_list_dag_runs_batch(
                     "~",
-                    DAGRunsBatchBody(
+                    airflow.DAGRunsBatchBody(
                         dag_ids=dag_ids,
-                        page_limit=1000,
+                        run_after_gte=run_after_gte,
+                        order_by="run_after",
+                        page_limit=page_limit,
+                        page_offset=len(dag_runs),
                     ),
                 )
+                dag_runs.extend(page.dag_runs)
+                if not page.dag_runs or len(dag_runs) >= page.total_entries:
+                    return dag_runs
+        except airflow.ApiException as e:
+            logging.exception(
+                f"Exception while trying to get DAGRuns from airflow: {e}",
+            )
+            raise
 
-                for run in all_runs.dag_runs:
-                    dag_id = run.dag_id
-                    if (
-                        dag_id not in most_recent_runs
-                        or run.start_date > most_recent_runs[dag_id].start_date
-                    ):
-                        most_recent_runs[dag_id] = run
-            except ApiException as e:
-                logging.exception(
-                    f"Exception while trying to get DAGRuns from airflow: {e}",
-                )
-                raise
-
-        return most_recent_runs
 
+def get_task_instances(
+    dag_ids: list[str],
+    dag_run_ids: list[str],
+    page_limit: int = 100,
+) -> list[TaskInstanceResponse]:
+    """Returns the task instances of the given DAG runs."""
+    airflow = _airflow()
 
-def get_latest_dag_run(project_id: UUID) -> str | None:
-    dag_id = _project_id_to_dag_id(project_id)
-    with ApiClient(get_airflow_config()) as api_client:
-        api = DagRunApi(api_client)
+    with airflow.client() as api_client:
+        api = airflow.TaskInstanceApi(api_client)
+        task_instances = []
 
         try:
-            dag_runs = api.get_dag_runs(
-                dag_id,
-                limit=1,
-                order_by=["-logical_date"],
-            ).dag_runs
-
-            if dag_runs:
-                return dag_runs[0].dag_run_id
-            logging.debug(f"No DAG runs found for DAG {dag_id}")
-            return None
-        except NotFoundException:
-            return None
-        except ApiException as e:
-            logging.exception(f"Error fetching DAG runs for {dag_id}: {e}")
+            while True:
+                page = api.get_task_instances_batch(
+                    "~",
+                    "~",
+                    airflow.TaskInstancesBatchBody(
+                        dag_ids=dag_ids,
+                        dag_run_ids=dag_run_ids,
+                        page_limit=page_limit,
+                        page_offset=len(task_instances),
+                    ),
+                )
+                task_instances.extend(page.task_instances)
+                if not page.task_instances or (
+                    len(task_instances) >= page.total_entries
+                ):
+                    return task_instances
+        except airflow.ApiException as e:
+            logging.exception(
+                f"Exception while trying to get task instances from "
+                f"airflow: {e}",
+            )
             raise
 
 
 def delete_dag_from_airflow(project_id: UUID) -> str | None:
+    airflow = _airflow()
+
     dag_id = _project_id_to_dag_id(project_id)
-    with ApiClient(get_airflow_config()) as api_client:
-        api = DAGApi(api_client)
+    with airflow.client() as api_client:
+        api = airflow.DAGApi(api_client)
 
         try:
-            os.remove(os.path.join(DAG_DIRECTORY, f"{dag_id}.py"))
+            _remove_dag_files(dag_id)
             api.delete_dag(
                 dag_id,
             )
@@ -598,41 +909,6 @@ def delete_dag_from_airflow(project_id: UUID) -> str | None:
             # The Deleting of the file might fail, because it might not yet be
             # existant
             logging.exception("Error deleting DAG file from directory")
-        except ApiException as e:
+        except airflow.ApiException as e:
             logging.exception(f"Error deleting DAG {dag_id} from airflow: {e}")
             raise
-
-
-def dag_status(project_id: UUID) -> dict:
-    dag_id = _project_id_to_dag_id(project_id)
-    latest_run_id = get_latest_dag_run(project_id)
-
-    if not latest_run_id:
-        return {}
-
-    with ApiClient(get_airflow_config()) as api_client:
-        api = TaskInstanceApi(api_client)
-
-        task_statuses = {}
-
-        try:
-            tasks = api.get_task_instances(
-                dag_id,
-                latest_run_id,
-            ).task_instances
-
-            for task in tasks:
-                cb_id = _task_id_to_cb_id(task.task_id)
-                task_statuses[cb_id] = BlockStatus.from_airflow_state(
-                    task.state.value if task.state else None,
-                ).value
-
-            return task_statuses
-        except ApiException as e:
-            logging.exception(
-                f"""
-            Exception while trying to get Compute Block statuses
-            per project from airflow: {e}
-            """,
-            )
-            raise
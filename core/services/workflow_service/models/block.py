@@ -1,6 +1,6 @@
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy import Column, String,  ForeignKey, Table, Float, \
-    UniqueConstraint
+    UniqueConstraint, Integer, JSON, Index
 from sqlalchemy.orm import relationship, foreign
 
 import uuid
@@ -68,6 +68,23 @@ class Block(Base):
     x_pos = Column(Float)
     y_pos = Column(Float)
 
+    # resources and scheduling of the blocks task, unset means unlimited
+    # or the airflow default. cpus is the cpu weight of the container
+    # relative to others, 1.0 being the docker default of 1024 cpu shares
+    cpus = Column(Float, nullable=True)
+    # docker memory limit, e.g. 512m or 2g
+    memory_limit = Column(String(20), nullable=True)
+    # airflow pool the task takes a slot from
+    pool = Column(String(50), nullable=True)
+    priority_weight = Column(Integer, nullable=True)
+
+    # readiness, kept up to date by every controller writing envs or io
+    # configs: the env and io config keys that still lack a value
+    missing_configs = Column(JSON, nullable=False, default=list,
+                             server_default="[]")
+    missing_config_count = Column(Integer, nullable=False, default=0,
+                                  server_default="0")
+
     project = relationship("Project", back_populates="blocks")
 
     selected_entrypoint = relationship(
@@ -101,4 +118,6 @@ class Block(Base):
 
     __table_args__ = (
         UniqueConstraint('custom_name', 'project_uuid', name='proj_name_1'),
+        Index('ix_blocks_project_readiness', 'project_uuid',
+              'missing_config_count'),
     )
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, DateTime, Float, String, Text
+
+from utils.database.connection import Base
+
+
+class DockerImage(Base):
+    """
+    Pull state of a compute block image on the airflow workers, as reported
+    by the image prewarm DAG.
+    """
+    __tablename__ = "docker_images"
+
+    image = Column(String(150), primary_key=True)
+
+    # pending, pulling, pulled or failed
+    status = Column(String(20), nullable=False)
+    # prewarm run that pulls the image
+    dag_run_id = Column(String(250), nullable=True)
+    requested_at = Column(DateTime(timezone=True), nullable=False)
+    pulled_at = Column(DateTime(timezone=True), nullable=True)
+    pull_seconds = Column(Float, nullable=True)
+    error = Column(Text, nullable=True)
+    # time of the last event applied, used to drop out of order events
+    updated_at = Column(DateTime(timezone=True), nullable=False)
@@ -16,8 +16,15 @@ class Project(Base):
     name = Column(String(100), nullable=False)
     created_at = Column(DateTime, default=datetime.now, nullable=False)
 
+    # incremented on every change to the projects graph or configurations,
+    # used as ETag for conditional requests
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
     # DAG-specific columns
     default_retries = Column(Integer, default=1)
+    # tasks of the project running at the same time, unset means the
+    # airflow default
+    max_active_tasks = Column(Integer, nullable=True)
 
     users = Column(ARRAY(UUID(as_uuid=True)))
 
@@ -0,0 +1,88 @@
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    String,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+
+from utils.database.connection import Base
+
+
+class WorkflowRun(Base):
+    """
+    State of a DAG run, as reported by the callbacks of the generated DAG.
+    """
+    __tablename__ = "workflow_runs"
+
+    project_uuid = Column(UUID(as_uuid=True),
+                          ForeignKey("projects.uuid",
+                                     ondelete="CASCADE",
+                                     name="fk_workflow_run_project_uuid"),
+                          primary_key=True)
+    dag_run_id = Column(String(250), primary_key=True)
+
+    # airflow dag run state, e.g. queued, running, success, failed
+    state = Column(String(50), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    ended_at = Column(DateTime(timezone=True), nullable=True)
+    # keycloak uuid of the user who triggered the run through core
+    triggered_by = Column(UUID(as_uuid=True), nullable=True)
+    # Idempotency-Key of the trigger request, retries of it get this run
+    idempotency_key = Column(String(100), nullable=True)
+    # blocks a partial run started from, None for runs of all blocks
+    run_from = Column(ARRAY(UUID(as_uuid=True)), nullable=True)
+    # blocks may be reused from the cache, kept to start deferred runs
+    use_cache = Column(Boolean, nullable=False, default=True,
+                       server_default="true")
+    # time of the last event applied, used to drop out of order events
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        # serves the latest run lookups and the keyset paginated history
+        Index("ix_workflow_runs_project_started",
+              "project_uuid", "started_at", "dag_run_id"),
+        Index("ix_workflow_runs_project_idempotency_key",
+              "project_uuid", "idempotency_key", unique=True),
+    )
+
+
+class BlockRun(Base):
+    """
+    State of a compute block within a DAG run.
+    """
+    __tablename__ = "block_runs"
+
+    project_uuid = Column(UUID(as_uuid=True), primary_key=True)
+    dag_run_id = Column(String(250), primary_key=True)
+    block_uuid = Column(UUID(as_uuid=True),
+                        ForeignKey("blocks.uuid",
+                                   ondelete="CASCADE",
+                                   name="fk_block_run_block_uuid"),
+                        primary_key=True)
+
+    # airflow task instance state, e.g. scheduled, running, success
+    state = Column(String(50), nullable=False)
+    queued_at = Column(DateTime(timezone=True), nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    ended_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    # hash of image, entrypoint, configs and inputs the block ran with
+    cache_key = Column(String(64), nullable=True)
+    # the block was not executed, the outputs of a previous run were reused
+    cached = Column(Boolean, nullable=False, default=False,
+                    server_default="false")
+
+    __table_args__ = (
+        Index("ix_block_runs_block_cache_key", "block_uuid", "cache_key"),
+        ForeignKeyConstraint(
+            ["project_uuid", "dag_run_id"],
+            ["workflow_runs.project_uuid", "workflow_runs.dag_run_id"],
+            ondelete="CASCADE",
+            name="fk_block_run_workflow_run",
+        ),
+    )
@@ -1,3 +1,4 @@
+from datetime import datetime
 from uuid import UUID
 
 from enum import Enum
@@ -189,6 +190,28 @@ class PositionDTO(BaseModel):
     y: float
 
 
+class BlockResourcesDTO(BaseModel):
+    # cpu weight of the container relative to others, 1.0 is the default
+    cpus: float | None = Field(default=None, gt=0, le=64)
+    # docker memory limit, e.g. 512m or 2g
+    memory_limit: str | None = Field(
+        default=None, pattern=r"^[1-9][0-9]*[bkmg]?$", max_length=20
+    )
+    pool: str | None = Field(
+        default=None, pattern=r"^[A-Za-z0-9_.-]+$", max_length=50
+    )
+    priority_weight: int | None = Field(default=None, ge=1)
+
+    @classmethod
+    def from_block(cls, block) -> "BlockResourcesDTO":
+        return cls.model_construct(
+            cpus=block.cpus,
+            memory_limit=block.memory_limit,
+            pool=block.pool,
+            priority_weight=block.priority_weight,
+        )
+
+
 class BaseNodeDataDTO(BaseModel):
     id: UUID
     name: str
@@ -197,6 +220,7 @@ class BaseNodeDataDTO(BaseModel):
     author: str
     image: str
     status: BlockStatus = BlockStatus.IDLE
+    resources: BlockResourcesDTO = BlockResourcesDTO()
 
     @validator("status")
     def set_status(cls, status):
@@ -251,6 +275,50 @@ class SimpleNodeDTO(BaseNodeDTO):
                     ],
                 ),
                 status=status,
+                resources=BlockResourcesDTO.from_block(cb),
+            ),
+        )
+
+    @classmethod
+    def from_block_node_record(
+        cls, record, status: BlockStatus = BlockStatus.IDLE
+    ):
+        """
+        Builds the DTO from a BlockNodeRecord without running validation,
+        the record values come straight from typed database columns.
+        """
+        return cls.model_construct(
+            id=record.uuid,
+            position=PositionDTO.model_construct(
+                x=record.x_pos,
+                y=record.y_pos,
+            ),
+            type="computeBlock",
+            data=SimpleNodeDataDTO.model_construct(
+                id=record.uuid,
+                name=record.name,
+                custom_name=record.custom_name,
+                description=record.description,
+                author=record.author,
+                image=record.docker_image,
+                selected_entrypoint=BaseEntrypointDTO.model_construct(
+                    id=record.entrypoint_uuid,
+                    name=record.entrypoint_name,
+                    inputs=[
+                        BaseIODTO.model_construct(
+                            id=io.uuid, name=io.name, data_type=io.data_type
+                        )
+                        for io in record.inputs
+                    ],
+                    outputs=[
+                        BaseIODTO.model_construct(
+                            id=io.uuid, name=io.name, data_type=io.data_type
+                        )
+                        for io in record.outputs
+                    ],
+                ),
+                status=BlockStatus(status) if status else BlockStatus.IDLE,
+                resources=BlockResourcesDTO.from_block(record),
             ),
         )
 
@@ -318,6 +386,14 @@ class EdgeDTO(BaseModel):
             sourceHandle=bd.upstream_output_uuid,
         )
 
+    def as_edge(self) -> tuple[UUID, UUID, UUID, UUID]:
+        return (self.source, self.sourceHandle, self.target, self.targetHandle)
+
+    def with_id(self) -> "EdgeDTO":
+        return self.model_copy(
+            update={"id": f"{self.sourceHandle}-{self.targetHandle}"}
+        )
+
 
 # Requests & Responses:
 
@@ -420,3 +496,65 @@ class UpdateComputeBlockDTO(BaseModel):
     custom_name: str | None = None
     x_pos: float | None = None
     y_pos: float | None = None
+    # replaces all resource settings of the block if given
+    resources: BlockResourcesDTO | None = None
+
+
+class BlockPositionDTO(BaseModel):
+    id: UUID
+    x_pos: float
+    y_pos: float
+
+
+class BlockEnvsDTO(BaseModel):
+    id: UUID
+    envs: ConfigType
+
+
+class BatchCanvasMutationRequest(BaseModel):
+    project_id: UUID
+    positions: list[BlockPositionDTO] = []
+    envs: list[BlockEnvsDTO] = []
+    create_edges: list[EdgeDTO] = []
+    delete_edges: list[EdgeDTO] = []
+
+
+class BatchCanvasMutationResponse(BaseModel):
+    positions: list[BlockPositionDTO]
+    envs: list[BlockEnvsDTO]
+    created_edges: list[EdgeDTO]
+    deleted_edges: list[EdgeDTO]
+    updated_inputs: list[UpdateInputOutputResponseDTO]
+    version: int
+
+
+class ImagePullEventDTO(BaseModel):
+    """Pull reported by the image prewarm DAG."""
+    image: str = Field(max_length=150)
+    status: Literal["pulling", "pulled", "failed"]
+    duration_seconds: float | None = None
+    error: str | None = None
+    timestamp: datetime
+
+
+class DockerImageDTO(BaseModel):
+    image: str
+    # unknown if the image was never prewarmed
+    status: Literal["unknown", "pending", "pulling", "pulled", "failed"]
+    requested_at: datetime | None = None
+    pulled_at: datetime | None = None
+    pull_seconds: float | None = None
+    error: str | None = None
+
+
+class PrewarmImagesRequest(BaseModel):
+    # images in use by compute blocks, all of them if not given
+    images: list[str] | None = None
+    # pull images again that were pulled before, e.g. updated latest tags
+    force: bool = False
+
+
+class PrewarmImagesResponse(BaseModel):
+    # None if all images were pulled or are being pulled already
+    dag_run_id: str | None
+    images: list[str]
@@ -8,6 +8,8 @@ class Project(BaseModel):
     uuid: UUID
     name: str
     created_at: datetime
+    default_retries: int | None = None
+    max_active_tasks: int | None = None
 
     class Config:
         from_attributes = True
@@ -52,5 +54,13 @@ class RenameProjectRequest(BaseModel):
     new_name: str
 
 
+class ProjectSettingsRequest(BaseModel):
+    # retries of every block, before the run is marked as failed
+    default_retries: int = Field(default=1, ge=0, le=10)
+    # blocks of the project running at the same time, None means the
+    # airflow default
+    max_active_tasks: int | None = Field(default=None, ge=1)
+
+
 class DeleteProjectRequest(BaseModel):
     project_uuid: UUID
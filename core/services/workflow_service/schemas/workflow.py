@@ -1,6 +1,8 @@
+from datetime import datetime
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from enum import Enum
+from typing import Literal
 
 from services.workflow_service.schemas.compute_block import (
     ConfigType,
@@ -9,8 +11,6 @@ from services.workflow_service.schemas.compute_block import (
     replace_minio_host
 )
 
-from airflow_client.client.models.dag_run_state import DagRunState
-
 
 class WorkflowStatus(Enum):
     RUNNING = "RUNNING"
@@ -21,21 +21,129 @@ class WorkflowStatus(Enum):
     @classmethod
     def from_airflow_state(
             cls,
-            airflow_state: DagRunState
+            airflow_state: str | None
     ) -> "WorkflowStatus":
+        if airflow_state is None:
+            return cls.IDLE
+        # the values of airflow's DagRunState
         state_mapping = {
-            airflow_state.RUNNING: cls.RUNNING,
-            airflow_state.SUCCESS: cls.FINISHED,
-            airflow_state.FAILED: cls.FAILED
+            "running": cls.RUNNING,
+            "success": cls.FINISHED,
+            "failed": cls.FAILED
         }
         return state_mapping.get(airflow_state.lower(), cls.IDLE)
 
 
+class RunEventDTO(BaseModel):
+    """State change reported by a callback of a generated DAG."""
+    dag_run_id: str = Field(max_length=250)
+    # None for state changes of the DAG run itself
+    task_id: str | None = None
+    state: str = Field(max_length=50)
+    timestamp: datetime
+
+
+class BlockRunDTO(BaseModel):
+    block_uuid: UUID
+    state: str
+    queued_at: datetime | None = None
+    started_at: datetime | None = None
+    ended_at: datetime | None = None
+    # outputs of a previous run were reused, the block was not executed
+    cached: bool = False
+
+    @classmethod
+    def from_block_run(cls, block_run) -> "BlockRunDTO":
+        return cls(
+            block_uuid=block_run.block_uuid,
+            state=block_run.state,
+            queued_at=block_run.queued_at,
+            started_at=block_run.started_at,
+            ended_at=block_run.ended_at,
+            cached=block_run.cached,
+        )
+
+
+class WorkflowRunDTO(BaseModel):
+    dag_run_id: str
+    # airflow dag run state
+    state: str
+    started_at: datetime
+    ended_at: datetime | None = None
+    triggered_by: UUID | None = None
+    blocks: list[BlockRunDTO]
+
+    @classmethod
+    def from_workflow_run(cls, run, block_runs) -> "WorkflowRunDTO":
+        return cls(
+            dag_run_id=run.dag_run_id,
+            state=run.state,
+            started_at=run.started_at,
+            ended_at=run.ended_at,
+            triggered_by=run.triggered_by,
+            blocks=[BlockRunDTO.from_block_run(br) for br in block_runs],
+        )
+
+
+class WorkflowRunPage(BaseModel):
+    runs: list[WorkflowRunDTO]
+    # pass as cursor to get the next page, None on the last page
+    next_cursor: str | None = None
+
+
+# what triggering a project does while one of its runs is active
+ActiveRunPolicy = Literal["reject", "queue", "cancel_previous"]
+
+
+class TriggerWorkflowResponse(BaseModel):
+    dag_run_id: str
+    # an earlier or concurrent request triggered the run already
+    coalesced: bool = False
+    # active runs failed by the cancel_previous policy
+    cancelled: list[str] = []
+    # the run starts once the active run of the project finished
+    deferred: bool = False
+
+
+class BlockProfileDTO(BaseModel):
+    block_uuid: UUID
+    state: str
+    # time between the task being queued and being started
+    queue_wait_seconds: float | None = None
+    execution_seconds: float | None = None
+    on_critical_path: bool = False
+
+
+class WorkflowRunProfile(BaseModel):
+    dag_run_id: str
+    state: str
+    wall_time_seconds: float | None = None
+    # sum of the execution times of all blocks
+    total_execution_seconds: float
+    total_queue_wait_seconds: float
+    # longest chain of dependent blocks, weighted by execution time
+    critical_path: list[UUID]
+    critical_path_seconds: float
+    # average number of blocks executing at the same time
+    parallelism: float | None = None
+    # wall time / critical path: upper bound of the speed-up reachable
+    # with unlimited parallelism and no queueing
+    max_speedup: float | None = None
+    blocks: list[BlockProfileDTO]
+
+
 class WorfklowValidationError(BaseModel):
     project_id: str
     missing_configs: dict[str, list[str]]
 
 
+class WorkflowReadinessResponse(BaseModel):
+    project_id: UUID
+    block_count: int
+    missing_config_count: int
+    missing_configs: dict[UUID, list[str]]
+
+
 # Workflow Configuration
 class WorkflowEnvsWithBlockInfo(BaseModel):
     block_uuid: UUID
@@ -0,0 +1,170 @@
+"""
+Materializes the DAGs of all scystream projects from the JSON specs written
+by scystream core into the specs directory next to this file.
+
+This file is copied into the airflow DAG directory by core, do not edit it
+there. When airflow only needs a single DAG, e.g. to execute one of its
+tasks, only the spec of that DAG is read.
+"""
+
+import json
+import logging
+import os
+import urllib.request
+from datetime import datetime, timezone
+from functools import partial
+
+from airflow import DAG
+from airflow.providers.docker.operators.docker import DockerOperator
+from airflow.providers.standard.operators.empty import EmptyOperator
+
+try:
+    from airflow.sdk import get_parsing_context
+except ImportError:
+    from airflow.utils.dag_parsing_context import get_parsing_context
+
+log = logging.getLogger(__name__)
+
+SPEC_DIRECTORY = os.path.join(os.path.dirname(__file__), "specs")
+
+COMMAND = (
+    "sh -c 'python -c \"import main; from scystream.sdk.scheduler import "
+    "Scheduler; Scheduler.execute_function(\\\"{entry_name}\\\")\"'"
+)
+
+# rendered by airflow, the id of the scystream request that triggered the run
+REQUEST_ID = "{{ dag_run.conf.get('scystream_request_id', '') }}"
+
+
+def report_run_event(url, token, state, context, task=True):
+    # Reporting is best effort, it must never fail the task or the run
+    event = {
+        'dag_run_id': context['dag_run'].run_id,
+        'task_id': context['ti'].task_id if task else None,
+        'state': state,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+    }
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(event).encode(),
+        headers={
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {token}',
+        },
+        method='POST',
+    )
+    try:
+        urllib.request.urlopen(request, timeout=2).close()
+    except Exception as e:
+        print(f'Could not report {state} of run to scystream: {e}')
+
+
+def load_spec(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def task_options(task):
+    # only pass what is set, so the operator defaults apply otherwise
+    options = {
+        'cpus': task.get('cpus'),
+        'mem_limit': task.get('memory_limit'),
+        'pool': task.get('pool'),
+        'priority_weight': task.get('priority_weight'),
+    }
+    return {k: v for k, v in options.items() if v is not None}
+
+
+def build_dag(spec):
+    report = partial(report_run_event, spec['run_events_url'],
+                     spec['run_events_token'])
+    default_args = {
+        'owner': 'airflow',
+        'start_date': datetime(2025, 1, 1),
+        'retries': spec.get('retries', 0),
+        'on_execute_callback': partial(report, 'running'),
+        'on_success_callback': partial(report, 'success'),
+        'on_failure_callback': partial(report, 'failed'),
+        'on_retry_callback': partial(report, 'up_for_retry'),
+    }
+
+    dag_options = {}
+    if spec.get('max_active_tasks') is not None:
+        dag_options['max_active_tasks'] = spec['max_active_tasks']
+
+    with DAG(
+        spec['dag_id'],
+        default_args=default_args,
+        schedule=None,
+        catchup=False,
+        is_paused_upon_creation=True,
+        # runs of the project queue instead of competing for the workers
+        max_active_runs=1,
+        **dag_options,
+        on_success_callback=partial(report, 'success', task=False),
+        on_failure_callback=partial(report, 'failed', task=False),
+    ) as dag:
+        tasks = {}
+        for task in spec['tasks']:
+            if task['cached']:
+                tasks[task['task_id']] = EmptyOperator(
+                    task_id=task['task_id'],
+                )
+                continue
+
+            tasks[task['task_id']] = DockerOperator(
+                task_id=task['task_id'],
+                image=task['image'],
+                api_version='auto',
+                auto_remove='force',
+                command=COMMAND.format(entry_name=task['entry_name']),
+                docker_url='unix://var/run/docker.sock',
+                environment={
+                    **task['environment'],
+                    'SCYSTREAM_REQUEST_ID': REQUEST_ID,
+                },
+                network_mode=task['network_mode'],
+                extra_hosts={
+                    'host.containers.internal': 'host-gateway'
+                },
+                force_pull=False,
+                mount_tmp_dir=True,
+                **task_options(task),
+            )
+
+        for upstream, downstream in spec['edges']:
+            tasks[upstream] >> tasks[downstream]
+
+    return dag
+
+
+def spec_paths():
+    dag_id = get_parsing_context().dag_id
+    if dag_id is not None:
+        path = os.path.join(SPEC_DIRECTORY, f'{dag_id}.json')
+        return [path] if os.path.exists(path) else []
+
+    if not os.path.isdir(SPEC_DIRECTORY):
+        return []
+
+    return [
+        os.path.join(SPEC_DIRECTORY, name)
+        for name in os.listdir(SPEC_DIRECTORY)
+        if name.endswith('.json')
+    ]
+
+
+for path in spec_paths():
+    # a broken spec skips only its project, an exception escaping the
+    # module would drop the DAGs of all projects
+    try:
+        spec = load_spec(path)
+    except (OSError, ValueError) as e:
+        # the spec was removed or is not valid JSON
+        log.warning(f'Could not load DAG spec {path}: {e}')
+        continue
+
+    try:
+        globals()[spec['dag_id']] = build_dag(spec)
+    except Exception:
+        log.exception(f'Could not build the DAG of spec {path}')
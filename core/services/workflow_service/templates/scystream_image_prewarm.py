@@ -0,0 +1,93 @@
+"""
+Pulls the docker images of scystream compute blocks ahead of their first
+run, so the tasks of the generated DAGs do not block on a cold pull.
+
+This file is copied into the airflow DAG directory by core, do not edit it
+there. Runs are triggered by core with the images to pull, the URL and the
+token to report the pulls to in the run conf.
+"""
+
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import docker
+from airflow import DAG
+from airflow.providers.standard.operators.python import PythonOperator
+
+DOCKER_URL = 'unix://var/run/docker.sock'
+# images pulled at the same time, pulls are mostly bound by the registry
+PULL_CONCURRENCY = 4
+
+
+def report_pull(conf, image, status, duration=None, error=None):
+    # Reporting is best effort, the pull itself is what matters
+    event = {
+        'image': image,
+        'status': status,
+        'duration_seconds': duration,
+        'error': error,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+    }
+    request = urllib.request.Request(
+        conf['pull_events_url'],
+        data=json.dumps(event).encode(),
+        headers={
+            'Content-Type': 'application/json',
+            'Authorization': f"Bearer {conf['pull_events_token']}",
+        },
+        method='POST',
+    )
+    try:
+        urllib.request.urlopen(request, timeout=2).close()
+    except Exception as e:
+        print(f'Could not report pull of {image} to scystream: {e}')
+
+
+def pull_image(client, conf, image):
+    report_pull(conf, image, 'pulling')
+    start = time.monotonic()
+    try:
+        client.images.pull(image)
+    except Exception as e:
+        report_pull(conf, image, 'failed', time.monotonic() - start, str(e))
+        return False
+
+    report_pull(conf, image, 'pulled', time.monotonic() - start)
+    return True
+
+
+def pull_images(**context):
+    conf = context['dag_run'].conf or {}
+    images = conf.get('images', [])
+    client = docker.DockerClient(base_url=DOCKER_URL)
+    try:
+        with ThreadPoolExecutor(PULL_CONCURRENCY) as executor:
+            results = list(executor.map(
+                lambda image: pull_image(client, conf, image), images
+            ))
+    finally:
+        client.close()
+
+    failed = [image for image, ok in zip(images, results) if not ok]
+    if failed:
+        raise RuntimeError(f'Could not pull {failed}')
+
+
+with DAG(
+    'scystream_image_prewarm',
+    default_args={
+        'owner': 'airflow',
+        'start_date': datetime(2025, 1, 1),
+    },
+    schedule=None,
+    catchup=False,
+    is_paused_upon_creation=False,
+    max_active_runs=1,
+) as dag:
+    PythonOperator(
+        task_id='pull_images',
+        python_callable=pull_images,
+    )
@@ -7,10 +7,18 @@ from utils.errors.error import handle_error
 from utils.data.file_handling import bulk_presigned_urls_from_ios
 from services.workflow_service.models.input_output import InputOutputType
 from services.workflow_service.schemas.compute_block import (
+    BatchCanvasMutationRequest,
+    BatchCanvasMutationResponse,
+    BlockEnvsDTO,
+    BlockResourcesDTO,
     ComputeBlockInformationRequest,
     ComputeBlockInformationResponse,
     CreateComputeBlockRequest,
+    DockerImageDTO,
     IDResponse,
+    ImagePullEventDTO,
+    PrewarmImagesRequest,
+    PrewarmImagesResponse,
     GetNodesByProjectResponse,
     EdgeDTO,
     SimpleNodeDTO,
@@ -21,23 +29,41 @@ from services.workflow_service.schemas.compute_block import (
     ConfigType,
     BlockStatus,
 )
-from fastapi import APIRouter, Depends, HTTPException
-from services.workflow_service.controllers import workflow_controller
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    Header,
+    HTTPException,
+    Response,
+)
+from fastapi.concurrency import run_in_threadpool
+from services.workflow_service.controllers import (
+    image_controller,
+    project_controller,
+    run_controller,
+)
 from services.workflow_service.controllers.compute_block_controller import (
+    BlockPositionUpdate,
+    BulkBlockEnvsUpdate,
+    apply_canvas_mutations,
     bulk_upload_files,
     create_compute_block,
     create_stream_and_update_target_cfg,
     delete_block,
     delete_edge,
     get_block_dependencies_for_blocks,
-    get_compute_blocks_by_project,
+    get_block_nodes_by_project,
+    get_block_nodes_by_project_async,
     get_envs_for_entrypoint,
     get_io_for_entrypoint,
     request_cb_info,
     update_block,
     update_ios_with_uploads,
 )
-from utils.security.token import User, get_user
+from utils.config.environment import ENV
+from utils.http.etag import etag_matches, project_etag
+from utils.security.token import User, get_user, verify_image_callback
 
 router = APIRouter(prefix="/compute_block", tags=["compute_block"])
 
@@ -62,6 +88,7 @@ async def cb_information(
 @router.post("/", response_model=SimpleNodeDTO)
 async def create(
     data: CreateComputeBlockRequest,
+    background_tasks: BackgroundTasks,
     _: User = Depends(get_user),
     db: Session = Depends(get_database),
 ):
@@ -98,7 +125,12 @@ async def create(
                 ],
                 data.project_id,
             )
-            return SimpleNodeDTO.from_compute_block(cb)
+            node = SimpleNodeDTO.from_compute_block(cb)
+
+        background_tasks.add_task(
+            image_controller.prewarm_in_background, [data.image]
+        )
+        return node
     except Exception as e:
         logging.exception(f"Error creating compute block: {e}")
         raise handle_error(e)
@@ -110,28 +142,63 @@ async def create(
 )
 async def get_by_project(
     project_id: UUID | None = None,
+    if_none_match: str | None = Header(default=None),
     _: User = Depends(get_user),
 ):
     if not project_id:
         raise HTTPException(status_code=422, detail="Project ID is required.")
 
     try:
-        compute_blocks = get_compute_blocks_by_project(project_id)
-        status = workflow_controller.dag_status(project_id)
+        if ENV.DATABASE_ASYNC:
+            version = await project_controller.get_project_version_async(
+                project_id
+            )
+        else:
+            version = await run_in_threadpool(
+                project_controller.get_project_version, project_id
+            )
 
-        block_uuids = [block.uuid for block in compute_blocks]
-        dependencies = get_block_dependencies_for_blocks(block_uuids)
+        # block states are pushed by the DAG callbacks into the database
+        run = await run_in_threadpool(
+            run_controller.get_run_snapshot, project_id
+        )
 
-        return GetNodesByProjectResponse(
+        headers = {
+            "ETag": project_etag(project_id, version, run.fingerprint),
+            "Cache-Control": "private, no-cache",
+        }
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+        if ENV.DATABASE_ASYNC:
+            nodes = await get_block_nodes_by_project_async(project_id)
+        else:
+            nodes = await run_in_threadpool(
+                get_block_nodes_by_project, project_id
+            )
+
+        block_uuids = [node.uuid for node in nodes]
+        dependencies = await run_in_threadpool(
+            get_block_dependencies_for_blocks, block_uuids
+        )
+
+        response = GetNodesByProjectResponse.model_construct(
             blocks=[
-                SimpleNodeDTO.from_compute_block(
-                    cb,
-                    status.get(str(cb.uuid), BlockStatus.IDLE),
+                SimpleNodeDTO.from_block_node_record(
+                    node,
+                    BlockStatus.from_airflow_state(run.blocks.get(node.uuid)),
                 )
-                for cb in compute_blocks
+                for node in nodes
             ],
             edges=[EdgeDTO.from_block_dependencies(dp) for dp in dependencies],
         )
+        # The nodes are built from typed columns, returning the serialized
+        # response directly skips FastAPI's response model revalidation.
+        return Response(
+            content=response.model_dump_json(),
+            media_type="application/json",
+            headers=headers,
+        )
     except Exception as e:
         logging.exception(f"Error getting compute blocks by project: {e}")
         raise handle_error(e)
@@ -167,6 +234,7 @@ async def update_compute_block(
             data.custom_name,
             data.x_pos,
             data.y_pos,
+            data.resources,
         )
         return UpdateComputeBlockDTO(
             id=b.uuid,
@@ -174,6 +242,7 @@ async def update_compute_block(
             custom_name=b.custom_name,
             x_pos=b.x_pos,
             y_pos=b.y_pos,
+            resources=BlockResourcesDTO.from_block(b),
         )
     except Exception as e:
         logging.exception(f"Error updating compute block {data.id}: {e}")
@@ -288,3 +357,104 @@ def delete_stream(
     except Exception as e:
         logging.exception(f"Error deleting an edge: {e}")
         raise handle_error(e)
+
+
+@router.post("/batch", response_model=BatchCanvasMutationResponse)
+def batch_mutate_canvas(
+    data: BatchCanvasMutationRequest,
+    _: User = Depends(get_user),
+):
+    """
+    Applies position updates, env updates, edge creations and edge deletions
+    of a project in one transaction.
+    """
+    db = next(get_database())
+    # the response is built from the committed objects, avoid reloading them
+    db.expire_on_commit = False
+
+    try:
+        with db.begin():
+            updated_blocks, updated_inputs, version = apply_canvas_mutations(
+                db,
+                data.project_id,
+                positions=[
+                    BlockPositionUpdate(
+                        block_id=p.id, x_pos=p.x_pos, y_pos=p.y_pos
+                    )
+                    for p in data.positions
+                ],
+                envs=[
+                    BulkBlockEnvsUpdate(block_id=e.id, envs=e.envs)
+                    for e in data.envs
+                ],
+                create_edges=[e.as_edge() for e in data.create_edges],
+                delete_edges=[e.as_edge() for e in data.delete_edges],
+            )
+
+        presigneds = bulk_presigned_urls_from_ios(updated_inputs)
+
+        return BatchCanvasMutationResponse(
+            positions=data.positions,
+            envs=[
+                BlockEnvsDTO(id=b.uuid, envs=b.selected_entrypoint.envs)
+                for b in updated_blocks
+            ],
+            created_edges=[e.with_id() for e in data.create_edges],
+            deleted_edges=[e.with_id() for e in data.delete_edges],
+            updated_inputs=[
+                UpdateInputOutputResponseDTO.from_input_output(
+                    io,
+                    presigneds.get(io.uuid),
+                )
+                for io in updated_inputs
+            ],
+            version=version,
+        )
+    except Exception as e:
+        logging.exception(
+            f"Error applying canvas mutations to {data.project_id}: {e}"
+        )
+        raise handle_error(e)
+
+
+@router.get("/images", response_model=list[DockerImageDTO])
+def list_images(
+    _: User = Depends(get_user),
+    db: Session = Depends(get_database),
+):
+    try:
+        return image_controller.list_images(db)
+    except Exception as e:
+        logging.exception(f"Error listing images: {e}")
+        raise handle_error(e)
+
+
+@router.post("/images/prewarm", response_model=PrewarmImagesResponse)
+def prewarm_images(
+    data: PrewarmImagesRequest,
+    _: User = Depends(get_user),
+    db: Session = Depends(get_database),
+):
+    try:
+        dag_run_id, images = image_controller.prewarm_images(
+            data.images, data.force, db
+        )
+        return PrewarmImagesResponse(dag_run_id=dag_run_id, images=images)
+    except Exception as e:
+        logging.exception(f"Error prewarming images: {e}")
+        raise handle_error(e)
+
+
+@router.post("/images/pull_events", status_code=204)
+def report_pull_event(
+    event: ImagePullEventDTO,
+    _: None = Depends(verify_image_callback),
+    db: Session = Depends(get_database),
+):
+    """Receives the pulls of the image prewarm DAG."""
+    try:
+        with db.begin():
+            image_controller.record_pull_event(db, event)
+    except Exception as e:
+        logging.exception(f"Error recording pull of {event.image}: {e}")
+        raise handle_error(e)
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from uuid import UUID
 from utils.errors.error import handle_error
 import logging
 from sqlalchemy.orm import Session
 
 from services.workflow_service.controllers import (
+    image_controller,
     project_controller,
     workflow_controller,
 )
@@ -14,10 +16,12 @@ from services.workflow_service.schemas.project import (
     ReadByUserResponse,
     ReadAllResponse,
     RenameProjectRequest,
+    ProjectSettingsRequest,
     CreateProjectFromTemplateResponse,
     CreateProjectFromTemplateRequest,
     Project,
 )
+from utils.config.environment import ENV
 from utils.database.session_injector import get_database
 from utils.security.token import User, get_user
 
@@ -45,12 +49,19 @@ async def create_project(
     "/from_template", response_model=CreateProjectFromTemplateResponse
 )
 async def create_project_from_template(
-    data: CreateProjectFromTemplateRequest, user: User = Depends(get_user)
+    data: CreateProjectFromTemplateRequest,
+    background_tasks: BackgroundTasks,
+    user: User = Depends(get_user),
+    db: Session = Depends(get_database),
 ):
     try:
         id = project_controller.create_project_from_template(
             data.name, data.template_identifier, user.uuid
         )
+        background_tasks.add_task(
+            image_controller.prewarm_in_background,
+            image_controller.images_in_use(db, id),
+        )
         return CreateProjectResponse(project_uuid=id)
     except Exception as e:
         logging.error(f"Error creating project from template: {e}")
@@ -72,7 +83,16 @@ async def read_projects_by_user(
     user: User = Depends(get_user),
 ):
     try:
-        projects = project_controller.read_projects_by_user_uuid(user.uuid)
+        if ENV.DATABASE_ASYNC:
+            projects = (
+                await project_controller.read_projects_by_user_uuid_async(
+                    user.uuid
+                )
+            )
+        else:
+            projects = await run_in_threadpool(
+                project_controller.read_projects_by_user_uuid, user.uuid
+            )
         return ReadByUserResponse(projects=projects)
     except Exception as e:
         logging.exception(f"Error reading project by user: {e}")
@@ -108,6 +128,26 @@ async def rename_project(
         raise handle_error(e)
 
 
+@router.put("/{project_id}/settings", response_model=Project)
+async def update_project_settings(
+    project_id: UUID,
+    data: ProjectSettingsRequest,
+    _: User = Depends(get_user),
+    db: Session = Depends(get_database),
+):
+    try:
+        with db.begin():
+            project = project_controller.update_project_settings(
+                project_id, data.default_retries, data.max_active_tasks, db
+            )
+        return project
+    except Exception as e:
+        logging.exception(
+            f"Error updating settings of project {project_id}: {e}"
+        )
+        raise handle_error(e)
+
+
 @router.delete("/{project_id}", status_code=200)
 async def delete_project(project_id: UUID, _: User = Depends(get_user)):
     try:
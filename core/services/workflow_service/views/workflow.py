@@ -5,28 +5,53 @@ from uuid import UUID
 
 from fastapi import (
     APIRouter,
+    BackgroundTasks,
     Depends,
+    Header,
     HTTPException,
+    Query,
+    Response,
     WebSocket,
     WebSocketDisconnect,
 )
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
 from services.workflow_service.controllers import (
     compute_block_controller as compute_block_controller,
 )
 from services.workflow_service.controllers import (
     project_controller as project_controller,
 )
-from services.workflow_service.controllers import workflow_controller
+from services.workflow_service.controllers import (
+    run_controller,
+    workflow_controller,
+)
+from services.workflow_service.schemas.compute_block import BlockStatus
 from services.workflow_service.schemas.workflow import (
+    ActiveRunPolicy,
     GetWorkflowConfigurationResponse,
     InputOutputWithBlockInfo,
+    RunEventDTO,
+    TriggerWorkflowResponse,
     UpdateWorkflowConfigurations,
+    WorkflowReadinessResponse,
+    WorkflowRunDTO,
+    WorkflowRunPage,
+    WorkflowRunProfile,
     WorkflowStatus,
     WorkflowTemplateMetaData,
 )
+from utils.config.environment import ENV
+from utils.data.file_handling import presigned_url_epoch
 from utils.database.session_injector import get_database
 from utils.errors.error import handle_error
-from utils.security.token import User, get_user, get_user_from_token
+from utils.http.etag import etag_matches, project_etag
+from utils.security.token import (
+    User,
+    get_user,
+    get_user_from_token,
+    verify_project_callback,
+)
 
 router = APIRouter(prefix="/workflow", tags=["workflow"])
 
@@ -35,8 +60,10 @@ router = APIRouter(prefix="/workflow", tags=["workflow"])
     "/configurations/{project_id}",
     response_model=GetWorkflowConfigurationResponse,
 )
-def get_workflow_configurations(
+async def get_workflow_configurations(
+    response: Response,
     project_id: UUID | None = None,
+    if_none_match: str | None = Header(default=None),
 ):
     if not project_id:
         raise HTTPException(
@@ -45,10 +72,44 @@ def get_workflow_configurations(
         )
 
     try:
-        envs, inputs, inter, outputs, presigned, block_by_entry_id = (
-            workflow_controller.get_workflow_configurations(
+        if ENV.DATABASE_ASYNC:
+            version = await project_controller.get_project_version_async(
+                project_id
+            )
+        else:
+            version = await run_in_threadpool(
+                project_controller.get_project_version,
+                project_id,
+            )
+
+        # the download links depend on the files the runs wrote, and the
+        # presigned URLs expire
+        run = await run_in_threadpool(
+            run_controller.get_run_snapshot, project_id
+        )
+        state = f"{run.fingerprint}-{presigned_url_epoch()}"
+
+        headers = {
+            "ETag": project_etag(project_id, version, state),
+            "Cache-Control": "private, no-cache",
+        }
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+        if ENV.DATABASE_ASYNC:
+            configurations = (
+                await workflow_controller.get_workflow_configurations_async(
+                    project_id,
+                )
+            )
+        else:
+            configurations = await run_in_threadpool(
+                workflow_controller.get_workflow_configurations,
                 project_id,
             )
+        envs, inputs, inter, outputs, presigned, block_by_entry_id = (
+            configurations
         )
 
         return GetWorkflowConfigurationResponse(
@@ -91,6 +152,32 @@ def get_workflow_configurations(
         raise handle_error(e)
 
 
+@router.get(
+    "/readiness/{project_id}",
+    response_model=WorkflowReadinessResponse,
+)
+def get_workflow_readiness(
+    project_id: UUID,
+    _: User = Depends(get_user),
+):
+    """Returns the config keys that are left to configure per block."""
+    try:
+        block_count, missing_configs = (
+            compute_block_controller.get_project_readiness(project_id)
+        )
+        return WorkflowReadinessResponse(
+            project_id=project_id,
+            block_count=block_count,
+            missing_config_count=sum(
+                len(keys) for keys in missing_configs.values()
+            ),
+            missing_configs=missing_configs,
+        )
+    except Exception as e:
+        logging.exception(f"Error getting workflow readiness: {e}")
+        raise handle_error(e)
+
+
 @router.put(
     "/configurations/{project_id}",
     status_code=200,
@@ -143,26 +230,122 @@ def update_workflow_configurations(
         raise handle_error(e)
 
 
-@router.post("/{project_id}", status_code=200)
+@router.post("/{project_id}", response_model=TriggerWorkflowResponse)
 def translate_project_to_dag(
     project_id: UUID | None = None,
-    _: User = Depends(get_user),
+    use_cache: bool = True,
+    run_from: list[UUID] | None = Query(default=None),
+    on_active: ActiveRunPolicy | None = None,
+    idempotency_key: str | None = Header(default=None, max_length=100),
+    user: User = Depends(get_user),
+    db: Session = Depends(get_database),
 ):
     if not project_id:
         raise HTTPException(status_code=422, detail="Project ID missing")
 
     try:
         workflow_controller.validate_workflow(project_id)
-        dag_id = workflow_controller.translate_project_to_dag(project_id)
-        # Make sure airflow has enough time to create the dag internally
-        if not workflow_controller.wait_for_dag_registration(dag_id):
-            logging.error(f"DAG {dag_id} was not registered in time.")
-            raise HTTPException(
-                status_code=500,
-                detail="DAG was not registered in time.",
+        triggered = run_controller.trigger_run(
+            db,
+            project_id,
+            triggered_by=user.uuid,
+            use_cache=use_cache,
+            run_from=run_from,
+            idempotency_key=idempotency_key,
+            policy=on_active,
+        )
+
+        if not triggered.coalesced:
+            run_controller.publish(
+                run_controller.get_run_snapshot(project_id, db),
+            )
+        return TriggerWorkflowResponse(
+            dag_run_id=triggered.dag_run_id,
+            coalesced=triggered.coalesced,
+            cancelled=triggered.cancelled,
+            deferred=triggered.deferred,
+        )
+    except Exception as e:
+        raise handle_error(e)
+
+
+@router.get("/runs/{project_id}", response_model=WorkflowRunPage)
+def list_workflow_runs(
+    project_id: UUID,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+    _: User = Depends(get_user),
+    db: Session = Depends(get_database),
+):
+    """Returns the run history of the project, newest run first."""
+    try:
+        runs, block_runs, next_cursor = run_controller.list_runs(
+            project_id,
+            limit,
+            cursor,
+            db,
+        )
+        return WorkflowRunPage(
+            runs=[
+                WorkflowRunDTO.from_workflow_run(
+                    run,
+                    block_runs.get(run.dag_run_id, []),
+                )
+                for run in runs
+            ],
+            next_cursor=next_cursor,
+        )
+    except Exception as e:
+        logging.exception(f"Error listing workflow runs: {e}")
+        raise handle_error(e)
+
+
+@router.get(
+    "/runs/{project_id}/{dag_run_id}/profile",
+    response_model=WorkflowRunProfile,
+)
+def profile_workflow_run(
+    project_id: UUID,
+    dag_run_id: str,
+    _: User = Depends(get_user),
+    db: Session = Depends(get_database),
+):
+    """
+    Returns where a run spent its time, to find the blocks worth
+    optimizing or splitting.
+    """
+    try:
+        return run_controller.profile_run(db, project_id, dag_run_id)
+    except Exception as e:
+        logging.exception(f"Error profiling workflow run: {e}")
+        raise handle_error(e)
+
+
+@router.post("/{project_id}/run_events", status_code=204)
+def report_run_event(
+    project_id: UUID,
+    event: RunEventDTO,
+    background_tasks: BackgroundTasks,
+    _: UUID = Depends(verify_project_callback),
+    db: Session = Depends(get_database),
+):
+    """Receives the run and task state changes of the generated DAGs."""
+    try:
+        with db.begin():
+            recorded = run_controller.record_run_event(db, project_id, event)
+
+        if recorded:
+            run_controller.publish(
+                run_controller.get_run_snapshot(project_id, db),
+            )
+        if event.task_id is None and (
+            event.state in run_controller.FINISHED_STATES
+        ):
+            background_tasks.add_task(
+                run_controller.advance_runs, project_id
             )
-        workflow_controller.trigger_workflow_run(dag_id)
     except Exception as e:
+        logging.exception(f"Error recording run event: {e}")
         raise handle_error(e)
 
 
@@ -205,6 +388,38 @@ async def workflow_templates():
         raise handle_error(e)
 
 
+async def _disconnected(websocket: WebSocket) -> None:
+    """
+    Returns once the client disconnected, or the worker closed the socket
+    with 1012 on shutdown. Clients of the status sockets send nothing else.
+    """
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+async def _next_snapshot(queue: asyncio.Queue, disconnected: asyncio.Task):
+    """
+    Waits for the next pushed run state. States published by other workers
+    are relayed through postgres, the states are reloaded from the database
+    after a while in case a notification was lost.
+    Raises WebSocketDisconnect once the socket is closed, so shutting down
+    workers do not wait for the next state change of every socket.
+    """
+    received = asyncio.ensure_future(queue.get())
+    done, _ = await asyncio.wait(
+        (received, disconnected),
+        timeout=ENV.RUN_STATE_REFRESH_SECONDS,
+        return_when=asyncio.FIRST_COMPLETED,
+    )
+    if disconnected in done:
+        received.cancel()
+        raise WebSocketDisconnect()
+    if received in done:
+        return received.result()
+    received.cancel()
+    return None
+
+
 @router.websocket("/ws/project_status")
 async def ws_project_status(
     websocket: WebSocket,
@@ -212,29 +427,34 @@ async def ws_project_status(
 ):
     """Returns the DAG statuses."""
     await websocket.accept()
+    disconnected = asyncio.create_task(_disconnected(websocket))
 
     try:
-        while True:
-            all_dags = workflow_controller.get_all_dags()
-            dag_runs = workflow_controller.last_dag_run_overview(all_dags)
-
-            all_proj_status = {}
-
-            for di, dr in dag_runs.items():
-                project_id = workflow_controller.dag_id_to_project_id(di)
-                status = WorkflowStatus.from_airflow_state(
-                    dr.state,
+        with run_controller.subscribe() as queue:
+            while True:
+                states = await run_in_threadpool(
+                    run_controller.get_latest_run_states,
                 )
-
-                all_proj_status[project_id] = status.value
-
-            await websocket.send_json(all_proj_status)
-            await asyncio.sleep(2)
+                all_proj_status = {
+                    str(project_id): WorkflowStatus.from_airflow_state(
+                        state,
+                    ).value
+                    for project_id, state in states.items()
+                }
+                await websocket.send_json(all_proj_status)
+
+                while snapshot := await _next_snapshot(queue, disconnected):
+                    all_proj_status[str(snapshot.project_id)] = (
+                        WorkflowStatus.from_airflow_state(snapshot.state).value
+                    )
+                    await websocket.send_json(all_proj_status)
     except WebSocketDisconnect:
         logging.info("Websocket disconnected for a project")
     except Exception as e:
         logging.exception(f"Error in ws_workflow_status: {e}")
         await websocket.close(code=1011)
+    finally:
+        disconnected.cancel()
 
 
 @router.websocket("/ws/workflow_status/{project_id}")
@@ -245,14 +465,32 @@ async def ws_workflow_status(
 ):
     """Returns the status of the blocks within a workflow."""
     await websocket.accept()
+    disconnected = asyncio.create_task(_disconnected(websocket))
 
     try:
-        while True:
-            status = workflow_controller.dag_status(project_id)
-            await websocket.send_json(status)
-            await asyncio.sleep(2)
+        with run_controller.subscribe(project_id) as queue:
+            snapshot = None
+            sent = None
+            while True:
+                if snapshot is None:
+                    snapshot = await run_in_threadpool(
+                        run_controller.get_run_snapshot,
+                        project_id,
+                    )
+
+                if snapshot.fingerprint != sent:
+                    await websocket.send_json({
+                        str(block_id): BlockStatus.from_airflow_state(
+                            state,
+                        ).value
+                        for block_id, state in snapshot.blocks.items()
+                    })
+                    sent = snapshot.fingerprint
+                snapshot = await _next_snapshot(queue, disconnected)
     except WebSocketDisconnect:
         logging.info(f"Websocket disconnected for project {project_id!s}")
     except Exception as e:
         logging.exception(f"Error in ws_workflow_status: {e}")
         await websocket.close(code=1011)
+    finally:
+        disconnected.cancel()
@@ -0,0 +1,188 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+import networkx as nx
+import pytest
+
+from services.workflow_service.controllers import cache_controller
+from services.workflow_service.models.input_output import (
+    DataType,
+    InputOutputType,
+)
+
+
+def _io(type, data_type=DataType.FILE, entrypoint_uuid=None):
+    return SimpleNamespace(
+        uuid=uuid4(),
+        type=type,
+        data_type=data_type,
+        entrypoint_uuid=entrypoint_uuid,
+    )
+
+
+def _block(*outputs):
+    entrypoint_uuid = uuid4()
+    return SimpleNamespace(
+        uuid=uuid4(),
+        selected_entrypoint_uuid=entrypoint_uuid,
+        selected_entrypoint=SimpleNamespace(input_outputs=[
+            _io(InputOutputType.OUTPUT, data_type, entrypoint_uuid)
+            for data_type in outputs
+        ]),
+    )
+
+
+def _graph(*blocks, edges=(), image="image"):
+    graph = nx.DiGraph()
+    for block in blocks:
+        graph.add_node(
+            block.uuid,
+            image=image,
+            entry_name="main",
+            environment={"A": "1"},
+        )
+    graph.add_edges_from((a.uuid, b.uuid) for a, b in edges)
+    return graph
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """ETags of the files that exist, by io."""
+    files = {}
+    monkeypatch.setattr(
+        cache_controller,
+        "bulk_file_etags_from_ios",
+        lambda ios: {io.uuid: files[io.uuid] for io in ios
+                     if io.uuid in files},
+    )
+    return files
+
+
+def _keys(monkeypatch, blocks, graph, external=None):
+    external = external or {}
+    monkeypatch.setattr(
+        cache_controller,
+        "_external_inputs",
+        lambda db, blocks: {b.uuid: external.get(b.uuid, []) for b in blocks},
+    )
+    return cache_controller.compute_cache_keys(None, blocks, graph)
+
+
+def test_keys_are_stable(monkeypatch, s3):
+    a, b = _block(), _block()
+    graph = _graph(a, b, edges=[(a, b)])
+    assert _keys(monkeypatch, [a, b], graph) == _keys(
+        monkeypatch, [a, b], graph
+    )
+
+
+def test_key_changes_with_config_and_upstream(monkeypatch, s3):
+    a, b = _block(), _block()
+    keys = _keys(monkeypatch, [a, b], _graph(a, b, edges=[(a, b)]))
+    changed = _keys(
+        monkeypatch, [a, b], _graph(a, b, edges=[(a, b)], image="other")
+    )
+    assert keys[a.uuid] != changed[a.uuid]
+    # the downstream block reads different data now
+    assert keys[b.uuid] != changed[b.uuid]
+
+
+def test_key_changes_with_external_file(monkeypatch, s3):
+    a = _block()
+    data = _io(InputOutputType.INPUT)
+    s3[data.uuid] = '"v1"'
+    first = _keys(monkeypatch, [a], _graph(a), {a.uuid: [data]})
+    s3[data.uuid] = '"v2"'
+    second = _keys(monkeypatch, [a], _graph(a), {a.uuid: [data]})
+    assert first[a.uuid] != second[a.uuid]
+
+
+def test_no_key_without_input_fingerprint(monkeypatch, s3):
+    a, b = _block(), _block()
+    table = _io(InputOutputType.INPUT, DataType.DBTABLE)
+    missing = _io(InputOutputType.INPUT)
+    graph = _graph(a, b, edges=[(a, b)])
+
+    keys = _keys(monkeypatch, [a, b], graph, {a.uuid: [table]})
+    assert keys == {a.uuid: None, b.uuid: None}
+    keys = _keys(monkeypatch, [a, b], graph, {a.uuid: [missing]})
+    assert keys == {a.uuid: None, b.uuid: None}
+
+
+@pytest.fixture
+def executions(monkeypatch):
+    """Latest execution of every block, by block."""
+    latest = {}
+    monkeypatch.setattr(
+        cache_controller,
+        "_latest_executions",
+        lambda db, block_ids: {b: latest[b] for b in block_ids
+                               if b in latest},
+    )
+    return latest
+
+
+def _ran(executions, s3, block, key, state="success"):
+    executions[block.uuid] = SimpleNamespace(state=state, cache_key=key)
+    for io in block.selected_entrypoint.input_outputs:
+        s3[io.uuid] = '"etag"'
+
+
+def test_hit_on_latest_execution(executions, s3):
+    block = _block(DataType.FILE)
+    _ran(executions, s3, block, "x")
+    assert cache_controller.find_cached_blocks(
+        None, [block], {block.uuid: "x"}
+    ) == {block.uuid}
+
+
+def test_miss_if_outputs_were_overwritten(executions, s3):
+    # ran with x, then with y writing the same files, then x again
+    block = _block(DataType.FILE)
+    _ran(executions, s3, block, "y")
+    assert cache_controller.find_cached_blocks(
+        None, [block], {block.uuid: "x"}
+    ) == set()
+
+
+def test_miss_if_latest_execution_failed_or_runs(executions, s3):
+    block = _block(DataType.FILE)
+    for state in ("failed", "running"):
+        _ran(executions, s3, block, "x", state)
+        assert cache_controller.find_cached_blocks(
+            None, [block], {block.uuid: "x"}
+        ) == set()
+
+
+def test_miss_if_output_file_is_gone(executions, s3):
+    block = _block(DataType.FILE, DataType.FILE)
+    _ran(executions, s3, block, "x")
+    del s3[block.selected_entrypoint.input_outputs[1].uuid]
+    assert cache_controller.find_cached_blocks(
+        None, [block], {block.uuid: "x"}
+    ) == set()
+
+
+def test_miss_for_database_outputs(executions, s3):
+    block = _block(DataType.FILE, DataType.DBTABLE)
+    _ran(executions, s3, block, "x")
+    assert cache_controller.find_cached_blocks(
+        None, [block], {block.uuid: "x"}
+    ) == set()
+
+
+def test_miss_without_key(executions, s3):
+    block = _block(DataType.FILE)
+    _ran(executions, s3, block, None)
+    assert cache_controller.find_cached_blocks(
+        None, [block], {block.uuid: None}
+    ) == set()
+
+
+def test_results_regardless_of_key(executions, s3):
+    block, failed = _block(DataType.FILE), _block(DataType.FILE)
+    _ran(executions, s3, block, "y")
+    _ran(executions, s3, failed, "y", "failed")
+    assert cache_controller.find_blocks_with_results(
+        None, [block, failed], {block.uuid, failed.uuid}
+    ) == {block.uuid}
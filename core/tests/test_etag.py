@@ -0,0 +1,50 @@
+from uuid import UUID
+
+from utils.data.file_handling import (
+    PRESIGNED_URL_EXPIRATION,
+    presigned_url_epoch,
+)
+from utils.http.etag import etag_matches, project_etag
+
+PROJECT_ID = UUID("00000000-0000-0000-0000-000000000001")
+
+
+def test_project_etag_includes_state():
+    assert project_etag(PROJECT_ID, 3) == f'"{PROJECT_ID}-3"'
+    assert project_etag(PROJECT_ID, 3, "abc") == f'"{PROJECT_ID}-3-abc"'
+
+
+def test_etag_matches_exact_and_weak():
+    etag = project_etag(PROJECT_ID, 3)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f"W/{etag}", etag)
+
+
+def test_etag_matches_any_of_a_list():
+    etag = project_etag(PROJECT_ID, 3)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert not etag_matches('"other", "another"', etag)
+
+
+def test_etag_matches_wildcard():
+    assert etag_matches("*", project_etag(PROJECT_ID, 3))
+
+
+def test_etag_does_not_match_other_version_or_state():
+    assert not etag_matches(
+        project_etag(PROJECT_ID, 2), project_etag(PROJECT_ID, 3)
+    )
+    assert not etag_matches(
+        project_etag(PROJECT_ID, 3, "a"), project_etag(PROJECT_ID, 3, "b")
+    )
+
+
+def test_etag_does_not_match_without_header():
+    assert not etag_matches(None, project_etag(PROJECT_ID, 3))
+    assert not etag_matches("", project_etag(PROJECT_ID, 3))
+
+
+def test_presigned_url_epoch_changes_within_the_expiration():
+    half = PRESIGNED_URL_EXPIRATION // 2
+    assert presigned_url_epoch(0) == presigned_url_epoch(half - 1)
+    assert presigned_url_epoch(half) == presigned_url_epoch(0) + 1
@@ -0,0 +1,115 @@
+from uuid import uuid4
+
+import pytest
+
+from services.workflow_service.controllers import graph_controller
+from services.workflow_service.controllers.graph_controller import ProjectGraph
+
+
+@pytest.fixture
+def blocks():
+    return [uuid4() for _ in range(4)]
+
+
+def test_acyclic_graph(blocks):
+    a, b, c, d = blocks
+    graph = ProjectGraph(1, blocks, [(a, b), (b, c), (a, c)])
+    assert graph.acyclic
+
+
+def test_cyclic_graph(blocks):
+    a, b, c, _ = blocks
+    graph = ProjectGraph(1, blocks, [(a, b), (b, c), (c, a)])
+    assert not graph.acyclic
+
+
+def test_removing_the_cycle_makes_the_graph_acyclic(blocks):
+    a, b, c, _ = blocks
+    graph = ProjectGraph(1, blocks, [(a, b), (b, c), (c, a)])
+    assert not graph.acyclic
+    graph.remove_edge(c, a)
+    assert graph.acyclic
+
+
+def test_reaches_follows_downstream_edges_only(blocks):
+    a, b, c, d = blocks
+    graph = ProjectGraph(1, blocks, [(a, b), (b, c)])
+    assert graph.reaches(a, c)
+    assert graph.reaches(a, a)
+    assert not graph.reaches(c, a)
+    assert not graph.reaches(a, d)
+
+
+def test_components_are_joined_by_edges(blocks):
+    a, b, c, d = blocks
+    graph = ProjectGraph(1, blocks, [(a, b)])
+    assert graph.component_count() == 3
+    assert not graph.is_connected()
+
+    graph.add_edge(b, c)
+    graph.add_edge(d, c)
+    assert graph.component_count() == 1
+    assert graph.is_connected()
+
+
+def test_removing_an_edge_splits_components(blocks):
+    a, b, c, d = blocks
+    graph = ProjectGraph(1, blocks, [(a, b), (b, c), (c, d)])
+    assert graph.is_connected()
+
+    graph.remove_edge(b, c)
+    assert graph.component_count() == 2
+
+
+def test_parallel_edges_are_counted(blocks):
+    a, b, _, _ = blocks
+    # two io connections between the same blocks
+    graph = ProjectGraph(1, blocks, [(a, b), (a, b)])
+    graph.remove_edge(a, b)
+    assert graph.reaches(a, b)
+    graph.remove_edge(a, b)
+    assert not graph.reaches(a, b)
+
+
+def test_copy_does_not_share_edges(blocks):
+    a, b, c, _ = blocks
+    graph = ProjectGraph(1, blocks, [(a, b)])
+    graph.component_count()
+    copy = graph.copy()
+    copy.add_edge(b, c)
+    assert copy.reaches(a, c)
+    assert not graph.reaches(a, c)
+    assert graph.component_count() == 3
+
+
+def test_critical_path(blocks):
+    a, b, c, d = blocks
+    graph = ProjectGraph(1, blocks, [(a, b), (a, c), (b, d), (c, d)])
+    path, total = graph.critical_path({a: 1, b: 5, c: 2, d: 1})
+    assert path == [a, b, d]
+    assert total == 7
+
+
+@pytest.fixture
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(graph_controller, "_cache", type(
+        graph_controller._cache
+    )())
+    monkeypatch.setattr(graph_controller, "_CACHE_SIZE", 2)
+
+
+def test_cache_drops_least_recently_used(empty_cache):
+    first, second, third = uuid4(), uuid4(), uuid4()
+    graph_controller._cache_graphs({first: ProjectGraph(1, [], [])})
+    graph_controller._cache_graphs({second: ProjectGraph(1, [], [])})
+    graph_controller._cache.move_to_end(first)
+    graph_controller._cache_graphs({third: ProjectGraph(1, [], [])})
+    assert list(graph_controller._cache) == [first, third]
+
+
+def test_drop_project_graph(empty_cache):
+    project_id = uuid4()
+    graph_controller._cache_graphs({project_id: ProjectGraph(1, [], [])})
+    graph_controller.drop_project_graph(project_id)
+    graph_controller.drop_project_graph(project_id)
+    assert project_id not in graph_controller._cache
@@ -0,0 +1,102 @@
+import pytest
+
+from utils.http import outbound
+from utils.http.outbound import CircuitBreaker, ServiceUnavailable
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(outbound.time, "monotonic", clock.monotonic)
+    return clock
+
+
+@pytest.fixture
+def circuit(clock):
+    return CircuitBreaker("service", failure_threshold=3, reset_seconds=30)
+
+
+def _fail(circuit, times=1):
+    for _ in range(times):
+        circuit.acquire()
+        circuit.failure(RuntimeError("down"))
+
+
+def test_stays_closed_below_threshold(circuit):
+    _fail(circuit, 2)
+    assert circuit.state == "closed"
+    circuit.acquire()
+
+
+def test_success_resets_failures(circuit):
+    _fail(circuit, 2)
+    circuit.success()
+    _fail(circuit, 2)
+    assert circuit.state == "closed"
+
+
+def test_opens_at_threshold(circuit, clock):
+    _fail(circuit, 3)
+    assert circuit.state == "open"
+
+    clock.now += 10
+    with pytest.raises(ServiceUnavailable) as e:
+        circuit.acquire()
+    assert e.value.headers["Retry-After"] == "20"
+
+
+def test_half_open_lets_one_probe_through(circuit, clock):
+    _fail(circuit, 3)
+    clock.now += 30
+    assert circuit.state == "half_open"
+
+    circuit.acquire()
+    with pytest.raises(ServiceUnavailable):
+        circuit.acquire()
+
+
+def test_successful_probe_closes(circuit, clock):
+    _fail(circuit, 3)
+    clock.now += 30
+    circuit.acquire()
+    circuit.success()
+    assert circuit.state == "closed"
+    assert circuit.failures == 0
+    circuit.acquire()
+
+
+def test_failed_probe_opens_again(circuit, clock):
+    _fail(circuit, 3)
+    clock.now += 30
+    _fail(circuit)
+    assert circuit.state == "open"
+
+    clock.now += 29
+    with pytest.raises(ServiceUnavailable):
+        circuit.acquire()
+
+
+def test_released_probe_lets_the_next_through(circuit, clock):
+    _fail(circuit, 3)
+    clock.now += 30
+    circuit.acquire()
+    circuit.release()
+    assert circuit.state == "half_open"
+    circuit.acquire()
+
+
+def test_status(circuit):
+    _fail(circuit, 3)
+    assert circuit.status() == {
+        "state": "open",
+        "failures": 3,
+        "last_error": "down",
+    }
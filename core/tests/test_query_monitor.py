@@ -0,0 +1,92 @@
+import logging
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from utils.config.environment import ENV
+from utils.database import query_monitor
+from utils.database.query_monitor import (
+    QueryBudgetExceeded,
+    monitor_engine,
+    monitor_queries,
+    statement_shape,
+)
+
+ROUTE = "/project/{project_id}"
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(ENV, "QUERY_BUDGETS", {ROUTE: 3})
+    engine = create_engine("sqlite://")
+    monitor_engine(engine)
+    yield engine
+    engine.dispose()
+
+
+def _select(engine, *values):
+    with engine.connect() as connection:
+        for value in values:
+            connection.execute(text("SELECT :value"), {"value": value})
+
+
+def test_statement_shape_replaces_parameters():
+    assert statement_shape(
+        "SELECT * FROM projects WHERE uuid = %(uuid_1)s"
+    ) == "SELECT * FROM projects WHERE uuid = ?"
+    assert statement_shape(
+        "SELECT * FROM projects WHERE uuid = $1 AND name = $2"
+    ) == "SELECT * FROM projects WHERE uuid = ? AND name = ?"
+
+
+def test_statement_shape_collapses_in_lists():
+    # expanded IN lists differ by their number of values only
+    assert statement_shape(
+        "SELECT * FROM blocks WHERE uuid IN (%(uuid_1_1)s, %(uuid_1_2)s)"
+    ) == statement_shape(
+        "SELECT * FROM blocks WHERE uuid IN ($1, $2, $3)"
+    ) == "SELECT * FROM blocks WHERE uuid IN (?)"
+
+
+def test_statement_shape_collapses_whitespace():
+    assert statement_shape(
+        "SELECT *\n  FROM projects\n\tWHERE uuid = $1 "
+    ) == "SELECT * FROM projects WHERE uuid = ?"
+
+
+def test_repeats_with_different_parameters_are_reported(engine, caplog):
+    with monitor_queries({"path": ROUTE}) as queries:
+        _select(engine, *range(ENV.QUERY_REPEAT_THRESHOLD))
+
+    with caplog.at_level(logging.WARNING):
+        query_monitor._report("GET", queries)
+    assert "Possible N+1 on GET /project/{project_id}" in caplog.text
+
+
+def test_repeats_with_the_same_parameters_are_not_reported(engine, caplog):
+    with monitor_queries({"path": ROUTE}) as queries:
+        _select(engine, *[1] * ENV.QUERY_REPEAT_THRESHOLD)
+
+    with caplog.at_level(logging.WARNING):
+        query_monitor._report("GET", queries)
+    assert queries.count == ENV.QUERY_REPEAT_THRESHOLD
+    assert "Possible N+1" not in caplog.text
+
+
+def test_statements_within_the_budget(engine, query_budget):
+    with query_budget(ROUTE) as queries:
+        _select(engine, 1, 2, 3)
+    assert queries.count == 3
+
+
+def test_statements_over_the_budget(engine, query_budget):
+    with pytest.raises(AssertionError, match="its budget is 3"):
+        with query_budget(ROUTE):
+            _select(engine, 1, 2, 3, 4)
+
+
+def test_strict_budget_fails_the_statement(engine, monkeypatch):
+    monkeypatch.setattr(ENV, "QUERY_BUDGET_STRICT", True)
+    with monitor_queries({"path": ROUTE}):
+        with pytest.raises(QueryBudgetExceeded):
+            _select(engine, 1, 2, 3, 4)
@@ -0,0 +1,89 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from services.workflow_service.controllers import run_controller
+
+
+@pytest.fixture
+def notified(monkeypatch):
+    """Payloads sent to the other workers, by channel."""
+    sent = []
+    monkeypatch.setattr(
+        run_controller.notifications,
+        "notify",
+        lambda channel, payload: sent.append((channel, payload)),
+    )
+    return sent
+
+
+@pytest.fixture
+def reloaded(monkeypatch):
+    """Projects whose run states were reloaded for a relayed state."""
+    projects = []
+    monkeypatch.setattr(run_controller, "_deliver_latest", projects.append)
+    return projects
+
+
+def _snapshot(project_id):
+    return run_controller.RunSnapshot(project_id, "run", "running", {})
+
+
+def test_publish_delivers_and_notifies_the_other_workers(notified):
+    project_id = uuid4()
+
+    async def publish():
+        with run_controller.subscribe(project_id) as queue:
+            await asyncio.to_thread(
+                run_controller.publish, _snapshot(project_id)
+            )
+            return await asyncio.wait_for(queue.get(), 1)
+
+    assert asyncio.run(publish()) == _snapshot(project_id)
+    assert notified == [(
+        run_controller.RUN_STATES_CHANNEL,
+        f"{run_controller._publisher_id()} {project_id}",
+    )]
+
+
+def test_publish_survives_a_failed_notification(monkeypatch):
+    def notify(channel, payload):
+        raise OperationalError("SELECT pg_notify", {}, Exception("down"))
+
+    monkeypatch.setattr(run_controller.notifications, "notify", notify)
+    run_controller.publish(_snapshot(uuid4()))
+
+
+def _relay(payload, subscribed_to):
+    async def relay():
+        with run_controller.subscribe(subscribed_to):
+            run_controller._relayed(payload)
+            # let the executor pick up the reload
+            await asyncio.sleep(0.1)
+
+    asyncio.run(relay())
+
+
+def test_relayed_states_are_reloaded_for_subscribers(reloaded):
+    project_id = uuid4()
+    _relay(f"other-host:1 {project_id}", project_id)
+    assert reloaded == [project_id]
+
+
+def test_relayed_states_reach_subscribers_of_all_projects(reloaded):
+    project_id = uuid4()
+    _relay(f"other-host:1 {project_id}", None)
+    assert reloaded == [project_id]
+
+
+def test_relayed_states_without_subscribers_are_ignored(reloaded):
+    _relay(f"other-host:1 {uuid4()}", uuid4())
+    assert reloaded == []
+
+
+def test_own_states_are_not_relayed_again(reloaded):
+    project_id = uuid4()
+    _relay(f"{run_controller._publisher_id()} {project_id}", project_id)
+    assert reloaded == []
@@ -0,0 +1,21 @@
+import subprocess
+import sys
+
+from benchmarks.run import CORE_DIRECTORY
+from benchmarks.startup import DEFERRED
+
+
+def test_deferred_packages_are_not_imported_at_startup():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, main; print(' '.join(sys.modules))",
+        ],
+        cwd=CORE_DIRECTORY,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = set(result.stdout.split())
+    assert modules.isdisjoint(DEFERRED)
@@ -0,0 +1,64 @@
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from utils.config.environment import ENV
+from utils.security.token import (
+    check_callback_secret,
+    image_callback_token,
+    project_callback_token,
+    verify_image_callback,
+    verify_project_callback,
+)
+
+
+def _bearer(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def test_project_callback_token_is_verified():
+    project_id = uuid4()
+    token = project_callback_token(project_id)
+    assert verify_project_callback(project_id, _bearer(token)) == project_id
+
+
+def test_project_callback_token_of_other_project_is_rejected():
+    token = project_callback_token(uuid4())
+    with pytest.raises(HTTPException) as e:
+        verify_project_callback(uuid4(), _bearer(token))
+    assert e.value.status_code == 401
+
+
+def test_project_callback_token_depends_on_secret(monkeypatch):
+    project_id = uuid4()
+    token = project_callback_token(project_id)
+    monkeypatch.setattr(ENV, "AIRFLOW_CALLBACK_SECRET", "another")
+    assert project_callback_token(project_id) != token
+    with pytest.raises(HTTPException):
+        verify_project_callback(project_id, _bearer(token))
+
+
+def test_image_callback_token_is_verified():
+    verify_image_callback(_bearer(image_callback_token()))
+
+
+def test_project_callback_token_is_no_image_callback_token():
+    with pytest.raises(HTTPException) as e:
+        verify_image_callback(_bearer(project_callback_token(uuid4())))
+    assert e.value.status_code == 401
+
+
+def test_default_callback_secret_fails_outside_development(monkeypatch):
+    monkeypatch.setattr(ENV, "AIRFLOW_CALLBACK_SECRET", "secret")
+    monkeypatch.setattr(ENV, "DEVELOPMENT", False)
+    with pytest.raises(RuntimeError):
+        check_callback_secret()
+
+    monkeypatch.setattr(ENV, "DEVELOPMENT", True)
+    check_callback_secret()
+
+    monkeypatch.setattr(ENV, "DEVELOPMENT", False)
+    monkeypatch.setattr(ENV, "AIRFLOW_CALLBACK_SECRET", "configured")
+    check_callback_secret()
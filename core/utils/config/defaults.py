@@ -7,13 +7,19 @@ from uuid import UUID, uuid4
 from utils.config.environment import ENV
 
 from services.workflow_service.models.input_output import InputOutput, DataType
-from scystream.sdk.env.settings import DatabaseSettings, FileSettings
 
 
-SETTINGS_CLASS = {
-    DataType.FILE: FileSettings,
-    DataType.DBTABLE: DatabaseSettings,
-}
+def settings_class(data_type: DataType) -> type | None:
+    """
+    The SDK settings of the data type, which name the keys of its configs.
+    The SDK is imported on first use, it is slow to import.
+    """
+    from scystream.sdk.env.settings import DatabaseSettings, FileSettings
+
+    return {
+        DataType.FILE: FileSettings,
+        DataType.DBTABLE: DatabaseSettings,
+    }.get(data_type)
 
 
 def _normalize_uuid(value: UUID | str) -> str:
@@ -141,8 +147,7 @@ def extract_default_keys_from_io(io: InputOutput):
         S3_HOST: test
     }
     """
-    settings_class = SETTINGS_CLASS.get(io.data_type)
-    default_keys = set(settings_class.__annotations__.keys())
+    default_keys = set(settings_class(io.data_type).__annotations__.keys())
     return {
         dk: value
         for key, value in io.config.items()
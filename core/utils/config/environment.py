@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,6 +12,10 @@ class Settings(BaseSettings):
     DATABASE_USER: str = "core"
     DATABASE_PASSWORD: str = "core"
     DATABASE_PORT: int = 5432
+    DATABASE_ASYNC: bool = False
+    # connections of all workers and engines together, see connection.py
+    DATABASE_POOL_SIZE: int = 40
+    DATABASE_MAX_OVERFLOW: int = 40
     EMAIL_DOMAIN_WHITELIST: list[str] = ["time.rwth-aachen.de"]
 
     LOG_LEVEL: str = "INFO"
@@ -48,6 +54,25 @@ class Settings(BaseSettings):
     AIRFLOW_USER: str = "airflow"
     AIRFLOW_PASS: str = "airflow"
     AIRFLOW_DAG_DIR: str = "../airflow-dags"
+    # python: one generated DAG file per project, spec: one JSON spec per
+    # project, materialized by a single DAG factory file
+    AIRFLOW_DAG_MODE: Literal["python", "spec"] = "python"
+    # core as reachable from airflow, used by the DAGs to report run states
+    AIRFLOW_CALLBACK_URL: str = "http://core"
+    AIRFLOW_CALLBACK_SECRET: str = "secret"
+    RUN_STATE_REFRESH_SECONDS: float = 30
+    RUN_SYNC_INTERVAL_SECONDS: float = 60
+    BLOCK_RESULT_CACHE: bool = True
+    # triggering a project with an active run: reject with 409, queue a run
+    # starting after it, or cancel the active run
+    TRIGGER_ACTIVE_RUN_POLICY: Literal[
+        "reject", "queue", "cancel_previous"
+    ] = "queue"
+    # triggers this soon after another one join its run, e.g. double clicks
+    TRIGGER_COALESCE_SECONDS: float = 5
+    # pull the images of new compute blocks on the airflow workers ahead of
+    # their first run
+    IMAGE_PREWARM: bool = True
 
     REPO_CACHE_DIR: str = "repos"
     WORKFLOW_TEMPLATE_REPO: str = (
@@ -60,6 +85,54 @@ class Settings(BaseSettings):
     KEYCLOAK_CLIENT_SECRET: str = "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
     KEYCLOAK_REDIRECT_URL: str | None = None
 
+    # expose the in-process metrics on /metrics
+    METRICS_ENABLED: bool = True
+
+    # where finished request traces are written to, none disables tracing
+    TRACING_EXPORTER: Literal["none", "log", "json"] = "none"
+    TRACING_FILE: str = "traces.jsonl"
+    TRACING_MIN_DURATION_MS: float = 0
+
+    # development aid, logs N+1 patterns and routes exceeding their budget
+    # of database statements, strict fails those requests
+    QUERY_MONITOR: bool = False
+    QUERY_REPEAT_THRESHOLD: int = 5
+    QUERY_BUDGET: int = 0
+    # budgets of single routes, e.g. {"/project/{project_id}": 10}
+    QUERY_BUDGETS: dict[str, int] = {}
+    QUERY_BUDGET_STRICT: bool = False
+    # log statements taking at least this long, 0 disables the log
+    SLOW_QUERY_MS: float = 0
+
+    # requests sent with the X-Profile header set to this token are
+    # profiled, empty disables profiling
+    PROFILING_TOKEN: str = ""
+    PROFILING_DIR: str = "profiles"
+    PROFILING_INTERVAL_MS: float = 2
+    # capture the N slowest requests per route, 0 disables the capture
+    PROFILING_SLOWEST: int = 0
+    PROFILING_SLOWEST_WINDOW_SECONDS: float = 3600
+
+    # production server, see gunicorn.conf.py. 0 workers starts one per CPU,
+    # up to 8
+    SERVER_WORKERS: int = 0
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 25
+    # interval in which workers try to take over the background tasks run
+    # by a single worker, and the holder checks it still holds them
+    SINGLETON_RETRY_SECONDS: float = 10
+
+    # outbound calls to airflow, keycloak and the mail service
+    AIRFLOW_TIMEOUT_SECONDS: float = 10
+    KEYCLOAK_TIMEOUT_SECONDS: float = 5
+    MAIL_TIMEOUT_SECONDS: float = 10
+    OUTBOUND_RETRIES: int = 2
+    OUTBOUND_BACKOFF_SECONDS: float = 0.2
+    CIRCUIT_BREAKER_FAILURES: int = 5
+    CIRCUIT_BREAKER_RESET_SECONDS: float = 30
+    # users verified this recently are still accepted while keycloak is
+    # unavailable
+    KEYCLOAK_FALLBACK_SECONDS: float = 300
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
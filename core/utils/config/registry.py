@@ -2,8 +2,10 @@ import logging
 from pathlib import Path
 from urllib.parse import urlparse
 from utils.config.environment import ENV
+from utils.http.outbound import record_call
+from utils.tracing import tracer
 import os
-from git import Repo
+import time
 import subprocess
 from fastapi import HTTPException
 
@@ -69,20 +71,26 @@ class RepoRegistry:
         else:
             # If repo not cached, clone and return path
             try:
+                from git import Repo
+
                 logging.info(f"Repo {repo_url} not cached, cloning...")
-                Repo.clone_from(
-                    repo_url,
-                    path,
-                    multi_options=[
-                        "--depth=1",
-                        "-c",
-                        "core.sshCommand=ssh -o StrictHostKeyChecking=no"
-                    ],
-                    allow_unsafe_options=True
-                )
+                start = time.perf_counter()
+                with tracer.span("git.clone", repo=repo_url):
+                    Repo.clone_from(
+                        repo_url,
+                        path,
+                        multi_options=[
+                            "--depth=1",
+                            "-c",
+                            "core.sshCommand=ssh -o StrictHostKeyChecking=no"
+                        ],
+                        allow_unsafe_options=True
+                    )
+                record_call("git", start, "ok")
 
                 return str(path)
             except subprocess.CalledProcessError as e:
+                record_call("git", start, "unavailable")
                 logging.error(
                     f"Could not clone the repository {repo_url}: {e}"
                 )
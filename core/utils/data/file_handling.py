@@ -1,9 +1,14 @@
-import boto3
+from __future__ import annotations
+
 import logging
+import time
 from collections import defaultdict
+from typing import TYPE_CHECKING
 from uuid import UUID
 
 from utils.config.environment import ENV
+from utils.http.outbound import record_call
+from utils.tracing import tracer
 from services.workflow_service.models.input_output import InputOutput, DataType
 from utils.config.defaults import (
     get_file_cfg_defaults_dict, extract_default_keys_from_io
@@ -11,9 +16,45 @@ from utils.config.defaults import (
 from botocore.exceptions import (
     EndpointConnectionError,
     NoCredentialsError,
-    BotoCoreError
+    BotoCoreError,
+    ClientError,
 )
-from botocore.client import BaseClient, ClientError
+
+if TYPE_CHECKING:
+    from botocore.client import BaseClient
+
+PRESIGNED_URL_EXPIRATION = 86400  # 1 day
+
+
+def _start_s3_call(model, context, **_):
+    context["scystream_start"] = time.perf_counter()
+    context["scystream_span"] = tracer.start_span(
+        "s3.call", operation=model.name
+    )
+
+
+def _finish_s3_span(context, error: Exception | None = None, **attributes):
+    span = context.pop("scystream_span", None)
+    if span is not None:
+        span.attributes.update(attributes)
+        span.finish(error)
+
+
+def _record_s3_call(http_response, context, **_):
+    if "scystream_start" in context:
+        outcome = "ok"
+        if http_response.status_code >= 500:
+            outcome = "unavailable"
+        elif http_response.status_code >= 400:
+            outcome = "client_error"
+        record_call("s3", context["scystream_start"], outcome)
+    _finish_s3_span(context, status=http_response.status_code)
+
+
+def _record_s3_error(context, exception, **_):
+    if "scystream_start" in context:
+        record_call("s3", context["scystream_start"], "unavailable")
+    _finish_s3_span(context, exception)
 
 
 def get_s3_client(
@@ -21,13 +62,20 @@ def get_s3_client(
     access_key: str,
     secret_key: str
 ) -> BaseClient | None:
+    # boto3 loads its service models on import, only S3 users pay for it
+    import boto3
+
     try:
-        return boto3.client(
+        client = boto3.client(
             "s3",
             endpoint_url=s3_url,
             aws_access_key_id=access_key,
             aws_secret_access_key=secret_key
         )
+        client.meta.events.register("before-call.s3", _start_s3_call)
+        client.meta.events.register("after-call.s3", _record_s3_call)
+        client.meta.events.register("after-call-error.s3", _record_s3_error)
+        return client
     except EndpointConnectionError as e:
         logging.warning(f"Cannot reach S3 endpoint {s3_url}: {e}")
     except NoCredentialsError:
@@ -64,7 +112,7 @@ def generate_presigned_url(
     client,
     bucket_name: str,
     file_path: str,
-    expiration: int = 86400  # 1 day
+    expiration: int = PRESIGNED_URL_EXPIRATION
 ):
     try:
         url = client.generate_presigned_url(
@@ -78,6 +126,17 @@ def generate_presigned_url(
             f"Error generating pre-signed URL for {file_path}: {e}")
 
 
+def presigned_url_epoch(now: float | None = None) -> int:
+    """
+    Numbers the periods of half the expiration of presigned URLs. Responses
+    holding presigned URLs change with the period, so a cached response
+    holds URLs that are valid for at least half their expiration.
+    """
+    if now is None:
+        now = time.time()
+    return int(now // (PRESIGNED_URL_EXPIRATION // 2))
+
+
 def get_minio_url(
     s3_host: str,
     s3_port: int
@@ -111,13 +170,12 @@ REQUIRED_CONFIG_KEYS = {
 }
 
 
-def bulk_presigned_urls_from_ios(ios: list[InputOutput]) -> dict[UUID, str]:
+def _file_ios_by_client(ios: list[InputOutput]):
     """
-    Generates presigned URLs for FILE-type InputOutputs.
+    Yields an S3 client and the FILE-type InputOutputs with their config
+    for every distinct S3 config, so clients are reused.
     Skips IOs with missing config values.
-    Optimized by grouping IOs by S3 config to reuse clients.
     """
-    result = {}
     io_groups = defaultdict(list)
 
     for io in ios:
@@ -153,6 +211,18 @@ def bulk_presigned_urls_from_ios(ios: list[InputOutput]) -> dict[UUID, str]:
             logging.warning(f"Could not create S3 client for {host}:{port}")
             continue
 
+        yield client, group
+
+
+def bulk_presigned_urls_from_ios(ios: list[InputOutput]) -> dict[UUID, str]:
+    """
+    Generates presigned URLs for FILE-type InputOutputs.
+    Skips IOs with missing config values.
+    Optimized by grouping IOs by S3 config to reuse clients.
+    """
+    result = {}
+
+    for client, group in _file_ios_by_client(ios):
         for io, cfg in group:
             full_file_path = find_file(
                 client,
@@ -179,11 +249,40 @@ def bulk_presigned_urls_from_ios(ios: list[InputOutput]) -> dict[UUID, str]:
     return result
 
 
+def bulk_file_etags_from_ios(ios: list[InputOutput]) -> dict[UUID, str]:
+    """
+    Returns the S3 ETags of the files of FILE-type InputOutputs, which
+    change whenever the content of a file changes.
+    IOs whose file does not exist are missing in the result.
+    """
+    result = {}
+
+    for client, group in _file_ios_by_client(ios):
+        for io, cfg in group:
+            object_key = (
+                f"{cfg['FILE_PATH'].strip('/')}/{cfg['FILE_NAME']}."
+                f"{cfg['FILE_EXT']}"
+            )
+            try:
+                head = client.head_object(
+                    Bucket=cfg["BUCKET_NAME"],
+                    Key=object_key,
+                )
+                result[io.uuid] = head["ETag"]
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "404":
+                    logging.error(
+                        f"Error reading ETag of {object_key}: {e}"
+                    )
+
+    return result
+
+
 def get_presigned_post_url(
     client,
     bucket_name: str,
     file_name: str,
-    expiration: int = 86400  # 1 day
+    expiration: int = PRESIGNED_URL_EXPIRATION
 ) -> str:
     """
     This function generates and returns a put url for a file to be
@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -9,9 +10,37 @@ SQLALCHEMY_DATABASE_URL = (
     f"@{ENV.DATABASE_HOST}:{ENV.DATABASE_PORT}/{ENV.DATABASE_NAME}"
 )
 
+SQLALCHEMY_ASYNC_DATABASE_URL = (
+    f"postgresql+asyncpg://{ENV.DATABASE_USER}:{ENV.DATABASE_PASSWORD}"
+    f"@{ENV.DATABASE_HOST}:{ENV.DATABASE_PORT}/{ENV.DATABASE_NAME}"
+)
+
+# the connections are split among the workers of the production server,
+# which sets SERVER_WORKERS, and the engines of each worker
+_pools = (ENV.SERVER_WORKERS or 1) * (2 if ENV.DATABASE_ASYNC else 1)
+POOL_SIZE = max(ENV.DATABASE_POOL_SIZE // _pools, 1)
+MAX_OVERFLOW = max(ENV.DATABASE_MAX_OVERFLOW // _pools, 0)
+
 # db connection
-engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_size=20, max_overflow=30)
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW
+)
 
 SessionLocal = sessionmaker(bind=engine)
 
+# optional asyncpg connection, used by the read-heavy endpoints
+async_engine = (
+    create_async_engine(
+        SQLALCHEMY_ASYNC_DATABASE_URL,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+    )
+    if ENV.DATABASE_ASYNC
+    else None
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, expire_on_commit=False
+)
+
 Base = declarative_base()
@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import logging
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import Connection, func, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from utils.config.environment import ENV
+from utils.database.connection import engine
+
+
+def advisory_lock_key(name: str) -> int:
+    """Maps a lock name onto the signed 64 bit key of postgres locks."""
+    return int.from_bytes(
+        hashlib.blake2b(name.encode(), digest_size=8).digest(),
+        "big",
+        signed=True,
+    )
+
+
+def advisory_xact_lock(db: Session, name: str) -> None:
+    """
+    Blocks until the lock is held by the current transaction of db. It is
+    released on commit or rollback, and is shared by all workers using the
+    same database.
+    """
+    db.execute(select(func.pg_advisory_xact_lock(advisory_lock_key(name))))
+
+
+def _try_session_lock(key: int) -> Connection | None:
+    """
+    The connection holding the lock, None if another session holds it. The
+    lock is held until it is released, or the connection is lost.
+    """
+    connection = engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT"
+    )
+    try:
+        locked = connection.scalar(select(func.pg_try_advisory_lock(key)))
+    except Exception:
+        connection.close()
+        raise
+    if not locked:
+        connection.close()
+        return None
+    return connection
+
+
+def _is_alive(connection: Connection) -> bool:
+    try:
+        connection.scalar(select(1))
+        return True
+    except DBAPIError:
+        return False
+
+
+def _release_session_lock(connection: Connection, key: int) -> None:
+    try:
+        connection.scalar(select(func.pg_advisory_unlock(key)))
+    except DBAPIError:
+        # the session is gone, and its locks with it
+        connection.invalidate()
+    finally:
+        connection.close()
+
+
+async def _hold(name: str, connection: Connection, task: asyncio.Task) -> None:
+    """Waits for the task, stops it if the lock connection is lost."""
+    while not task.done():
+        await asyncio.wait({task}, timeout=ENV.SINGLETON_RETRY_SECONDS)
+        if not task.done() and not await asyncio.to_thread(
+            _is_alive, connection
+        ):
+            logging.warning(f"Lost the lock of {name}, stopping it")
+            return
+
+
+async def run_singleton(
+    name: str, run: Callable[[], Awaitable[None]]
+) -> None:
+    """
+    Runs the background task in only one of the processes using the
+    database, e.g. the workers of the production server, by holding the
+    advisory lock name while it runs. The other processes try to take it
+    over every SINGLETON_RETRY_SECONDS, so it moves on once its worker
+    stopped or lost the database. Runs until cancelled.
+    """
+    key = advisory_lock_key(name)
+    while True:
+        try:
+            connection = await asyncio.to_thread(_try_session_lock, key)
+        except DBAPIError as e:
+            logging.warning(f"Could not take the lock of {name}: {e}")
+            connection = None
+        if connection is None:
+            await asyncio.sleep(ENV.SINGLETON_RETRY_SECONDS)
+            continue
+
+        logging.info(f"Running {name} in this worker")
+        task = asyncio.create_task(run())
+        try:
+            await _hold(name, connection, task)
+        finally:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception:
+                logging.exception(f"{name} failed")
+            await asyncio.to_thread(_release_session_lock, connection, key)
+        await asyncio.sleep(ENV.SINGLETON_RETRY_SECONDS)
@@ -0,0 +1,85 @@
+"""
+Postgres notifications between the processes using the database, e.g. the
+workers of the production server. Every process listens on a dedicated
+connection outside the pool, notifications sent while it was reconnecting
+are lost.
+"""
+
+import asyncio
+import logging
+from collections.abc import Callable
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from sqlalchemy import func, select
+
+from utils.database.connection import SQLALCHEMY_DATABASE_URL, engine
+
+# delay before a lost listening connection is opened again
+RECONNECT_SECONDS = 5
+
+
+def notify(channel: str, payload: str) -> None:
+    """
+    Sends the payload, at most 8000 bytes, to the listeners of the channel.
+    Blocks on the database.
+    """
+    with engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT"
+    ) as connection:
+        connection.execute(select(func.pg_notify(channel, payload)))
+
+
+def _connect(channel: str):
+    connection = psycopg2.connect(
+        SQLALCHEMY_DATABASE_URL,
+        # notices a silently dropped connection within about two minutes
+        keepalives=1,
+        keepalives_idle=60,
+        keepalives_interval=10,
+        keepalives_count=6,
+    )
+    connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    with connection.cursor() as cursor:
+        cursor.execute(f'LISTEN "{channel}"')
+    return connection
+
+
+async def listen(channel: str, received: Callable[[str], None]) -> None:
+    """
+    Calls received with the payload of every notification on the channel,
+    from the event loop. Reconnects when the connection is lost. Runs until
+    cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            connection = await asyncio.to_thread(_connect, channel)
+        except psycopg2.Error as e:
+            logging.warning(f"Could not listen on {channel}: {e}")
+            await asyncio.sleep(RECONNECT_SECONDS)
+            continue
+
+        # psycopg2 forgets the descriptor once the connection broke
+        descriptor = connection.fileno()
+        lost = loop.create_future()
+
+        def poll():
+            try:
+                connection.poll()
+            except psycopg2.Error as e:
+                if not lost.done():
+                    lost.set_result(e)
+                return
+            while connection.notifies:
+                received(connection.notifies.pop(0).payload)
+
+        loop.add_reader(descriptor, poll)
+        try:
+            error = await lost
+            logging.warning(f"Lost the connection listening on {channel}: "
+                            f"{error}")
+        finally:
+            loop.remove_reader(descriptor)
+            connection.close()
+        await asyncio.sleep(RECONNECT_SECONDS)
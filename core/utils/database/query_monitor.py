@@ -0,0 +1,185 @@
+"""
+Development aid watching the statements of every request. With
+QUERY_MONITOR enabled, it counts the statements of each request, and logs
+statements executed again and again with different parameters, the pattern
+of lazy loading relationships in a loop (N+1), together with the controller
+line issuing them. Routes executing more statements than their budget are
+logged, or fail with QUERY_BUDGET_STRICT, e.g. when running the test suite
+or in CI.
+Statements slower than SLOW_QUERY_MS are logged independently of the
+monitor.
+"""
+
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils.config.environment import ENV
+
+_SERVICES_DIRECTORY = os.sep + "services" + os.sep
+# bound parameters of psycopg2 and asyncpg, expanded IN lists have one
+# parameter per value
+_PARAMETER = re.compile(r"%\(\w+\)s|\$\d+")
+_PARAMETER_LIST = re.compile(r"\?(\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(HTTPException):
+    """The request executed more statements than its route may."""
+
+    def __init__(self, route: str, budget: int):
+        super().__init__(
+            status_code=500,
+            detail=(
+                f"{route} executed more than its budget of {budget} "
+                "database statements."
+            ),
+        )
+
+
+class RequestQueries:
+    """Statements of a request, shared with its threadpool workers."""
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.count = 0
+        self.shapes: Counter[str] = Counter()
+        # shape -> hashes of the parameters it was executed with, a
+        # statement repeated with the same parameters is no N+1
+        self.parameters: dict[str, set[int]] = defaultdict(set)
+        # shape -> line of the first statement of that shape
+        self.origins: dict[str, str] = {}
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return route.path if route is not None else self.scope["path"]
+
+    @property
+    def budget(self) -> int:
+        return ENV.QUERY_BUDGETS.get(self.route, ENV.QUERY_BUDGET)
+
+
+_request_queries: ContextVar[RequestQueries | None] = ContextVar(
+    "monitored_request_queries", default=None
+)
+
+
+def statement_shape(statement: str) -> str:
+    """The statement without its parameters, e.g. the values of IN lists."""
+    shape = _PARAMETER.sub("?", statement)
+    shape = _PARAMETER_LIST.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def _origin() -> str:
+    """The innermost line of scystream code issuing the statement."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if _SERVICES_DIRECTORY in filename:
+            path = filename[filename.rindex(_SERVICES_DIRECTORY) + 1:]
+            return f"{path}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def monitor_engine(engine: Engine) -> None:
+    """Feeds the statements of the engine to the monitor and slow log."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._scystream_query_start = time.perf_counter()
+
+        queries = _request_queries.get()
+        if queries is None:
+            return
+
+        queries.count += 1
+        shape = statement_shape(statement)
+        queries.shapes[shape] += 1
+        queries.parameters[shape].add(hash(repr(parameters)))
+        if shape not in queries.origins:
+            queries.origins[shape] = _origin()
+
+        budget = queries.budget
+        if (
+            ENV.QUERY_BUDGET_STRICT
+            and budget > 0
+            and queries.count > budget
+        ):
+            raise QueryBudgetExceeded(queries.route, budget)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_scystream_query_start", None)
+        if start is None or ENV.SLOW_QUERY_MS <= 0:
+            return
+
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms >= ENV.SLOW_QUERY_MS:
+            logging.warning(
+                f"Slow statement took {duration_ms:.0f}ms at {_origin()}: "
+                f"{_WHITESPACE.sub(' ', statement)[:500]}"
+            )
+
+
+@contextmanager
+def monitor_queries(scope: dict):
+    """Collects the statements executed within, see monitor_engine."""
+    queries = RequestQueries(scope)
+    token = _request_queries.set(queries)
+    try:
+        yield queries
+    finally:
+        _request_queries.reset(token)
+
+
+def _report(method: str, queries: RequestQueries) -> None:
+    for shape, parameters in queries.parameters.items():
+        if len(parameters) >= ENV.QUERY_REPEAT_THRESHOLD:
+            logging.warning(
+                f"Possible N+1 on {method} {queries.route}: statement "
+                f"executed {queries.shapes[shape]} times with "
+                f"{len(parameters)} different parameters, first at "
+                f"{queries.origins[shape]}: {shape[:300]}"
+            )
+
+    budget = queries.budget
+    if budget > 0 and queries.count > budget:
+        logging.warning(
+            f"{method} {queries.route} executed {queries.count} statements, "
+            f"its budget is {budget}"
+        )
+    else:
+        logging.debug(
+            f"{method} {queries.route} executed {queries.count} statements"
+        )
+
+
+class QueryMonitorMiddleware:
+    """Collects the statements of every HTTP request, see monitor_engine."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with monitor_queries(scope) as queries:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _report(scope["method"], queries)
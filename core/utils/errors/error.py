@@ -1,6 +1,6 @@
 import logging
+import sys
 
-from airflow_client.client.exceptions import ApiException
 from fastapi import HTTPException
 from psycopg2 import Error as PostgresError
 from psycopg2.errors import (
@@ -16,6 +16,15 @@ Pass any Exception to the function and it will raise the.
 """
 
 
+def _is_airflow_error(error: Exception) -> bool:
+    # the airflow client is imported on the first call to airflow, an error
+    # of it cannot exist before
+    exceptions = sys.modules.get("airflow_client.client.exceptions")
+    return exceptions is not None and isinstance(
+        error, exceptions.ApiException
+    )
+
+
 def handle_error(error: Exception) -> None:
     if isinstance(error, exc.IntegrityError):
         postgres_error: PostgresError = error.orig
@@ -33,7 +42,7 @@ def handle_error(error: Exception) -> None:
             409,
             detail=f"db integrity violated: {error_msg}",
         )
-    if isinstance(error, ApiException):
+    if _is_airflow_error(error):
         logging.error(
             f"API Exception ocurred when contacting Airflow: {error}",
         )
@@ -0,0 +1,34 @@
+from uuid import UUID
+
+from utils.metrics.registry import CACHE_LOOKUPS
+
+
+def project_etag(
+    project_id: UUID, version: int, state: str | None = None
+) -> str:
+    """
+    state is appended for responses that also depend on data not covered by
+    the project version, e.g. the run states of the blocks.
+    """
+    if state is None:
+        return f'"{project_id}-{version}"'
+    return f'"{project_id}-{version}-{state}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Checks an If-None-Match header against the current ETag.
+    Weak comparison is used, as required for If-None-Match.
+    """
+    if not if_none_match:
+        CACHE_LOOKUPS.inc(cache="http_etag", result="miss")
+        return False
+
+    matches = if_none_match.strip() == "*" or any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+    CACHE_LOOKUPS.inc(
+        cache="http_etag", result="hit" if matches else "miss"
+    )
+    return matches
@@ -0,0 +1,199 @@
+"""
+Shared layer for the calls core makes to other services (airflow, keycloak,
+mail). Every service gets a circuit breaker: after a number of consecutive
+failures it opens and calls fail fast for a while, instead of piling up
+threads waiting for a stalled service. Failed idempotent calls are retried
+a bounded number of times, with jittered backoff.
+Only errors telling that the service is unavailable count as failures, e.g.
+connection errors, timeouts and 5xx responses. All other errors are the
+callers business and pass through unchanged.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException
+
+from utils.config.environment import ENV
+from utils.metrics.registry import Histogram
+from utils.tracing import tracer
+
+T = TypeVar("T")
+
+# listed in the health endpoint even before their first call
+SERVICES = ("airflow", "keycloak", "mail")
+
+CALL_SECONDS = Histogram(
+    "scystream_outbound_call_duration_seconds",
+    "Latency of calls to other services, per outcome: ok, unavailable, "
+    "client_error (the request was refused) or circuit_open",
+    labels=("service", "outcome"),
+)
+
+
+def record_call(service: str, start: float, outcome: str) -> None:
+    """Records a call that started at perf_counter() start."""
+    CALL_SECONDS.observe(
+        time.perf_counter() - start, service=service, outcome=outcome
+    )
+
+
+class ServiceUnavailable(HTTPException):
+    """The circuit breaker of the service is open."""
+
+    def __init__(self, service: str, retry_after: float):
+        super().__init__(
+            status_code=503,
+            detail=f"{service} is unavailable, try again later.",
+            headers={"Retry-After": str(max(1, round(retry_after)))},
+        )
+        self.service = service
+
+
+class CircuitBreaker:
+    def __init__(
+        self, name: str, failure_threshold: int, reset_seconds: float
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.last_error: str | None = None
+        self._lock = threading.Lock()
+        # only one call probes a service while the breaker is half open
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+
+    def acquire(self) -> None:
+        """Raises ServiceUnavailable if calls are not let through."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return
+
+            retry_after = self.reset_seconds
+            if self.opened_at is not None:
+                retry_after -= time.monotonic() - self.opened_at
+            raise ServiceUnavailable(self.name, retry_after)
+
+    def success(self) -> None:
+        with self._lock:
+            if self.opened_at is not None:
+                logging.info(f"Circuit breaker of {self.name} closed")
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def failure(self, error: Exception) -> None:
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            if self._probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._probing:
+                    logging.warning(
+                        f"Circuit breaker of {self.name} opened after "
+                        f"{self.failures} failures: {error}"
+                    )
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def release(self) -> None:
+        """Ends a probe that neither succeeded nor failed."""
+        with self._lock:
+            self._probing = False
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(service: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if service not in _breakers:
+            _breakers[service] = CircuitBreaker(
+                service,
+                ENV.CIRCUIT_BREAKER_FAILURES,
+                ENV.CIRCUIT_BREAKER_RESET_SECONDS,
+            )
+        return _breakers[service]
+
+
+def breaker_states() -> dict[str, dict]:
+    for service in SERVICES:
+        breaker(service)
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.status() for b in breakers}
+
+
+def call(
+    service: str,
+    fn: Callable[..., T],
+    *args,
+    is_unavailable: Callable[[Exception], bool],
+    idempotent: bool = True,
+    **kwargs,
+) -> T:
+    """
+    Calls fn through the circuit breaker of the service. is_unavailable
+    tells which errors mean that the service is unavailable. Only
+    idempotent calls are retried, a retried trigger could start a run twice.
+    """
+    cb = breaker(service)
+    attempts = 1 + (ENV.OUTBOUND_RETRIES if idempotent else 0)
+
+    with tracer.span(f"{service}.call") as span:
+        for attempt in range(attempts):
+            if span is not None:
+                span.attributes["attempts"] = attempt + 1
+            start = time.perf_counter()
+            try:
+                cb.acquire()
+            except ServiceUnavailable:
+                record_call(service, start, "circuit_open")
+                raise
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_unavailable(e):
+                    record_call(service, start, "client_error")
+                    cb.release()
+                    raise
+                record_call(service, start, "unavailable")
+                cb.failure(e)
+                if attempt + 1 == attempts:
+                    raise
+                # full jitter, so retries of many requests do not synchronize
+                delay = random.uniform(
+                    0, ENV.OUTBOUND_BACKOFF_SECONDS * 2**attempt
+                )
+                logging.debug(
+                    f"Retrying call to {service} in {delay:.2f}s: {e}"
+                )
+                time.sleep(delay)
+                continue
+
+            record_call(service, start, "ok")
+            cb.success()
+            return result
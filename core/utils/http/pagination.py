@@ -0,0 +1,18 @@
+import base64
+import json
+
+from fastapi import HTTPException
+
+
+def encode_cursor(*values) -> str:
+    """Encodes the sort key of the last item of a page as opaque cursor."""
+    return base64.urlsafe_b64encode(
+        json.dumps(values, separators=(",", ":")).encode()
+    ).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid cursor")
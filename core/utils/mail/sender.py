@@ -1,5 +1,7 @@
+import logging
 import requests
 from utils.config.environment import ENV
+from utils.http import outbound
 from enum import Enum
 
 _PROTOCOL: str = "https" if ENV.CATAPULTE_SSL_ENABLED else "http"
@@ -17,16 +19,38 @@ def _send_mail(
 ) -> bool:
     url = f"{_CATAPULTE_BASE_URL}/templates/{template.value}/json"
 
+    try:
+        response = outbound.call(
+            "mail",
+            _post,
+            url,
+            {
+                "from": ENV.CATAPULTE_SENDER,
+                "params": parameters,
+                "to": receiver,
+            },
+            is_unavailable=_mail_unavailable,
+            # a retry could send the mail twice
+            idempotent=False,
+        )
+    except (outbound.ServiceUnavailable, requests.RequestException) as e:
+        logging.warning(f"Could not send {template.value} mail: {e}")
+        return False
+
+    return response.status_code == 204
+
+
+def _post(url: str, body: dict) -> requests.Response:
     response = requests.post(
-        url,
-        json={
-            "from": ENV.CATAPULTE_SENDER,
-            "params": parameters,
-            "to": receiver,
-        },
+        url, json=body, timeout=ENV.MAIL_TIMEOUT_SECONDS
     )
+    if response.status_code >= 500:
+        response.raise_for_status()
+    return response
 
-    return response.status_code == 204
+
+def _mail_unavailable(error: Exception) -> bool:
+    return isinstance(error, requests.RequestException)
 
 
 def send_test_mail(receiver: str) -> bool:
@@ -0,0 +1,94 @@
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils.metrics.registry import Counter, Gauge, Histogram
+
+REQUEST_SECONDS = Histogram(
+    "scystream_http_request_duration_seconds",
+    "Latency of HTTP requests per route",
+    labels=("method", "route", "status"),
+)
+REQUEST_QUERIES = Histogram(
+    "scystream_http_request_db_queries",
+    "Database statements executed per HTTP request",
+    labels=("route",),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+DB_QUERIES = Counter(
+    "scystream_db_queries_total",
+    "Database statements executed",
+    labels=("engine",),
+)
+
+# statements executed by the current request, a list so the counts of
+# threadpool workers, running in a copy of the context, are seen as well
+_request_queries: ContextVar[list[int] | None] = ContextVar(
+    "request_queries", default=None
+)
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Counts the statements and exposes the pool usage of the engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*_):
+        DB_QUERIES.inc(engine=name)
+        queries = _request_queries.get()
+        if queries is not None:
+            queries[0] += 1
+
+    pool = engine.pool
+    Gauge(
+        f"scystream_db_pool_{name}_connections",
+        f"Connections of the {name} database pool",
+        labels=("state",),
+        fn=lambda: {
+            ("checked_out",): pool.checkedout(),
+            ("idle",): pool.checkedin(),
+            ("overflow",): max(pool.overflow(), 0),
+            ("size",): pool.size(),
+        },
+    )
+
+
+class MetricsMiddleware:
+    """
+    Measures latency and database statements of every HTTP request, per
+    route template, so /compute_block/by_project/{project_id} is one series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        queries = [0]
+        token = _request_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_queries.reset(token)
+            route = scope.get("route")
+            route = route.path if route is not None else "unmatched"
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=route,
+                status=status,
+            )
+            REQUEST_QUERIES.observe(queries[0], route=route)
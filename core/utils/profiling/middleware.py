@@ -0,0 +1,92 @@
+import asyncio
+import hmac
+import logging
+import time
+from datetime import UTC, datetime
+
+from utils.config.environment import ENV
+from utils.profiling import profiler
+from utils.tracing import tracer
+
+PROFILE_HEADER = b"x-profile"
+
+
+def _header(scope, name: bytes) -> bytes | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    Profiles HTTP requests sent with the X-Profile header set to
+    PROFILING_TOKEN, and captures the slowest requests per route if
+    PROFILING_SLOWEST is set. The profile is stored under the request id,
+    which is returned in the X-Profile-ID header. Only added to the app if
+    either is configured, otherwise requests do not pass it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _requested(self, scope) -> bool:
+        if not ENV.PROFILING_TOKEN:
+            return False
+        flag = _header(scope, PROFILE_HEADER)
+        return flag is not None and hmac.compare_digest(
+            flag, ENV.PROFILING_TOKEN.encode()
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = tracer.current_request_id()
+        profile = None
+        if self._requested(scope) and request_id is not None:
+            profile = profiler.Profile(ENV.PROFILING_INTERVAL_MS / 1000)
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profile is not None:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-profile-id", request_id.encode()),
+                    ]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            if profile is None:
+                await self.app(scope, receive, send_wrapper)
+            else:
+                await profile.run(self.app, scope, receive, send_wrapper)
+        finally:
+            seconds = time.perf_counter() - start
+            route = scope.get("route")
+            route = route.path if route is not None else "unmatched"
+            if profile is not None:
+                try:
+                    await asyncio.to_thread(
+                        profiler.save_profile, request_id, profile
+                    )
+                except OSError:
+                    logging.exception("Could not store the request profile")
+                logging.info(
+                    f"Profiled {scope['method']} {route} in "
+                    f"{seconds * 1000:.1f}ms with {profile.samples} samples"
+                )
+            if ENV.PROFILING_SLOWEST > 0:
+                profiler.slowest.add(route, seconds, {
+                    "request_id": request_id,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "finished_at": datetime.now(UTC).isoformat(),
+                    "profiled": profile is not None,
+                })
@@ -0,0 +1,197 @@
+"""
+On-demand profiling of single requests and a capture of the slowest
+requests per route, both enabled by configuration only.
+
+A profiled request is sampled by a thread reading the stacks of all
+threads every PROFILING_INTERVAL_MS. Only stacks of the request are kept:
+its coroutines on the event loop, and the threadpool workers running a
+copy of its context, i.e. its sync handlers and dependencies. Profiles are
+stored in the collapsed stack format of flamegraph.pl, which speedscope
+and most flame graph tools read as well.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import re
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from contextvars import Context, ContextVar
+
+from utils.config.environment import ENV
+
+# the profile of the current request, seen by threadpool workers as well
+_current_profile: ContextVar["Profile | None"] = ContextVar(
+    "current_profile", default=None
+)
+# request ids are used as file names of the profiles
+_VALID_PROFILE_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+_CORE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)
+)))
+# the longest first, site-packages may be within the standard library
+_LIBRARY_DIRECTORIES = sorted(
+    {sysconfig.get_paths()[name] for name in ("purelib", "platlib", "stdlib")},
+    key=len,
+    reverse=True,
+)
+
+
+def _location(filename: str) -> str:
+    for directory in (*_LIBRARY_DIRECTORIES, _CORE_DIRECTORY):
+        if filename.startswith(directory):
+            return os.path.relpath(filename, directory)
+    return os.path.basename(filename)
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    # frames of a function are merged, whatever line they are at
+    return (f"{code.co_qualname} "
+            f"({_location(code.co_filename)}:{code.co_firstlineno})")
+
+
+class Profile:
+    def __init__(self, interval: float):
+        self.interval = interval
+        # collapsed stack -> samples
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._sample, name="request-profiler", daemon=True
+        )
+
+    async def run(self, app, scope, receive, send) -> None:
+        """
+        Serves the request under the profiler. The frame of this coroutine
+        is the root of the sampled stacks on the event loop.
+        """
+        token = _current_profile.set(self)
+        self._thread.start()
+        try:
+            await app(scope, receive, send)
+        finally:
+            self._stopped.set()
+            # the sampler finishes its current sample, up to an interval
+            await asyncio.to_thread(self._thread.join)
+            _current_profile.reset(token)
+
+    def _is_root(self, frame) -> bool:
+        code = frame.f_code
+        if code is Profile.run.__code__:
+            return frame.f_locals.get("self") is self
+        # workers of the threadpool run the function in a copy of the
+        # context of the request, e.g. anyio's WorkerThread.run
+        if code.co_name == "run":
+            context = frame.f_locals.get("context")
+            return (isinstance(context, Context)
+                    and context.get(_current_profile) is self)
+        return False
+
+    def _request_stack(self, frame) -> str | None:
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            if self._is_root(frame):
+                return ";".join(_label(f) for f in reversed(frames))
+            frame = frame.f_back
+        return None
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = self._request_stack(frame)
+                if stack is not None:
+                    self.stacks[stack] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.items()
+        )
+
+
+def _profile_path(request_id: str) -> str | None:
+    if not _VALID_PROFILE_ID.match(request_id):
+        return None
+    return os.path.join(ENV.PROFILING_DIR, f"{request_id}.folded")
+
+
+def save_profile(request_id: str, profile: Profile) -> None:
+    path = _profile_path(request_id)
+    os.makedirs(ENV.PROFILING_DIR, exist_ok=True)
+    with open(path, "w") as f:
+        f.write(profile.collapsed())
+
+
+def load_profile(request_id: str) -> str | None:
+    """The stored profile of the request, None if there is none."""
+    path = _profile_path(request_id)
+    if path is None:
+        return None
+    try:
+        with open(path) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+class SlowestRequests:
+    """
+    The size slowest requests of every route within the last window
+    seconds. Requests leave the capture once they are older, so it follows
+    the current behaviour of core, not the worst it ever had.
+    """
+
+    def __init__(self, size: int, window: float):
+        self.size = size
+        self.window = window
+        # route -> min heap of (duration, sequence, finished at, request)
+        self._routes: dict[str, list[tuple]] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def _expire(self, heap: list[tuple], now: float) -> list[tuple]:
+        recent = [entry for entry in heap if now - entry[2] <= self.window]
+        if len(recent) != len(heap):
+            heapq.heapify(recent)
+        return recent
+
+    def add(self, route: str, seconds: float, request: dict) -> None:
+        now = time.monotonic()
+        with self._lock:
+            heap = self._expire(self._routes.get(route, []), now)
+            entry = (seconds, next(self._sequence), now, request)
+            if len(heap) < self.size:
+                heapq.heappush(heap, entry)
+            elif seconds > heap[0][0]:
+                heapq.heapreplace(heap, entry)
+            self._routes[route] = heap
+
+    def snapshot(self) -> dict[str, list[dict]]:
+        """The captured requests of every route, the slowest first."""
+        now = time.monotonic()
+        with self._lock:
+            for route in list(self._routes):
+                self._routes[route] = self._expire(self._routes[route], now)
+            return {
+                route: [
+                    {**request, "duration_ms": round(seconds * 1000, 3)}
+                    for seconds, _, _, request in sorted(heap, reverse=True)
+                ]
+                for route, heap in sorted(self._routes.items())
+                if heap
+            }
+
+
+slowest = SlowestRequests(
+    ENV.PROFILING_SLOWEST, ENV.PROFILING_SLOWEST_WINDOW_SECONDS
+)
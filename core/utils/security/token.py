@@ -1,20 +1,24 @@
+import hashlib
+import hmac
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import cache
 from uuid import UUID as UUID4
 
 from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from keycloak import KeycloakOpenID
-from keycloak.exceptions import KeycloakAuthenticationError, KeycloakPostError
 from pydantic import BaseModel
 from utils.config.environment import ENV
+from utils.http import outbound
 
 bearer_scheme = HTTPBearer()
 
-keycloak_openid = KeycloakOpenID(
-    server_url=ENV.KEYCLOAK_SERVER_URL,
-    realm_name=ENV.KEYCLOAK_REALM,
-    client_id=ENV.KEYCLOAK_CLIENT_ID,
-    client_secret_key=ENV.KEYCLOAK_CLIENT_SECRET,
-)
+# token hash -> (time of verification, user), of recently verified users
+_known_users: OrderedDict[str, tuple[float, "User"]] = OrderedDict()
+_known_users_lock = threading.Lock()
+_KNOWN_USERS_SIZE = 1024
 
 
 class User(BaseModel):
@@ -28,9 +32,85 @@ class User(BaseModel):
     fullname: str | None = None
 
 
+@cache
+def get_keycloak_openid():
+    """
+    The keycloak client, created on first use: python-keycloak is slow to
+    import and not needed until the first user is verified.
+    """
+    from keycloak import KeycloakOpenID
+
+    return KeycloakOpenID(
+        server_url=ENV.KEYCLOAK_SERVER_URL,
+        realm_name=ENV.KEYCLOAK_REALM,
+        client_id=ENV.KEYCLOAK_CLIENT_ID,
+        client_secret_key=ENV.KEYCLOAK_CLIENT_SECRET,
+        timeout=ENV.KEYCLOAK_TIMEOUT_SECONDS,
+    )
+
+
+def _keycloak_unavailable(error: Exception) -> bool:
+    from keycloak.exceptions import KeycloakConnectionError, KeycloakError
+
+    if isinstance(error, KeycloakConnectionError):
+        return True
+    return isinstance(error, KeycloakError) and (
+        error.response_code is not None and error.response_code >= 500
+    )
+
+
+def _remember_user(token: str, user: User) -> None:
+    key = hashlib.sha256(token.encode()).hexdigest()
+    with _known_users_lock:
+        _known_users[key] = (time.monotonic(), user)
+        _known_users.move_to_end(key)
+        while len(_known_users) > _KNOWN_USERS_SIZE:
+            _known_users.popitem(last=False)
+
+
+def _recently_verified_user(token: str) -> User | None:
+    key = hashlib.sha256(token.encode()).hexdigest()
+    with _known_users_lock:
+        known = _known_users.get(key)
+    if known is None:
+        return None
+
+    verified_at, user = known
+    if time.monotonic() - verified_at > ENV.KEYCLOAK_FALLBACK_SECONDS:
+        return None
+    return user
+
+
 def verify(token: str) -> User:
+    from keycloak.exceptions import KeycloakError
+
     try:
-        user_info = keycloak_openid.userinfo(token)
+        user = _verify(token)
+    except (outbound.ServiceUnavailable, KeycloakError) as e:
+        unavailable = isinstance(e, outbound.ServiceUnavailable) or (
+            _keycloak_unavailable(e)
+        )
+        # keycloak is down, accept users that were verified shortly before
+        user = _recently_verified_user(token) if unavailable else None
+        if user is None:
+            raise
+        logging.debug(f"Keycloak unavailable, using known user {user.uuid}")
+        return user
+
+    _remember_user(token, user)
+    return user
+
+
+def _verify(token: str) -> User:
+    from keycloak.exceptions import KeycloakAuthenticationError
+
+    try:
+        user_info = outbound.call(
+            "keycloak",
+            get_keycloak_openid().userinfo,
+            token,
+            is_unavailable=_keycloak_unavailable,
+        )
 
         if not user_info:
             raise HTTPException(
@@ -76,14 +156,104 @@ def get_user(
     return user_info
 
 
+def project_callback_token(project_id: UUID4) -> str:
+    """
+    Token the generated DAG of a project uses to report run states. It is
+    derived from the project id, so a leaked DAG file only allows reporting
+    states of its own project.
+    """
+    return _callback_token(str(project_id))
+
+
+def image_callback_token() -> str:
+    """Token the image prewarm DAG uses to report the pulled images."""
+    return _callback_token("images")
+
+
+def _callback_token(subject: str) -> str:
+    return hmac.new(
+        ENV.AIRFLOW_CALLBACK_SECRET.encode(),
+        subject.encode(),
+        hashlib.sha256,
+    ).hexdigest()
+
+
+def check_callback_secret() -> None:
+    """
+    Fails outside of development if the callback secret is left at its
+    default, anybody could forge callback tokens with it.
+    """
+    default = type(ENV).model_fields["AIRFLOW_CALLBACK_SECRET"].default
+    if not ENV.DEVELOPMENT and ENV.AIRFLOW_CALLBACK_SECRET == default:
+        raise RuntimeError(
+            "Shutdown, AIRFLOW_CALLBACK_SECRET has to be set outside of "
+            "development."
+        )
+
+
+def verify_project_callback(
+    project_id: UUID4,
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> UUID4:
+    if not hmac.compare_digest(
+        credentials.credentials,
+        project_callback_token(project_id),
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid callback token",
+        )
+
+    return project_id
+
+
+def verify_image_callback(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> None:
+    if not hmac.compare_digest(
+        credentials.credentials,
+        image_callback_token(),
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid callback token",
+        )
+
+
+def verify_profiling_token(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> None:
+    # without a token, profiling is disabled and its endpoints do not exist
+    if not ENV.PROFILING_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    if not hmac.compare_digest(
+        credentials.credentials,
+        ENV.PROFILING_TOKEN,
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid profiling token",
+        )
+
+
 def authenticate_user(keycode: str, request: Request) -> str:
+    from keycloak.exceptions import (
+        KeycloakAuthenticationError,
+        KeycloakPostError,
+    )
+
     try:
-        token = keycloak_openid.token(
+        token = outbound.call(
+            "keycloak",
+            get_keycloak_openid().token,
             grant_type="authorization_code",
             code=keycode,
             redirect_uri=ENV.KEYCLOAK_REDIRECT_URL
             or str(request.url_for("callback")),
             scope="openid profile email",
+            is_unavailable=_keycloak_unavailable,
+            # authorization codes can only be redeemed once
+            idempotent=False,
         )
         return token["access_token"]
     except KeycloakAuthenticationError as exc:
@@ -0,0 +1,89 @@
+import re
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils.tracing import tracer
+
+REQUEST_ID_HEADER = "x-request-id"
+# request ids sent by clients end up in logs and DAG runs
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+def trace_engine(engine: Engine) -> None:
+    """Records a span for every statement executed on the engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        if context is None:
+            return
+        context._scystream_span = tracer.start_span(
+            "db.statement",
+            statement=statement[:200],
+            executemany=executemany,
+        )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_scystream_span", None)
+        if span is not None:
+            span.attributes["rows"] = cursor.rowcount
+            span.finish()
+            context._scystream_span = None
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        context = exception_context.execution_context
+        span = getattr(context, "_scystream_span", None)
+        if span is not None:
+            span.finish(exception_context.original_exception)
+            context._scystream_span = None
+
+
+class TracingMiddleware:
+    """
+    Opens the trace of every HTTP request, and returns the request id in the
+    X-Request-ID header. A valid X-Request-ID sent by the client is used as
+    request id, so traces can be correlated across services. Websockets get
+    a request id but no trace, it would collect spans for as long as they
+    are connected.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name.decode("latin-1") == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")
+                break
+        if request_id is None or not _VALID_REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (REQUEST_ID_HEADER.encode(), request_id.encode()),
+                ]
+            await send(message)
+
+        if scope["type"] == "websocket":
+            with tracer.bind_request_id(request_id):
+                await self.app(scope, receive, send)
+            return
+
+        async with tracer.request_trace(
+            request_id, f"{scope['method']} {scope['path']}"
+        ) as root:
+            await self.app(scope, receive, send_with_request_id)
+            if root is not None:
+                route = scope.get("route")
+                if route is not None:
+                    root.attributes["route"] = route.path
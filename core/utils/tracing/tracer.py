@@ -0,0 +1,182 @@
+"""
+Minimal request tracing. Every request gets a trace with a root span, code
+opens child spans around the parts worth measuring, e.g. controller phases,
+database statements and calls to other services. Finished traces are
+written to the log or appended to a JSON lines file, depending on
+TRACING_EXPORTER.
+The request id of a trace is available to every log record and is passed
+to the DAG runs triggered by the request.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from utils.config.environment import ENV
+
+
+class Span:
+    __slots__ = (
+        "trace", "name", "span_id", "parent_id", "start", "end",
+        "attributes", "error",
+    )
+
+    def __init__(self, trace: "Trace", name: str, parent_id: str | None,
+                 attributes: dict):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end: float | None = None
+        self.attributes = attributes
+        self.error: str | None = None
+
+    def finish(self, error: BaseException | None = None) -> None:
+        self.end = time.time()
+        if error is not None:
+            self.error = repr(error)
+        self.trace.spans.append(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": round(((self.end or self.start) - self.start)
+                                 * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        # finished spans, appended from the event loop and worker threads
+        self.spans: list[Span] = []
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar(
+    "current_trace", default=None
+)
+_current_span: ContextVar[Span | None] = ContextVar(
+    "current_span", default=None
+)
+_request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+_export_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return ENV.TRACING_EXPORTER != "none"
+
+
+def current_request_id() -> str | None:
+    return _request_id.get()
+
+
+def start_span(name: str, **attributes) -> Span | None:
+    """
+    Opens a span as child of the current one, it has to be finished by the
+    caller. Returns None outside of a traced request.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+
+    parent = _current_span.get()
+    return Span(
+        trace, name, parent.span_id if parent else None, attributes
+    )
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Measures the enclosed block as child of the current span."""
+    current = start_span(name, **attributes)
+    if current is None:
+        yield None
+        return
+
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(e)
+        raise
+    else:
+        current.finish()
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def bind_request_id(request_id: str):
+    """Binds the request id without tracing, e.g. for websockets."""
+    id_token = _request_id.set(request_id)
+    try:
+        yield
+    finally:
+        _request_id.reset(id_token)
+
+
+@asynccontextmanager
+async def request_trace(request_id: str, name: str, **attributes):
+    """
+    Binds the request id, and a trace if tracing is enabled. The trace is
+    exported from a worker thread, the event loop does not wait for the log
+    or the file.
+    """
+    if not enabled():
+        with bind_request_id(request_id):
+            yield None
+        return
+
+    trace = Trace(request_id)
+    trace_token = _current_trace.set(trace)
+    try:
+        with bind_request_id(request_id), span(name, **attributes) as root:
+            yield root
+    finally:
+        _current_trace.reset(trace_token)
+        await asyncio.to_thread(_export, trace)
+
+
+def _export(trace: Trace) -> None:
+    root = trace.spans[-1] if trace.spans else None
+    if root is None:
+        return
+    duration_ms = ((root.end or root.start) - root.start) * 1000
+    if duration_ms < ENV.TRACING_MIN_DURATION_MS:
+        return
+
+    record = {
+        "request_id": trace.request_id,
+        "spans": [s.to_dict() for s in trace.spans],
+    }
+    if ENV.TRACING_EXPORTER == "log":
+        logging.info(f"trace {json.dumps(record)}")
+        return
+
+    line = json.dumps(record) + "\n"
+    with _export_lock:
+        directory = os.path.dirname(ENV.TRACING_FILE)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(ENV.TRACING_FILE, "a") as f:
+            f.write(line)
+
+
+class RequestIdLogFilter(logging.Filter):
+    """Adds the request id, or "-" outside of requests, to log records."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get() or "-"
+        return True